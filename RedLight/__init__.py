@@ -6,6 +6,7 @@ from .api import (
     VideoDownloader,
     DownloadVideo,
     GetVideoInfo,
+    GetVideoInfoBatch,
     ListAvailableQualities,
     # Resume/Pause (NEW in v1.0.14)
     StartResumableDownload,
@@ -14,6 +15,8 @@ from .api import (
     CancelDownload,
     GetActiveDownloads,
     GetPausedDownloads,
+    GetDownloadQueueStatus,
+    SetMaxConcurrentDownloads,
     # History (NEW in v1.0.14)
     GetDownloadHistory,
     ClearDownloadHistory,
@@ -23,6 +26,7 @@ from .api import (
     GetStatsBySite,
     GetStatsByQuality,
     GetStatsByDate,
+    RebuildStatistics,
     # Notifications (NEW in v1.0.14)
     EnableNotifications,
     SetNotificationSound,
@@ -33,7 +37,12 @@ from .api import (
 from .batch import BatchDownloader
 
 # Format conversion
-from .converter import VideoConverter
+from .converter import VideoConverter, ConversionCancelled
+from .conversion_queue import ConversionScheduler, ConversionJob, ConversionStatus, GetConversionScheduler
+
+# MPEG-TS segment validation
+from .ts_validator import ValidateTsSegment, TsValidationResult
+from .remuxer import RemuxTsToMp4, RemuxError
 
 # Playlist/Channel
 from .playlist import PlaylistDownloader
@@ -49,6 +58,12 @@ from .async_downloader import AsyncVideoDownloader
 
 # Resume Manager (NEW in v1.0.14)
 from .resume_manager import ResumeManager, DownloadState, GetResumeManager
+from .segment_bitmap import SegmentBitmap
+
+# Live job registry and event bus
+from .jobs import JobRegistry, Job, JobEvent, JobEventType, EventBus, GetJobRegistry
+from .download_queue import DownloadQueue, GetDownloadQueue
+from .metrics import MetricsRegistry, GetMetrics
 
 # Notifications (NEW in v1.0.14)
 from .notifications import NotificationManager, GetNotifier
@@ -58,6 +73,7 @@ from .statistics import DownloadStatistics, GetStatistics
 
 # Database
 from .database import DatabaseManager
+from .storage import Storage, GetStorage
 
 # Configuration (NEW in v1.0.14)
 from .config import (
@@ -98,6 +114,9 @@ from .sites.xvideos import XVideosDownloader, XVideosSearch
 from .sites.xhamster import XHamsterDownloader, XHamsterSearch
 from .sites.xnxx import XNXXDownloader, XNXXSearch
 from .multi_search import MultiSiteSearch
+from .search_cache import SearchCache, GetSearchCache, ClearSearchCache
+from .result_merge import MergeResults, NormalizeTitle, ParseDuration
+from .prefetch import Prefetcher
 
 from .version import __version__, __author__, __description__
 
@@ -106,6 +125,7 @@ __all__ = [
     "VideoDownloader",
     "DownloadVideo",
     "GetVideoInfo",
+    "GetVideoInfoBatch",
     "ListAvailableQualities",
     # Resume/Pause (NEW in v1.0.14)
     "StartResumableDownload",
@@ -116,16 +136,33 @@ __all__ = [
     "GetPausedDownloads",
     "ResumeManager",
     "DownloadState",
+    "SegmentBitmap",
+    # Live jobs
+    "JobRegistry",
+    "Job",
+    "JobEvent",
+    "JobEventType",
+    "EventBus",
+    "GetJobRegistry",
+    "DownloadQueue",
+    "GetDownloadQueue",
+    "MetricsRegistry",
+    "GetMetrics",
+    "GetDownloadQueueStatus",
+    "SetMaxConcurrentDownloads",
     # History (NEW in v1.0.14)
     "GetDownloadHistory",
     "ClearDownloadHistory",
     "ExportHistory",
     "DatabaseManager",
+    "Storage",
+    "GetStorage",
     # Statistics (NEW in v1.0.14)
     "GetStatistics",
     "GetStatsBySite",
     "GetStatsByQuality",
     "GetStatsByDate",
+    "RebuildStatistics",
     "DownloadStatistics",
     # Notifications (NEW in v1.0.14)
     "EnableNotifications",
@@ -159,11 +196,27 @@ __all__ = [
     "BatchDownloader",
     # Conversion
     "VideoConverter",
+    "ConversionCancelled",
+    "ConversionScheduler",
+    "ConversionJob",
+    "ConversionStatus",
+    "GetConversionScheduler",
+    "ValidateTsSegment",
+    "TsValidationResult",
+    "RemuxTsToMp4",
+    "RemuxError",
     # Playlist
     "PlaylistDownloader",
     # Search
     "PornHubSearch",
     "MultiSiteSearch",
+    "SearchCache",
+    "GetSearchCache",
+    "ClearSearchCache",
+    "MergeResults",
+    "NormalizeTitle",
+    "ParseDuration",
+    "Prefetcher",
     # Metadata
     "MetadataEditor",
     # Async API
@@ -1,11 +1,24 @@
 ﻿from pathlib import Path
-from typing import Optional, Callable, Dict, List, Union, Any
+import threading
+import time
+from typing import Optional, Callable, Dict, Iterator, List, Union, Any
 from .downloader import CustomHLSDownloader
 from .sites import SiteRegistry
 from .resume_manager import GetResumeManager
 from .database import DatabaseManager
 from .statistics import GetStatistics
 from .notifications import GetNotifier
+from .metrics import extraction_seconds, coalesced_requests
+from .singleflight import SingleFlight
+from .playback import BindJob
+
+
+# Identical lookups share one extraction; results stay fresh for a couple of minutes
+_info_flight = SingleFlight(ttl=120.0)
+# Serialises the "already running or downloaded?" check with job creation
+_start_lock = threading.Lock()
+# download_id -> (site, queue target) for downloads that have not finished yet
+_queued_downloads: Dict[str, Any] = {}
 
 
 def DownloadVideo(
@@ -15,7 +28,8 @@ def DownloadVideo(
     filename: Optional[str] = None,
     keep_ts: bool = False,
     proxy: Optional[str] = None,
-    on_progress: Optional[Callable[[int, int], None]] = None
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    metadata: Optional[Dict[str, str]] = None
 ) -> str:
     print(f"[DownloadVideo] Getting downloader for {url}", flush=True)
     registry = SiteRegistry()
@@ -24,6 +38,9 @@ def DownloadVideo(
     if not downloader:
         raise ValueError(f"Unsupported URL. Supported sites: {', '.join([s['name'] for s in registry.get_all_sites()])}")
     
+    if metadata is not None:
+        metadata = {'site': downloader.get_site_name(), 'url': url, **metadata}
+    
     print(f"[DownloadVideo] Found downloader: {type(downloader).__name__}, starting download...", flush=True)
     result = downloader.download(
         url=url,
@@ -32,7 +49,8 @@ def DownloadVideo(
         filename=filename,
         keep_original=keep_ts,
         proxy=proxy,
-        on_progress=on_progress
+        on_progress=on_progress,
+        metadata=metadata
     )
     print(f"[DownloadVideo] Download finished: {result}", flush=True)
     return result
@@ -45,7 +63,62 @@ def GetVideoInfo(url: str) -> Dict[str, Union[str, List[int]]]:
     if not downloader:
         raise ValueError(f"Unsupported URL. Supported sites: {', '.join([s['name'] for s in registry.get_all_sites()])}")
     
-    return downloader.get_info(url)
+    return _shared_get_info(downloader, url)
+
+
+def _shared_get_info(downloader, url: str) -> Dict[str, Any]:
+    video_id = downloader.get_video_id(url)
+    key = f"{downloader.get_site_name()}:{video_id}" if video_id else url
+    info, shared = _info_flight.do_shared(key, lambda: _timed_get_info(downloader, url))
+    if shared:
+        coalesced_requests.inc(kind="info")
+    return info
+
+
+def _timed_get_info(downloader, url: str) -> Dict[str, Any]:
+    site = downloader.get_site_name()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        info = downloader.get_info(url)
+        outcome = "ok"
+        return info
+    finally:
+        extraction_seconds.observe(time.perf_counter() - started, site=site, outcome=outcome)
+
+
+def GetVideoInfoBatch(urls: List[str], max_workers: int = 8) -> Iterator[Dict[str, Any]]:
+    """Yield {"index", "url", "info" | "error"} for each URL as soon as its extraction finishes"""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    
+    registry = SiteRegistry()
+    local = threading.local()
+    
+    def extract(url: str) -> Dict[str, Any]:
+        # One downloader per site per worker thread, so its requests.Session
+        # (and the pooled connections behind it) are reused across URLs
+        site = registry.detect_site(url)
+        if not site:
+            raise ValueError(f"Unsupported URL. Supported sites: {', '.join([s['name'] for s in registry.get_all_sites()])}")
+        downloaders = getattr(local, "downloaders", None)
+        if downloaders is None:
+            downloaders = local.downloaders = {}
+        if site not in downloaders:
+            downloaders[site] = registry.get_downloader_by_name(site)
+        return _shared_get_info(downloaders[site], url)
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls) or 1)), thread_name_prefix="info-batch")
+    try:
+        futures = {executor.submit(extract, url): (index, url) for index, url in enumerate(urls)}
+        for future in as_completed(futures):
+            index, url = futures[future]
+            try:
+                yield {"index": index, "url": url, "info": future.result()}
+            except Exception as e:
+                yield {"index": index, "url": url, "error": str(e)}
+    finally:
+        # Consumer went away (e.g. HTTP client disconnected): drop what has not started
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def ListAvailableQualities(url: str) -> List[int]:
@@ -58,13 +131,16 @@ def StartResumableDownload(
     output_dir: str = "./downloads",
     quality: str = "best",
     filename: Optional[str] = None,
-    proxy: Optional[str] = None
+    proxy: Optional[str] = None,
+    metadata: Optional[Dict[str, str]] = None,
+    force: bool = False
 ) -> str:
-    import threading
     from .resume_manager import GetResumeManager
+    from .jobs import GetJobRegistry
     from .config import GetConfig
     
     manager = GetResumeManager()
+    jobs = GetJobRegistry()
     config = GetConfig()
     
     # Use config output directory if not specified
@@ -75,66 +151,128 @@ def StartResumableDownload(
     if quality == "best":
         quality = config.download.default_quality
     
-    info = GetVideoInfo(url)
+    # Only the cheap URL match happens here; page fetches run on the worker
     registry = SiteRegistry()
     site_name = registry.detect_site(url)
+    if not site_name:
+        raise ValueError(f"Unsupported URL. Supported sites: {', '.join([s['name'] for s in registry.get_all_sites()])}")
     
-    output_path = str(Path(output_dir) / (filename or f"{info['title']}.mp4"))
-    download_id = manager.create_download(
-        url=url,
-        output_path=output_path,
-        quality=quality,
-        site=site_name,
-        title=info.get('title', '')
-    )
+    output_path = str(Path(output_dir) / filename) if filename else ""
+    video_key = registry.get_video_key(url)
+    
+    with _start_lock:
+        if video_key:
+            # Same video already queued, downloading or paused: attach to that job
+            existing = jobs.find_active(video_key)
+            if existing is not None:
+                coalesced_requests.inc(kind="download")
+                if existing.status == "paused":
+                    ResumeDownload(existing.job_id)
+                return existing.job_id
+            
+            completed = None if force else _find_completed_download(video_key, quality, output_dir)
+            if completed is not None:
+                coalesced_requests.inc(kind="history")
+                job = jobs.create(
+                    url=url,
+                    title=completed['title'] or '',
+                    site=site_name,
+                    quality=completed['quality'],
+                    output_path=completed['path'],
+                    video_key=video_key,
+                    from_history=True
+                )
+                jobs.done(job.job_id, completed['path'])
+                return job.job_id
+        
+        download_id = manager.create_download(
+            url=url,
+            output_path=output_path,
+            quality=quality,
+            site=site_name
+        )
+        jobs.create(
+            url=url,
+            site=site_name,
+            quality=quality,
+            output_path=output_path,
+            job_id=download_id,
+            persist=True,
+            video_key=video_key or ""
+        )
+    
+    _queue_download(download_id, url, site_name, output_dir, quality, filename, proxy, metadata)
+    print(f"[API] Queued download_id: {download_id}", flush=True)
+    
+    return download_id
+
+
+def _queue_download(
+    download_id: str,
+    url: str,
+    site_name: str,
+    output_dir: str,
+    quality: str,
+    filename: Optional[str] = None,
+    proxy: Optional[str] = None,
+    metadata: Optional[Dict[str, str]] = None
+) -> None:
+    from .resume_manager import GetResumeManager
+    from .jobs import GetJobRegistry
+    from .download_queue import GetDownloadQueue
+    
+    manager = GetResumeManager()
+    jobs = GetJobRegistry()
+    output_path = str(Path(output_dir) / filename) if filename else ""
     
-    # Start actual download in background thread
+    # Runs on a download queue worker once a slot for this site frees up
     def run_download():
         import sys
-        import sqlite3
-        from datetime import datetime
         
-        # Update status to 'downloading' so it shows in active downloads
-        try:
-            conn = sqlite3.connect(manager.db_path)
-            c = conn.cursor()
-            c.execute("UPDATE download_states SET status = 'downloading', updated_at = ? WHERE download_id = ?",
-                     (datetime.now().isoformat(), download_id))
-            conn.commit()
-            conn.close()
-            print(f"[DOWNLOAD THREAD] Status updated to 'downloading' for {download_id}", flush=True)
-        except Exception as e:
-            print(f"[DOWNLOAD THREAD] Failed to update status: {e}", flush=True)
+        # Paused or cancelled while still waiting in the queue
+        if not jobs.should_continue(download_id):
+            return
+        
+        jobs.extracting(download_id)
         
         print(f"[DOWNLOAD THREAD] Starting download for {url}", flush=True)
         sys.stdout.flush()
         
         def on_progress_callback(completed, total):
             try:
-                # Calculate simple percentage for now or segment count
-                return manager.update_progress(
-                    download_id=download_id,
-                    downloaded_size=completed,
-                    total_size=total,
-                    segments_completed=list(range(completed)) # Simplified tracking
-                )
+                return jobs.progress(download_id, completed, total) and manager.should_continue(download_id)
             except Exception as e:
                 return True # Keep going if just a progress update failure, unless explicitly false from manager
 
         try:
-            result = DownloadVideo(
-                url=url,
-                output_dir=output_dir,
-                quality=quality,
-                filename=filename,
-                proxy=proxy,
-                on_progress=on_progress_callback
+            info = GetVideoInfo(url)
+            # Fills in title and qualities for API clients; persisted as
+            # 'downloading' by the ResumeManager sink
+            jobs.extracting(
+                download_id,
+                title=info.get('title', ''),
+                qualities=info.get('available_qualities') or [],
+                output_path=output_path or str(Path(output_dir) / f"{info.get('title', download_id)}.mp4")
             )
+            if not jobs.should_continue(download_id):
+                return
+            
+            # Lets the HLS engine publish segments for progressive playback under this id
+            with BindJob(download_id):
+                result = DownloadVideo(
+                    url=url,
+                    output_dir=output_dir,
+                    quality=quality,
+                    filename=filename,
+                    proxy=proxy,
+                    on_progress=on_progress_callback,
+                    metadata=metadata
+                )
             print(f"[DOWNLOAD THREAD] Completed: {result}", flush=True)
-            manager.complete_download(download_id, result)
+            jobs.done(download_id, result)
         except Exception as e:
             error_msg = str(e)
-            if "cancelled" in error_msg.lower():
+            if "cancelled" in error_msg.lower() or not jobs.should_continue(download_id):
                 print(f"[DOWNLOAD THREAD] Download cancelled: {download_id}", flush=True)
                 # Already marked as cancelled in resume_manager, just clean up
             else:
@@ -142,36 +280,109 @@ def StartResumableDownload(
                 import traceback
                 traceback.print_exc()
                 sys.stdout.flush()
-                manager.fail_download(download_id, error_msg)
+                jobs.failed(download_id, error_msg)
+        finally:
+            job = jobs.get(download_id)
+            if job is None or job.is_finished:
+                _queued_downloads.pop(download_id, None)
+    
+    # Kept while the job can still be paused, so ResumeDownload can queue it again
+    _queued_downloads[download_id] = (site_name or "", run_download)
+    GetDownloadQueue().submit(download_id, site_name or "", run_download)
+
+
+def _find_completed_download(video_key: str, quality: str, output_dir: str) -> Optional[Dict[str, Any]]:
+    entry = DatabaseManager().get_history_by_video_key(video_key)
+    if entry is None:
+        return None
     
-    print(f"[API] About to start thread for download_id: {download_id}", flush=True)
-    thread = threading.Thread(target=run_download, daemon=False)
-    thread.start()
-    print(f"[API] Thread started for download_id: {download_id}", flush=True)
+    # An explicit quality only matches a download made at that quality
+    if str(quality) not in ("best", "worst") and str(entry['quality']) != str(quality):
+        return None
     
-    return download_id
+    # Resumable downloads record just the file name, CLI downloads the full path
+    filename = Path(entry['filename'] or "")
+    for candidate in (filename, Path(output_dir) / filename.name):
+        if filename.name and candidate.is_file():
+            return {**entry, 'path': str(candidate)}
+    return None
 
 
 def PauseDownload(download_id: str) -> bool:
     from .resume_manager import GetResumeManager
+    from .jobs import GetJobRegistry
+    from .download_queue import GetDownloadQueue
+    jobs = GetJobRegistry()
+    job = jobs.get(download_id)
+    if job is not None and not job.is_finished:
+        GetDownloadQueue().cancel(download_id)
+        jobs.paused(download_id)
+        return True
     return GetResumeManager().pause_download(download_id)
 
 
 def ResumeDownload(download_id: str) -> Optional[Dict[str, Any]]:
     from .resume_manager import GetResumeManager
+    from .jobs import GetJobRegistry
+    from .download_queue import GetDownloadQueue
+    from .config import GetConfig
     state = GetResumeManager().resume_download(download_id)
-    return state.to_dict() if state else None
+    if state is None:
+        return None
+    
+    jobs = GetJobRegistry()
+    queued = _queued_downloads.get(download_id)
+    if queued is not None:
+        if jobs.resumed(download_id):
+            GetDownloadQueue().submit(download_id, queued[0], queued[1])
+    elif jobs.get(download_id) is None:
+        # Paused in an earlier session: rebuild the job from what was persisted
+        output_dir, filename = GetConfig().download.output_directory, None
+        if state.output_path:
+            output_dir, filename = str(Path(state.output_path).parent), Path(state.output_path).name
+        jobs.create(
+            url=state.url,
+            title=state.title,
+            site=state.site,
+            quality=state.quality,
+            output_path=state.output_path,
+            job_id=download_id,
+            persist=True,
+            video_key=SiteRegistry().get_video_key(state.url) or ""
+        )
+        _queue_download(download_id, state.url, state.site, output_dir, state.quality, filename)
+    return state.to_dict()
 
 
 def CancelDownload(download_id: str) -> bool:
     from .resume_manager import GetResumeManager
+    from .jobs import GetJobRegistry
+    from .download_queue import GetDownloadQueue
+    GetDownloadQueue().cancel(download_id)
+    _queued_downloads.pop(download_id, None)
+    if GetJobRegistry().cancel(download_id):
+        return True
     return GetResumeManager().cancel_download(download_id)
 
 
 def GetActiveDownloads() -> List[Dict[str, Any]]:
-    from .resume_manager import GetResumeManager
-    downloads = GetResumeManager().list_active_downloads()
-    return [d.to_dict() for d in downloads]
+    from .jobs import GetJobRegistry
+    from .download_queue import GetDownloadQueue
+    queue = GetDownloadQueue()
+    downloads = GetJobRegistry().snapshot(active_only=True)
+    for download in downloads:
+        download["queue_position"] = queue.position(download["job_id"])
+    return downloads
+
+
+def GetDownloadQueueStatus() -> Dict[str, Any]:
+    from .download_queue import GetDownloadQueue
+    return GetDownloadQueue().status()
+
+
+def SetMaxConcurrentDownloads(max_concurrent: int) -> None:
+    from .download_queue import GetDownloadQueue
+    GetDownloadQueue().resize(max_concurrent)
 
 
 def GetPausedDownloads() -> List[Dict[str, Any]]:
@@ -182,17 +393,22 @@ def GetPausedDownloads() -> List[Dict[str, Any]]:
 
 def GetDownloadHistory(
     limit: int = 50,
-    site: Optional[str] = None
+    site: Optional[str] = None,
+    quality: Optional[str] = None,
+    after: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     from .database import DatabaseManager
     db = DatabaseManager()
-    return db.get_history(limit=limit, site=site)
+    return db.get_history(limit=limit, site=site, quality=quality, after=after)
 
 
 def ClearDownloadHistory(older_than_days: Optional[int] = None) -> int:
     from .database import DatabaseManager
+    from .statistics import GetStatistics
     db = DatabaseManager()
-    return db.clear_history(older_than_days=older_than_days)
+    deleted = db.clear_history(older_than_days=older_than_days)
+    GetStatistics().invalidate()
+    return deleted
 
 
 def ExportHistory(
@@ -224,6 +440,11 @@ def GetStatsByDate(days: int = 30) -> List[Dict[str, Any]]:
     return GetStatistics().get_by_date(days=days)
 
 
+def RebuildStatistics() -> int:
+    from .statistics import GetStatistics
+    return GetStatistics().rebuild()
+
+
 def EnableNotifications(enabled: bool = True, sound: bool = True):
     from .notifications import get_notifier
     notifier = get_notifier()
@@ -273,7 +494,8 @@ class VideoDownloader:
         quality: str = "best",
         filename: Optional[str] = None,
         keep_ts: bool = False,
-        on_progress: Optional[Callable[[int, int], None]] = None
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        metadata: Optional[Dict[str, str]] = None
     ) -> str:
         result = DownloadVideo(
             url=url,
@@ -282,7 +504,8 @@ class VideoDownloader:
             filename=filename,
             keep_ts=keep_ts,
             proxy=self.proxy,
-            on_progress=on_progress
+            on_progress=on_progress,
+            metadata=metadata
         )
         
         if self.notifications:
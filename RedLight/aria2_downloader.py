@@ -3,12 +3,15 @@ import shutil
 import subprocess
 import tempfile
 import threading
+import time
 from pathlib import Path
 from typing import Optional, Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 
+from .metrics import chunk_seconds, downloaded_bytes, ObserveResponse
+
 
 def IsAria2cAvailable() -> bool:
     # Check system path
@@ -149,7 +152,8 @@ class Aria2cDownloader:
 
 class PythonDownloader:
     
-    def __init__(self, connections: int = 4, chunk_size: int = 1024 * 1024, timeout: int = 30):
+    def __init__(self, connections: int = 4, chunk_size: int = 1024 * 1024, timeout: int = 30, site: str = "direct"):
+        self.site = site
         self.connections = connections
         self.chunk_size = chunk_size
         self.timeout = timeout
@@ -186,6 +190,7 @@ class PythonDownloader:
     def _simple_download(self, session, url, output, on_progress, total_size):
         try:
             response = session.get(url, stream=True, timeout=self.timeout)
+            ObserveResponse(self.site, response.status_code)
             response.raise_for_status()
             
             downloaded = 0
@@ -198,6 +203,7 @@ class PythonDownloader:
                         downloaded += len(chunk)
                         if on_progress:
                             on_progress(downloaded, total_size or downloaded)
+            downloaded_bytes.inc(downloaded, site=self.site)
             return True
         except Exception:
             return False
@@ -223,8 +229,10 @@ class PythonDownloader:
             chunk_path = temp_dir / f"chunk_{idx}"
             headers = {'Range': f'bytes={start}-{end}'}
             
+            started = time.perf_counter()
             try:
                 resp = session.get(url, headers=headers, stream=True, timeout=self.timeout)
+                ObserveResponse(self.site, resp.status_code)
                 resp.raise_for_status()
                 
                 with open(chunk_path, 'wb') as f:
@@ -239,6 +247,8 @@ class PythonDownloader:
                                     on_progress(downloaded[0], total_size)
                 
                 chunks[idx] = chunk_path
+                chunk_seconds.observe(time.perf_counter() - started, site=self.site)
+                downloaded_bytes.inc(chunk_path.stat().st_size, site=self.site)
             except Exception:
                 pass
         
@@ -3,9 +3,9 @@ import click
 from pathlib import Path
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
 
-from .ui import show_banner, show_version, show_history, show_stats, console, db
+from .ui import show_banner, show_version, show_history, show_stats, rebuild_stats, console, db
 from .interactive import interactive_mode, batch_download_interactive, channel_download_interactive, search_cli_mode
-from .download import download_video, process_video_conversion
+from .download import download_video, process_video_conversion, queue_video_conversion
 from ..search import PornHubSearch
 from ..playlist import PlaylistDownloader
 from ..batch import BatchDownloader
@@ -85,6 +85,11 @@ from ..converter import VideoConverter
               callback=show_stats,
               expose_value=False,
               help='Show download statistics and exit')
+@click.option('--rebuild-stats',
+              is_flag=True,
+              callback=rebuild_stats,
+              expose_value=False,
+              help='Recompute download statistics from history and exit')
 @click.option('-v', '--version',
               is_flag=True,
               callback=show_version,
@@ -141,6 +146,7 @@ def main(url, output, quality, proxy, keep_ts, subs, speed_limit, format, compre
             )
             
             completed_count = 0
+            conversion_jobs = []
             
             def on_progress(completed, total, current_url):
                 pass
@@ -152,14 +158,15 @@ def main(url, output, quality, proxy, keep_ts, subs, speed_limit, format, compre
                 progress.console.print(f"[green]✓[/] Downloaded: {Path(path).name}")
                 
                 if format or compress is not None or audio_only:
-                    process_video_conversion(
+                    conversion_jobs.append(queue_video_conversion(
                         video_path=path,
                         format=format,
                         compress=compress,
                         audio_only=audio_only,
                         keep_ts=keep_ts,
-                        console=progress.console
-                    )
+                        console=progress.console,
+                        progress=progress
+                    ))
             
             def on_error(url, error):
                 nonlocal completed_count
@@ -172,6 +179,11 @@ def main(url, output, quality, proxy, keep_ts, subs, speed_limit, format, compre
                 on_complete=on_complete,
                 on_error=on_error
             )
+            
+            # Downloads never wait on encodes; drain the conversion queue at the end
+            for job in conversion_jobs:
+                if job is not None:
+                    job.wait()
         
         console.print(f"\n[bold green]✅ Channel Download Complete![/]")
         console.print(f"[cyan]Successfully downloaded:[/] {len(results)}/{len(urls)}")
@@ -215,6 +227,7 @@ def main(url, output, quality, proxy, keep_ts, subs, speed_limit, format, compre
             )
             
             completed_count = 0
+            conversion_jobs = []
             
             def on_progress(completed, total, current_url):
                 pass
@@ -226,14 +239,15 @@ def main(url, output, quality, proxy, keep_ts, subs, speed_limit, format, compre
                 progress.console.print(f"[green]✓[/] Downloaded: {Path(path).name}")
                 
                 if doing_conversion:
-                    process_video_conversion(
+                    conversion_jobs.append(queue_video_conversion(
                         video_path=path,
                         format=format,
                         compress=compress,
                         audio_only=audio_only,
                         keep_ts=keep_ts,
-                        console=progress.console
-                    )
+                        console=progress.console,
+                        progress=progress
+                    ))
             
             def on_error(url, error):
                 nonlocal completed_count
@@ -246,6 +260,11 @@ def main(url, output, quality, proxy, keep_ts, subs, speed_limit, format, compre
                 on_complete=on_complete,
                 on_error=on_error
             )
+            
+            # Downloads never wait on encodes; drain the conversion queue at the end
+            for job in conversion_jobs:
+                if job is not None:
+                    job.wait()
         
         console.print(f"\n[bold green]✅ Batch Download Complete![/]")
         console.print(f"[cyan]Successfully downloaded:[/] {len(results)}/{len(urls)}")
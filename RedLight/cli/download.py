@@ -13,51 +13,97 @@ from .ui import console, db
 from ..sites import SiteRegistry
 from ..api import GetVideoInfo, DownloadVideo
 from ..converter import VideoConverter
+from ..conversion_queue import GetConversionScheduler, ConversionStatus
 from ..config import GetConfig
 from ..notifications import GetNotifier
+from ..jobs import GetJobRegistry, JobEventType
 
 
-def process_video_conversion(video_path, format=None, compress=None, audio_only=False, keep_ts=False, console=None):
+def queue_video_conversion(video_path, format=None, compress=None, audio_only=False, keep_ts=False, console=None, progress=None):
     if not (format or compress is not None or audio_only):
-        return video_path
+        return None
         
     if not console:
         from .ui import console as default_console
         console = default_console
 
-    try:
-        if not VideoConverter.IsFFmpegAvailable():
-            console.print("[red]❌ FFmpeg not found! Conversion features require FFmpeg.[/]")
-            console.print("[yellow]Install FFmpeg to use --format, --compress, or --audio-only[/]")
-            return video_path
-        
-        converter = VideoConverter()
-        console.print(f"  [dim]Processing: {Path(video_path).name}...[/]")
+    if not VideoConverter.IsFFmpegAvailable():
+        console.print("[red]❌ FFmpeg not found! Conversion features require FFmpeg.[/]")
+        console.print("[yellow]Install FFmpeg to use --format, --compress, or --audio-only[/]")
+        return None
+    
+    name = Path(video_path).name
+    task_id = progress.add_task(f"[magenta]Converting {name}", total=100) if progress else None
+    
+    def on_progress(job):
+        if progress is not None:
+            progress.update(task_id, completed=job.progress)
+    
+    def on_complete(job):
+        if progress is not None:
+            progress.update(task_id, completed=100, visible=False)
         
-        converted_path = converter.Convert(
-            input_file=video_path,
-            output_format=format if format else "mp4",
-            compress_quality=compress,
-            audio_only=audio_only
+        if job.status == ConversionStatus.COMPLETED.value:
+            console.print(f"  [green]✓[/] Converted: {Path(job.result).name}")
+            if not keep_ts and Path(video_path) != Path(job.result):
+                try:
+                    Path(video_path).unlink()
+                except Exception:
+                    pass
+        elif job.status == ConversionStatus.CANCELLED.value:
+            console.print(f"  [yellow]⚠ Conversion cancelled: {name}[/]")
+        else:
+            console.print(f"  [red]Conversion failed: {job.error}[/]")
+    
+    console.print(f"  [dim]Queued for conversion: {name}[/]")
+    
+    return GetConversionScheduler().submit(
+        input_file=video_path,
+        output_format=format if format else "mp4",
+        compress_quality=compress,
+        audio_only=audio_only,
+        on_progress=on_progress,
+        on_complete=on_complete
+    )
+
+
+def process_video_conversion(video_path, format=None, compress=None, audio_only=False, keep_ts=False, console=None):
+    try:
+        job = queue_video_conversion(
+            video_path,
+            format=format,
+            compress=compress,
+            audio_only=audio_only,
+            keep_ts=keep_ts,
+            console=console
         )
+        if job is None:
+            return video_path
         
-        console.print(f"  [green]✓[/] Converted: {Path(converted_path).name}")
+        try:
+            job.wait()
+        except KeyboardInterrupt:
+            GetConversionScheduler().cancel(job.job_id)
+            job.wait()
+            raise
         
-        if not keep_ts and Path(video_path) != Path(converted_path):
-            try:
-                Path(video_path).unlink()
-            except Exception:
-                pass
-                
-        return converted_path
+        if job.status == ConversionStatus.COMPLETED.value:
+            return job.result
+        return video_path
         
+    except KeyboardInterrupt:
+        raise
     except Exception as e:
+        if not console:
+            from .ui import console as default_console
+            console = default_console
         console.print(f"  [red]Conversion failed: {e}[/]")
         return video_path
 
 
 def download_video(url, output=None, quality=None, proxy=None, keep_ts=False, subs=False, speed_limit=None):
     
+    job = None
     try:
         config = GetConfig()
         
@@ -124,6 +170,10 @@ def download_video(url, output=None, quality=None, proxy=None, keep_ts=False, su
         last_time = [start_time]
         current_speed = [0.0]
         
+        jobs = GetJobRegistry()
+        job = jobs.create(url, title=info['title'], site=site_name, quality=selected_q)
+        subscription = None
+        
         try:
             with Progress(
                 SpinnerColumn(),
@@ -136,11 +186,22 @@ def download_video(url, output=None, quality=None, proxy=None, keep_ts=False, su
                 
                 task_id = None
                 
-                def on_progress(current, total):
+                def render(event):
                     nonlocal task_id
+                    state = event.job
                     if task_id is None:
-                        task_id = progress.add_task(f"[cyan]Downloading {selected_q}p", total=total)
-                    progress.update(task_id, completed=current)
+                        task_id = progress.add_task(f"[cyan]Downloading {selected_q}p", total=state['total_size'])
+                    progress.update(task_id, completed=state['downloaded_size'], total=state['total_size'])
+                
+                subscription = jobs.subscribe(
+                    render,
+                    event_types=(JobEventType.PROGRESS,),
+                    job_id=job.job_id,
+                    min_interval=0.1
+                )
+                
+                def on_progress(current, total):
+                    return jobs.progress(job.job_id, current, total)
                 
                 result_path = DownloadVideo(
                     url=url,
@@ -151,7 +212,15 @@ def download_video(url, output=None, quality=None, proxy=None, keep_ts=False, su
                     proxy=proxy,
                     on_progress=on_progress
                 )
+        except BaseException as e:
+            if isinstance(e, KeyboardInterrupt):
+                jobs.cancel(job.job_id)
+            else:
+                jobs.failed(job.job_id, str(e))
+            raise
         finally:
+            if subscription is not None:
+                subscription.close()
             if site_name == "eporner":
                 shutil.which = original_which
         
@@ -199,16 +268,8 @@ def download_video(url, output=None, quality=None, proxy=None, keep_ts=False, su
             file_size=file_size
         )
         
-        if config.notifications.enabled and config.notifications.on_complete:
-            try:
-                GetNotifier().notify_download_complete(
-                    title=info['title'],
-                    filename=Path(result_path).name,
-                    path=str(result_path),
-                    quality=str(selected_q)
-                )
-            except Exception:
-                pass
+        # Desktop notifications are sent by the notifier subscribed to the job registry
+        jobs.done(job.job_id, str(result_path))
         
         return result_path
         
@@ -218,16 +279,18 @@ def download_video(url, output=None, quality=None, proxy=None, keep_ts=False, su
     except Exception as e:
         console.print(f"\n[bold red]✗ Error:[/] {str(e)}")
         
-        try:
-            config = GetConfig()
-            if config.notifications.enabled and config.notifications.on_error:
-                GetNotifier().notify_download_failed(
-                    title="Download Failed",
-                    url=url,
-                    error=str(e)
-                )
-        except Exception:
-            pass
+        # Once the job exists its failed event drives the notification
+        if job is None:
+            try:
+                config = GetConfig()
+                if config.notifications.enabled and config.notifications.on_error:
+                    GetNotifier().notify_download_failed(
+                        title="Download Failed",
+                        url=url,
+                        error=str(e)
+                    )
+            except Exception:
+                pass
         
         console.print(f"[dim]{traceback.format_exc()}[/]")
         sys.exit(1)
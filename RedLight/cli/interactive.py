@@ -12,6 +12,8 @@ from ..multi_search import MultiSiteSearch
 from ..batch import BatchDownloader
 from ..playlist import PlaylistDownloader
 from ..search import PornHubSearch
+from ..search_cache import GetSearchCache
+from ..prefetch import Prefetcher
 from ..api import GetVideoInfo
 from ..statistics import GetStatistics
 from ..resume_manager import GetResumeManager
@@ -88,72 +90,106 @@ def _select_generic_quality() -> str:
     return quality_map[q_choice]
 
 
-def search_cli_mode(query, sort_by="mostviewed", duration=None):
-    searcher = PornHubSearch()
+def browse_search_results(query, fetch_page, label="", show_site=False):
+    settings = GetConfig().search
+    registry = SiteRegistry()
     page = 1
     
-    while True:
-        console.print(f"\n[bold cyan]Search Results: {query} (Page {page})[/]")
-        console.print(f"[dim]Sort: {sort_by}, Duration: {duration or 'Any'}[/]\n")
-        
-        results = searcher.search(query, page, sort_by, duration)
-        
-        if not results:
-            console.print("[yellow]No results found.[/]")
-            break
-        
-        table = Table(title=f"Search Results - Page {page}", box=box.ROUNDED)
-        table.add_column("#", style="cyan", width=4)
-        table.add_column("Title", style="white")
-        table.add_column("Duration", style="yellow", width=10)
-        table.add_column("Views", style="green", width=12)
-        
-        for idx, video in enumerate(results, 1):
-            title = video['title']
-            if len(title) > 60:
-                title = title[:57] + "..."
-            
-            table.add_row(
-                str(idx),
-                title,
-                video['duration'],
-                video['views']
-            )
-        
-        console.print(table)
-        
-        console.print("\n[bold cyan]Actions:[/]")
-        console.print("  [1-N] - Download video by number")
-        console.print("  [N]ext page")
-        console.print("  [P]revious page")
-        console.print("  [Q]uit")
-        
-        action = Prompt.ask("\n[bold]Select action[/]").lower()
-        
-        if action == 'q':
-            break
-        elif action == 'n':
-            page += 1
-        elif action == 'p':
-            if page > 1:
-                page -= 1
-            else:
-                console.print("[yellow]Already on first page[/]")
-        elif action.isdigit():
-            idx = int(action) - 1
-            if 0 <= idx < len(results):
-                selected_video = results[idx]
-                console.print(f"\n[green]Selected:[/] {selected_video['title']}")
-                console.print(f"[dim]URL: {selected_video['url']}[/]\n")
-                
-                quality = select_quality_interactive(selected_video['url'])
-                
-                download_video(selected_video['url'], quality=quality)
+    with Prefetcher(max_workers=settings.prefetch_workers) as prefetcher:
+        while True:
+            # Whatever was fetched ahead for the last page is no longer wanted
+            prefetcher.cancel_all()
+            
+            console.print(f"\n[bold cyan]Search Results: {query} (Page {page})[/]")
+            if label:
+                console.print(f"[dim]{label}[/]\n")
+            
+            with console.status("[bold cyan]🔍 Searching...", spinner="dots"):
+                results = fetch_page(page)
+            
+            if not results:
+                console.print("[yellow]No results found.[/]")
+                break
+            
+            # Warm the search cache and the info cache while the user reads the table
+            for ahead in range(page + 1, page + 1 + settings.prefetch_pages):
+                prefetcher.submit(("page", ahead), lambda ahead=ahead: fetch_page(ahead))
+            for video in results[:settings.prefetch_info]:
+                # A prefetch cannot be stopped once running, so never one that may launch a browser
+                if video.get('url') and not registry.needs_browser(video['url']):
+                    prefetcher.submit(("info", video['url']), lambda url=video['url']: GetVideoInfo(url))
+            
+            table = Table(title=f"Search Results - Page {page}", box=box.ROUNDED)
+            table.add_column("#", style="cyan", width=4)
+            if show_site:
+                table.add_column("Site", style="magenta", width=10)
+            table.add_column("Title", style="white")
+            table.add_column("Duration", style="yellow", width=10)
+            table.add_column("Views", style="green", width=12)
+            
+            for idx, video in enumerate(results, 1):
+                title = video.get('title', 'No title')
+                if len(title) > 60:
+                    title = title[:57] + "..."
                 
-                if not Confirm.ask("\n[bold cyan]Continue searching?[/]", default=True):
-                    break
-        else:
-            console.print("[red]Invalid action[/]")
+                row = [str(idx)]
+                if show_site:
+                    site_label = video.get('site', 'unknown').title()
+                    if len(video.get('sites', [])) > 1:
+                        site_label += f" +{len(video['sites']) - 1}"
+                    row.append(site_label)
+                row += [title, video.get('duration') or 'N/A', video.get('views') or 'N/A']
+                table.add_row(*row)
+            
+            console.print(table)
+            
+            console.print("\n[bold cyan]Actions:[/]")
+            console.print("  [1-N] - Download video by number")
+            console.print("  [N]ext page")
+            console.print("  [P]revious page")
+            console.print("  [Q]uit")
+            
+            action = Prompt.ask("\n[bold]Select action[/]").lower()
+            
+            if action == 'q':
+                break
+            elif action == 'n':
+                page += 1
+            elif action == 'p':
+                if page > 1:
+                    page -= 1
+                else:
+                    console.print("[yellow]Already on first page[/]")
+            elif action.isdigit():
+                idx = int(action) - 1
+                if 0 <= idx < len(results):
+                    selected_video = results[idx]
+                    console.print(f"\n[green]Selected:[/] {selected_video['title']}")
+                    console.print(f"[dim]URL: {selected_video['url']}[/]\n")
+                    
+                    # Leave the bandwidth to the download
+                    prefetcher.cancel_all()
+                    quality = select_quality_interactive(selected_video['url'])
+                    
+                    download_video(selected_video['url'], quality=quality)
+                    
+                    if not Confirm.ask("\n[bold cyan]Continue searching?[/]", default=True):
+                        break
+            else:
+                console.print("[red]Invalid action[/]")
+
+
+def search_cli_mode(query, sort_by="mostviewed", duration=None):
+    searcher = PornHubSearch()
+    cache = GetSearchCache()
+    
+    def fetch_page(page):
+        return cache.fetch(
+            "pornhub", query, page, sort_by, duration,
+            lambda: searcher.search(query, page, sort_by, duration)
+        )
+    
+    browse_search_results(query, fetch_page, label=f"Sort: {sort_by}, Duration: {duration or 'Any'}")
 
 
 def interactive_mode():
@@ -227,73 +263,27 @@ def interactive_mode():
                 continue
             
             if int(site_choice) == len(sites) + 1:
-                console.print(f"\n[cyan]Searching all sites for: {query}...[/]\n")
+                site_name = "all"
                 multi_search = MultiSiteSearch()
-                all_results = multi_search.search_all(query)
-                
-                db.add_search_entry("all", query, "", len(all_results))
-                
-                if all_results:
-                    table = Table(title=f"🔍 Search Results: {query} (All Sites)", box=box.ROUNDED)
-                    table.add_column("#", style="cyan", width=4)
-                    table.add_column("Site", style="magenta", width=10)
-                    table.add_column("Title", style="white")
-                    table.add_column("Duration", style="yellow", width=10)
-                    
-                    for i, result in enumerate(all_results[:20], 1):
-                        table.add_row(
-                            str(i),
-                            result.get('site', 'unknown').title(),
-                            result.get('title', 'No title'),
-                            result.get('duration', 'N/A')
-                        )
-                    
-                    console.print(table)
-                    console.print(f"\n[green]✓ Found {len(all_results)} results across all sites[/]")
-                    console.print("[dim]Copy the URL from the table above to download[/]\n")
-                else:
-                    console.print("[yellow]No results found[/]")
+                fetch = lambda page: multi_search.search_all(query, page=page)
             else:
                 site_name = sites[int(site_choice) - 1]["name"]
                 searcher = registry.get_search_by_name(site_name)
-                
-                if searcher:
-                    console.print(f"\n[cyan]Searching {site_name.title()} for: {query}...[/]\n")
-                    results = searcher.search(query)
-                    
+                if not searcher:
+                    continue
+                fetch = lambda page: searcher.cached_search(query, page=page)
+            
+            logged = []
+            
+            def fetch_page(page):
+                results = fetch(page)
+                if not logged:
+                    logged.append(page)
                     db.add_search_entry(site_name, query, "", len(results))
-                    
-                    if results:
-                        table = Table(title=f"🔍 Search Results: {query} ({site_name.title()})", box=box.ROUNDED)
-                        table.add_column("#", style="cyan", width=4)
-                        table.add_column("Title", style="white")
-                        table.add_column("URL", style="blue", overflow="fold")
-                        table.add_column("Duration", style="yellow", width=10)
-                        
-                        has_views = any('views' in r and r.get('views') for r in results[:5])
-                        if has_views:
-                            table.add_column("Views", style="green", width=12)
-                        
-                        for i, result in enumerate(results[:20], 1):
-                            row_data = [
-                                str(i),
-                                result.get('title', 'No title'),
-                                result.get('url', ''),
-                                result.get('duration', 'N/A')
-                            ]
-                            
-                            if has_views:
-                                row_data.append(result.get('views', 'N/A'))
-                            
-                            table.add_row(*row_data)
-                        
-                        console.print(table)
-                        console.print(f"\n[green]✓ Found {len(results)} results[/]")
-                        console.print("[dim]Copy the URL from the table above to download[/]\n")
-                    else:
-                        console.print("[yellow]No results found[/]")
-            
-            Prompt.ask("\n[dim]Press Enter to return to menu...[/]")
+                return results
+            
+            label = "All sites" if site_name == "all" else site_name.title()
+            browse_search_results(query, fetch_page, label=label, show_site=site_name == "all")
             
         elif choice == "3":
             batch_download_interactive()
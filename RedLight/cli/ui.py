@@ -57,3 +57,11 @@ def show_stats(ctx, param, value):
         return
     db.show_stats(console)
     ctx.exit()
+
+
+def rebuild_stats(ctx, param, value):
+    if not value or ctx.resilient_parsing:
+        return
+    total = db.rebuild_stats()
+    console.print(f"[green]✓ Statistics rebuilt from {total} history entries[/]")
+    ctx.exit()
@@ -29,6 +29,8 @@ class DownloadConfig:
     output_directory: str = "./downloads"
     keep_original: bool = False
     max_concurrent: int = 3
+    max_per_site: int = 0
+    site_limits: Dict[str, int] = field(default_factory=dict)
     speed_limit: str = ""
     use_aria2c: bool = True
     aria2c_connections: int = 16
@@ -53,25 +55,38 @@ class UIConfig:
     color_output: bool = True
 
 
+@dataclass
+class SearchConfig:
+    cache_enabled: bool = True
+    cache_ttl: float = 600.0
+    cache_stale_ttl: float = 86400.0
+    cache_memory_entries: int = 256
+    prefetch_pages: int = 1
+    prefetch_info: int = 3
+    prefetch_workers: int = 2
+
+
 @dataclass
 class Config:
     download: DownloadConfig = field(default_factory=DownloadConfig)
     proxy: ProxyConfig = field(default_factory=ProxyConfig)
     notifications: NotificationConfig = field(default_factory=NotificationConfig)
     ui: UIConfig = field(default_factory=UIConfig)
+    search: SearchConfig = field(default_factory=SearchConfig)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "download": asdict(self.download),
             "proxy": asdict(self.proxy),
             "notifications": asdict(self.notifications),
-            "ui": asdict(self.ui)
+            "ui": asdict(self.ui),
+            "search": asdict(self.search)
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Config":
         config = cls()
-        for section in ["download", "proxy", "notifications", "ui"]:
+        for section in ["download", "proxy", "notifications", "ui", "search"]:
             if section in data:
                 section_obj = getattr(config, section)
                 for key, value in data[section].items():
@@ -167,6 +182,8 @@ download:
   output_directory: ./downloads
   keep_original: false
   max_concurrent: 3
+  max_per_site: 0        # 0 = no per-site cap
+  site_limits: {}        # e.g. {pornhub: 2, xhamster: 1}
   speed_limit: ""
   use_aria2c: true
   aria2c_connections: 16
@@ -190,6 +207,15 @@ ui:
   show_eta: true
   show_progress_bar: true
   color_output: true
+
+search:
+  cache_enabled: true
+  cache_ttl: 600             # seconds a cached result page is served as fresh
+  cache_stale_ttl: 86400     # older than cache_ttl: served at once, refreshed in the background
+  cache_memory_entries: 256
+  prefetch_pages: 1          # result pages fetched ahead in interactive search (0 = off)
+  prefetch_info: 3           # top results whose video info is fetched ahead
+  prefetch_workers: 2
 """
 
 
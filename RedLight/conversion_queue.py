@@ -0,0 +1,278 @@
+import os
+import queue
+import threading
+import time
+import itertools
+import uuid
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Optional, List, Dict, Any, Callable
+
+from .converter import VideoConverter, ConversionCancelled
+
+
+class ConversionStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class ConversionJob:
+    job_id: str
+    input_file: str
+    output_format: str = "mp4"
+    compress_quality: Optional[int] = None
+    audio_only: bool = False
+    output_file: Optional[str] = None
+    priority: int = 0
+    chunked: bool = False
+    status: str = "queued"
+    progress: float = 0.0
+    result: Optional[str] = None
+    error: str = ""
+    created_at: str = ""
+    on_progress: Optional[Callable[["ConversionJob"], None]] = field(default=None, repr=False)
+    on_complete: Optional[Callable[["ConversionJob"], None]] = field(default=None, repr=False)
+    _cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _done_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _process: Optional[subprocess.Popen] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if not self.created_at:
+            self.created_at = datetime.now().isoformat()
+
+    @property
+    def is_finished(self) -> bool:
+        return self._done_event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[str]:
+        self._done_event.wait(timeout)
+        return self.result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "input_file": self.input_file,
+            "output_format": self.output_format,
+            "compress_quality": self.compress_quality,
+            "audio_only": self.audio_only,
+            "priority": self.priority,
+            "chunked": self.chunked,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+        }
+
+
+class ConversionScheduler:
+
+    def __init__(self, max_workers: Optional[int] = None, max_queued: int = 64):
+        cpus = os.cpu_count() or 2
+        # libx264 is already multi-threaded, so run a few encodes side by side
+        # and split the cores between them instead of one worker per core
+        self.max_workers = max_workers or max(1, min(4, cpus // 2))
+        self.threads_per_job = max(1, cpus // self.max_workers)
+
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=max_queued)
+        self._jobs: Dict[str, ConversionJob] = {}
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._shutdown = False
+
+    def submit(
+        self,
+        input_file: str,
+        output_format: str = "mp4",
+        compress_quality: Optional[int] = None,
+        audio_only: bool = False,
+        output_file: Optional[str] = None,
+        priority: int = 0,
+        chunked: bool = False,
+        on_progress: Optional[Callable[[ConversionJob], None]] = None,
+        on_complete: Optional[Callable[[ConversionJob], None]] = None,
+        block: bool = True,
+        timeout: Optional[float] = None
+    ) -> ConversionJob:
+        if self._shutdown:
+            raise RuntimeError("Conversion scheduler is shut down")
+
+        job = ConversionJob(
+            job_id=str(uuid.uuid4())[:8],
+            input_file=str(input_file),
+            output_format=output_format,
+            compress_quality=compress_quality,
+            audio_only=audio_only,
+            output_file=output_file,
+            priority=priority,
+            chunked=chunked,
+            on_progress=on_progress,
+            on_complete=on_complete
+        )
+
+        # Registered before it is queued, so a worker or cancel() never sees an unknown job
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        self._ensure_workers()
+        try:
+            # Higher priority first, FIFO within the same priority
+            self._queue.put((-priority, next(self._counter), job), block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.job_id, None)
+            raise
+
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.is_finished:
+            return False
+
+        job._cancel_event.set()
+        process = job._process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+        if job.status == ConversionStatus.QUEUED.value:
+            self._finish(job, ConversionStatus.CANCELLED, error="Conversion cancelled")
+        return True
+
+    def get_job(self, job_id: str) -> Optional[ConversionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, status: Optional[str] = None) -> List[ConversionJob]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if status:
+            jobs = [job for job in jobs if job.status == status]
+        return jobs
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        # One deadline for all jobs, not timeout per job
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in self.list_jobs():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job._done_event.wait(remaining):
+                return False
+        return True
+
+    def clear_finished(self) -> int:
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+            for job_id in finished:
+                del self._jobs[job_id]
+        return len(finished)
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        self._shutdown = True
+
+        if cancel_pending:
+            for job in self.list_jobs():
+                self.cancel(job.job_id)
+
+        for _ in self._workers:
+            self._queue.put((float('inf'), next(self._counter), None))
+
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        self._workers = []
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"conversion-worker-{len(self._workers)}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _worker_loop(self):
+        while True:
+            _, _, job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                if job.is_finished:
+                    continue
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: ConversionJob):
+        job.status = ConversionStatus.RUNNING.value
+
+        def on_process(process):
+            job._process = process
+            if job._cancel_event.is_set():
+                process.kill()
+
+        def on_progress(percent):
+            job.progress = percent
+            if job.on_progress:
+                try:
+                    job.on_progress(job)
+                except Exception:
+                    pass
+
+        try:
+            result = VideoConverter().Convert(
+                input_file=job.input_file,
+                output_format=job.output_format,
+                compress_quality=job.compress_quality,
+                audio_only=job.audio_only,
+                output_file=job.output_file,
+                threads=self.threads_per_job,
+                chunked=job.chunked,
+                chunk_workers=self.threads_per_job,
+                on_progress=on_progress,
+                cancel_event=job._cancel_event,
+                on_process=on_process
+            )
+            job.progress = 100.0
+            self._finish(job, ConversionStatus.COMPLETED, result=result)
+        except ConversionCancelled as e:
+            self._finish(job, ConversionStatus.CANCELLED, error=str(e))
+        except Exception as e:
+            self._finish(job, ConversionStatus.FAILED, error=str(e))
+        finally:
+            job._process = None
+
+    def _finish(self, job: ConversionJob, status: ConversionStatus, result: Optional[str] = None, error: str = ""):
+        with self._lock:
+            if job.is_finished:
+                return
+            job.status = status.value
+            job.result = result
+            job.error = error
+            job._done_event.set()
+
+        if job.on_complete:
+            try:
+                job.on_complete(job)
+            except Exception:
+                pass
+
+
+_default_scheduler: Optional[ConversionScheduler] = None
+
+
+def GetConversionScheduler() -> ConversionScheduler:
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = ConversionScheduler()
+    return _default_scheduler
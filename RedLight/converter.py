@@ -1,15 +1,43 @@
-﻿from typing import Optional
+﻿from typing import Callable, Dict, List, Optional
 from pathlib import Path
+from collections import deque
+import concurrent.futures
 import subprocess
+import threading
+import tempfile
 import shutil
+import os
+import re
+
+from .metadata import BuildFFmpegMetadataArgs, ResolvedThumbnail
+from .remuxer import RemuxTsToMp4
+
+
+_DURATION_PATTERN = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+class ConversionCancelled(RuntimeError):
+    pass
+
+
+class _AnyEvent:
+
+    def __init__(self, *events):
+        self.events = [e for e in events if e is not None]
+
+    def set(self):
+        self.events[-1].set()
+
+    def is_set(self) -> bool:
+        return any(e.is_set() for e in self.events)
 
 
 class VideoConverter:
     
-    def __init__(self):
+    def __init__(self, require_ffmpeg: bool = True):
         self.ffmpeg_available = shutil.which("ffmpeg") is not None
         
-        if not self.ffmpeg_available:
+        if require_ffmpeg and not self.ffmpeg_available:
             raise RuntimeError(
                 "FFmpeg is not installed or not in PATH. "
                 "Please install FFmpeg to use video conversion features."
@@ -21,8 +49,21 @@ class VideoConverter:
         output_format: str = "mp4",
         compress_quality: Optional[int] = None,
         audio_only: bool = False,
-        output_file: Optional[str] = None
+        output_file: Optional[str] = None,
+        threads: Optional[int] = None,
+        on_progress: Optional[Callable[[float], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        on_process: Optional[Callable[[subprocess.Popen], None]] = None,
+        chunked: bool = False,
+        chunk_workers: Optional[int] = None
     ) -> str:
+        """Convert or compress a video with FFmpeg.
+
+        chunked=True splits the video at keyframes and encodes the pieces in
+        parallel (chunk_workers at a time). It keeps the first video track,
+        every audio track, the metadata and chapters, but drops subtitle and
+        data streams, which the plain conversion carries over.
+        """
         input_path = Path(input_file)
         
         if not input_path.exists():
@@ -43,6 +84,12 @@ class VideoConverter:
                 ).with_suffix(f".{output_format}")
                 counter += 1
         
+        if chunked and not audio_only:
+            return self._ConvertChunked(
+                input_path, output_path, output_format, compress_quality,
+                chunk_workers, on_progress, cancel_event, on_process
+            )
+        
         cmd = ["ffmpeg", "-i", str(input_path)]
         
         if audio_only:
@@ -59,32 +106,247 @@ class VideoConverter:
                 crf = int(51 - (compress_quality / 100 * 51))
                 cmd.extend(["-crf", str(crf)])
         
+        if threads:
+            cmd.extend(["-threads", str(threads)])
+        
         cmd.extend(["-y", str(output_path)])
         
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            self.RunFFmpeg(cmd, on_progress=on_progress, cancel_event=cancel_event, on_process=on_process)
             return str(output_path)
+        except Exception:
+            if output_path.exists():
+                output_path.unlink()
+            raise
+    
+    def RunFFmpeg(
+        self,
+        cmd: List[str],
+        on_progress: Optional[Callable[[float], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        on_process: Optional[Callable[[subprocess.Popen], None]] = None,
+        duration: Optional[float] = None
+    ) -> None:
+        cmd = [cmd[0], "-nostats", "-progress", "pipe:1", *cmd[1:]]
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace"
+        )
+        if on_process:
+            on_process(process)
+        
+        stderr_tail = deque(maxlen=50)
+        state = {"duration": duration}
+        
+        def read_stderr():
+            for line in process.stderr:
+                stderr_tail.append(line)
+                if state["duration"] is None:
+                    match = _DURATION_PATTERN.search(line)
+                    if match:
+                        h, m, s = match.groups()
+                        state["duration"] = int(h) * 3600 + int(m) * 60 + float(s)
+        
+        reader = threading.Thread(target=read_stderr, daemon=True)
+        reader.start()
+        
+        try:
+            # -progress emits key=value blocks roughly twice a second
+            for line in process.stdout:
+                if cancel_event is not None and cancel_event.is_set():
+                    process.kill()
+                    break
+                
+                key, _, value = line.strip().partition("=")
+                if not on_progress:
+                    continue
+                if key == "out_time_us" and state["duration"]:
+                    try:
+                        seconds = int(value) / 1_000_000
+                    except ValueError:
+                        continue
+                    on_progress(min(100.0, max(0.0, seconds / state["duration"] * 100)))
+                elif key == "progress" and value == "end":
+                    on_progress(100.0)
             
-        except subprocess.CalledProcessError as e:
+            process.wait()
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            reader.join(timeout=5)
+        
+        if cancel_event is not None and cancel_event.is_set():
+            raise ConversionCancelled("Conversion cancelled")
+        
+        if process.returncode != 0:
             raise RuntimeError(
-                f"FFmpeg conversion failed: {e.stderr}"
+                f"FFmpeg conversion failed: {''.join(stderr_tail)}"
             )
     
+    def _CodecArgs(self, output_format: str) -> Dict[str, List[str]]:
+        if output_format == "webm":
+            return {"video": ["-c:v", "libvpx-vp9"], "audio": ["-c:a", "libopus"]}
+        return {"video": ["-c:v", "libx264"], "audio": ["-c:a", "aac"]}
+    
+    def _ProbeStderr(self, input_file: str) -> str:
+        # Works without ffprobe: "ffmpeg -i" prints the stream summary and exits
+        return subprocess.run(
+            ["ffmpeg", "-hide_banner", "-i", str(input_file)],
+            capture_output=True, text=True, errors="replace"
+        ).stderr
+    
+    def ProbeDuration(self, input_file: str) -> Optional[float]:
+        match = _DURATION_PATTERN.search(self._ProbeStderr(input_file))
+        if not match:
+            return None
+        h, m, s = match.groups()
+        return int(h) * 3600 + int(m) * 60 + float(s)
+    
+    def _ConvertChunked(
+        self,
+        input_path: Path,
+        output_path: Path,
+        output_format: str,
+        compress_quality: Optional[int],
+        workers: Optional[int],
+        on_progress: Optional[Callable[[float], None]],
+        cancel_event: Optional[threading.Event],
+        on_process: Optional[Callable[[subprocess.Popen], None]]
+    ) -> str:
+        cpus = os.cpu_count() or 2
+        workers = workers or cpus
+        threads = max(1, cpus // workers)
+        probe = self._ProbeStderr(str(input_path))
+        match = _DURATION_PATTERN.search(probe)
+        duration = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3)) if match else 0
+        has_audio = "Audio:" in probe
+        abort = _AnyEvent(cancel_event, threading.Event())
+        
+        # Aim for a couple of chunks per worker so a slow chunk does not leave
+        # the others idle, but keep chunks long enough that GOP restarts at
+        # the seams cost nothing measurable
+        segment_time = max(10.0, duration / (workers * 2)) if duration else 60.0
+        
+        codecs = self._CodecArgs(output_format)
+        quality_args = []
+        if compress_quality is not None:
+            crf = int(51 - (compress_quality / 100 * 51))
+            quality_args = ["-crf", str(crf)]
+        
+        work_dir = Path(tempfile.mkdtemp(prefix=".chunks_", dir=output_path.parent))
+        try:
+            # -c copy makes the segment muxer cut only on keyframes, so every
+            # chunk starts with a decodable picture and the split is lossless
+            self.RunFFmpeg(
+                [
+                    "ffmpeg", "-hide_banner", "-i", str(input_path),
+                    "-map", "0:v:0", "-an", "-sn", "-dn", "-c", "copy",
+                    "-f", "segment", "-segment_time", f"{segment_time:.3f}",
+                    "-reset_timestamps", "1",
+                    str(work_dir / "source_%05d.mkv")
+                ],
+                cancel_event=cancel_event,
+                on_process=on_process
+            )
+            sources = sorted(work_dir.glob("source_*.mkv"))
+            if not sources:
+                raise RuntimeError("FFmpeg produced no chunks")
+            
+            # Audio is cheap next to video, encode it once rather than per
+            # chunk so there are no priming gaps at chunk boundaries
+            jobs = [(src, work_dir / src.name.replace("source_", "encoded_")) for src in sources]
+            progress = [0.0] * (len(jobs) + (1 if has_audio else 0))
+            lock = threading.Lock()
+            
+            def report(index):
+                def update(percent):
+                    with lock:
+                        progress[index] = percent
+                        overall = sum(progress) / len(progress)
+                    if on_progress:
+                        on_progress(overall)
+                return update
+            
+            def encode_chunk(index, src, dst):
+                self.RunFFmpeg(
+                    ["ffmpeg", "-hide_banner", "-i", str(src), "-map", "0:v:0",
+                     *codecs["video"], *quality_args, "-threads", str(threads),
+                     "-y", str(dst)],
+                    on_progress=report(index),
+                    cancel_event=abort,
+                    on_process=on_process
+                )
+            
+            def encode_audio(index, dst):
+                self.RunFFmpeg(
+                    ["ffmpeg", "-hide_banner", "-i", str(input_path), "-map", "0:a", "-vn",
+                     *codecs["audio"], "-y", str(dst)],
+                    on_progress=report(index),
+                    cancel_event=abort,
+                    on_process=on_process
+                )
+            
+            audio_file = work_dir / "audio.mka"
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(encode_chunk, i, src, dst) for i, (src, dst) in enumerate(jobs)]
+                if has_audio:
+                    futures.append(executor.submit(encode_audio, len(jobs), audio_file))
+                errors = []
+                for future in concurrent.futures.as_completed(futures):
+                    if future.exception():
+                        errors.append(future.exception())
+                        abort.set()
+            
+            if cancel_event is not None and cancel_event.is_set():
+                raise ConversionCancelled("Conversion cancelled")
+            if errors:
+                raise next((e for e in errors if not isinstance(e, ConversionCancelled)), errors[0])
+            
+            concat_list = work_dir / "chunks.txt"
+            concat_list.write_text(
+                "".join(f"file '{dst.name}'\n" for _, dst in jobs),
+                encoding="utf-8"
+            )
+            
+            cmd = ["ffmpeg", "-hide_banner", "-f", "concat", "-safe", "0", "-i", str(concat_list)]
+            if has_audio:
+                cmd.extend(["-i", str(audio_file), "-map", "0:v:0", "-map", "1:a"])
+            else:
+                cmd.extend(["-map", "0:v:0"])
+            # The source is opened again only for its metadata and chapters
+            source_index = 2 if has_audio else 1
+            cmd.extend(["-i", str(input_path), "-map_metadata", str(source_index), "-map_chapters", str(source_index)])
+            cmd.extend(["-c", "copy"])
+            if output_format in ("mp4", "mov", "m4v"):
+                cmd.extend(["-movflags", "+faststart"])
+            cmd.extend(["-y", str(output_path)])
+            
+            self.RunFFmpeg(cmd, cancel_event=cancel_event, on_process=on_process)
+            return str(output_path)
+        except Exception:
+            if output_path.exists():
+                output_path.unlink()
+            raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
     def Compress(
         self,
         input_file: str,
         quality: int = 70,
-        output_file: Optional[str] = None
+        output_file: Optional[str] = None,
+        chunked: bool = False
     ) -> str:
         return self.Convert(
             input_file=input_file,
             compress_quality=quality,
-            output_file=output_file
+            output_file=output_file,
+            chunked=chunked
         )
     
     def ExtractAudio(
@@ -102,61 +364,104 @@ class VideoConverter:
     def IsFFmpegAvailable() -> bool:
         return shutil.which("ffmpeg") is not None
 
-    def ConvertTsToMp4(self, input_file: Path, keep_ts: bool = False) -> str:
+    def ConvertTsToMp4(
+        self,
+        input_file: Path,
+        keep_ts: bool = False,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> str:
         input_path = Path(input_file)
         
         if keep_ts:
             return str(input_path)
 
-        if not self.ffmpeg_available:
-            print("⚠ FFmpeg not found. Keeping .ts file.")
-            return str(input_path)
-
         if not input_path.exists() or input_path.stat().st_size == 0:
             print(f"⚠ Input file is empty or missing. Cannot convert.")
             return str(input_path)
 
         output_path = input_path.with_suffix('.mp4')
-        
-        try:
-            cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                '-i', str(input_path), 
-                '-c', 'copy',
-                str(output_path)
-            ]
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+        with ResolvedThumbnail((metadata or {}).get('thumbnail'), input_path) as thumbnail:
+            if thumbnail:
+                metadata = {**metadata, 'thumbnail': str(thumbnail)}
+            elif metadata:
+                metadata = {k: v for k, v in metadata.items() if k != 'thumbnail'}
+
+            if not self.ffmpeg_available:
+                remuxed = self._RemuxBuiltin(input_path, output_path, metadata)
+                if remuxed:
+                    return remuxed
+                print("⚠ FFmpeg not found. Keeping .ts file.")
+                return str(input_path)
+
+            # Tags, cover art and faststart go into the remux itself so the
+            # finished file is written exactly once
+            input_args, output_args = BuildFFmpegMetadataArgs(metadata, thumbnail)
             
-            if output_path.exists() and output_path.stat().st_size > 0:
-                if input_path.exists():
-                    input_path.unlink()
-                return str(output_path)
-            else:
-                raise subprocess.CalledProcessError(1, cmd)
-                
-        except subprocess.CalledProcessError:
             try:
-                print("⚠ Direct copy failed, trying re-encode...")
                 cmd = [
-                    'ffmpeg', '-y', '-hide_banner', '-loglevel', 'warning',
-                    '-err_detect', 'ignore_err',
+                    'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
                     '-i', str(input_path),
-                    '-c:v', 'libx264', '-preset', 'ultrafast',
-                    '-c:a', 'aac', '-b:a', '128k',
+                    *input_args,
+                    '-c', 'copy',
+                    *output_args,
                     '-movflags', '+faststart',
                     str(output_path)
                 ]
-                result = subprocess.run(cmd, check=False, capture_output=True, text=True)
+                subprocess.run(cmd, check=True, capture_output=True, text=True)
                 
                 if output_path.exists() and output_path.stat().st_size > 0:
                     if input_path.exists():
                         input_path.unlink()
                     return str(output_path)
                 else:
-                    if result.stderr:
-                        print(f"⚠ FFmpeg error: {result.stderr[:200]}")
-            except Exception as ex:
-                print(f"⚠ Re-encode exception: {ex}")
-            
-            print(f"⚠ Failed to convert to MP4. Keeping .ts file.")
-            return str(input_path)
+                    raise subprocess.CalledProcessError(1, cmd)
+                    
+            except subprocess.CalledProcessError:
+                remuxed = self._RemuxBuiltin(input_path, output_path, metadata)
+                if remuxed:
+                    return remuxed
+
+                try:
+                    print("⚠ Direct copy failed, trying re-encode...")
+                    cmd = [
+                        'ffmpeg', '-y', '-hide_banner', '-loglevel', 'warning',
+                        '-err_detect', 'ignore_err',
+                        '-i', str(input_path),
+                        *input_args,
+                        '-c:v', 'libx264', '-preset', 'ultrafast',
+                        '-c:a', 'aac', '-b:a', '128k',
+                        *output_args,
+                        '-movflags', '+faststart',
+                        str(output_path)
+                    ]
+                    result = subprocess.run(cmd, check=False, capture_output=True, text=True)
+                    
+                    if output_path.exists() and output_path.stat().st_size > 0:
+                        if input_path.exists():
+                            input_path.unlink()
+                        return str(output_path)
+                    else:
+                        if result.stderr:
+                            print(f"⚠ FFmpeg error: {result.stderr[:200]}")
+                except Exception as ex:
+                    print(f"⚠ Re-encode exception: {ex}")
+                
+                print(f"⚠ Failed to convert to MP4. Keeping .ts file.")
+                return str(input_path)
+
+    def _RemuxBuiltin(
+        self,
+        input_path: Path,
+        output_path: Path,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        try:
+            RemuxTsToMp4(input_path, output_path, metadata)
+        except Exception as e:
+            print(f"⚠ Built-in remux failed: {e}")
+            return None
+
+        if input_path.exists():
+            input_path.unlink()
+        return str(output_path)
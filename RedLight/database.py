@@ -1,23 +1,27 @@
 ﻿import sqlite3
 import json
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich import box
 
+from .storage import GetStorage
+
 
 class DatabaseManager:
     
-    def __init__(self):
-        self.db_path = Path.home() / ".RedLight" / "history.db"
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else Path.home() / ".RedLight" / "history.db"
+        self.storage = GetStorage(self.db_path)
         self.init_db()
 
     def init_db(self):
-        conn = sqlite3.connect(self.db_path)
+        self.storage.migrate('history', [self._create_tables, self._add_video_id_and_indexes, self._create_rollups])
+    
+    def _create_tables(self, conn: sqlite3.Connection):
         c = conn.cursor()
         
         c.execute('''
@@ -43,9 +47,6 @@ class DatabaseManager:
                 timestamp TIMESTAMP
             )
         ''')
-        
-        conn.commit()
-        conn.close()
     
     def _migrate_history_table(self, cursor):
         cursor.execute("PRAGMA table_info(history)")
@@ -64,6 +65,143 @@ class DatabaseManager:
                     cursor.execute(f'ALTER TABLE history ADD COLUMN {column} {col_type}')
                 except sqlite3.OperationalError:
                     pass
+    
+    def _add_video_id_and_indexes(self, conn: sqlite3.Connection):
+        existing_columns = {col[1] for col in conn.execute("PRAGMA table_info(history)")}
+        if 'video_id' not in existing_columns:
+            conn.execute('ALTER TABLE history ADD COLUMN video_id TEXT')
+        
+        rows = conn.execute('SELECT id, url FROM history WHERE video_id IS NULL').fetchall()
+        updates = [(key, row_id) for row_id, url in rows if (key := self._video_key(url))]
+        conn.executemany('UPDATE history SET video_id = ? WHERE id = ?', updates)
+        
+        # (column, date_downloaded, id) lets filtered, date-ordered pages walk the index
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_history_date ON history(date_downloaded, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_history_site_date ON history(site, date_downloaded, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_history_quality_date ON history(quality, date_downloaded, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_history_url ON history(url, date_downloaded)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_history_video_id ON history(video_id, date_downloaded)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_search_history_timestamp ON search_history(timestamp)')
+    
+    def _create_rollups(self, conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stats_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                downloads INTEGER NOT NULL DEFAULT 0,
+                total_size INTEGER NOT NULL DEFAULT 0,
+                quality_sum INTEGER NOT NULL DEFAULT 0,
+                quality_count INTEGER NOT NULL DEFAULT 0,
+                first_download TIMESTAMP,
+                last_download TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stats_site (
+                site TEXT PRIMARY KEY,
+                downloads INTEGER NOT NULL DEFAULT 0,
+                total_size INTEGER NOT NULL DEFAULT 0,
+                quality_sum INTEGER NOT NULL DEFAULT 0,
+                quality_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stats_quality (
+                quality TEXT PRIMARY KEY,
+                downloads INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stats_daily (
+                day TEXT PRIMARY KEY,
+                downloads INTEGER NOT NULL DEFAULT 0,
+                total_size INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self._rebuild_rollups(conn)
+    
+    def _rebuild_rollups(self, conn: sqlite3.Connection):
+        conn.execute('DELETE FROM stats_totals')
+        conn.execute('DELETE FROM stats_site')
+        conn.execute('DELETE FROM stats_quality')
+        conn.execute('DELETE FROM stats_daily')
+        
+        conn.execute('''
+            INSERT INTO stats_totals (id, downloads, total_size, quality_sum, quality_count, first_download, last_download)
+            SELECT 1, COUNT(*), COALESCE(SUM(file_size), 0),
+                   COALESCE(SUM(CAST(quality AS INTEGER)), 0), COUNT(quality),
+                   MIN(date_downloaded), MAX(date_downloaded)
+            FROM history
+        ''')
+        conn.execute('''
+            INSERT INTO stats_site (site, downloads, total_size, quality_sum, quality_count)
+            SELECT site, COUNT(*), COALESCE(SUM(file_size), 0),
+                   COALESCE(SUM(CAST(quality AS INTEGER)), 0), COUNT(quality)
+            FROM history WHERE site IS NOT NULL GROUP BY site
+        ''')
+        conn.execute('''
+            INSERT INTO stats_quality (quality, downloads)
+            SELECT quality, COUNT(*) FROM history WHERE quality IS NOT NULL GROUP BY quality
+        ''')
+        conn.execute('''
+            INSERT INTO stats_daily (day, downloads, total_size)
+            SELECT substr(date_downloaded, 1, 10), COUNT(*), COALESCE(SUM(file_size), 0)
+            FROM history WHERE date_downloaded IS NOT NULL GROUP BY substr(date_downloaded, 1, 10)
+        ''')
+    
+    def _update_rollups(self, conn: sqlite3.Connection, site: str, quality: str, file_size: int, date_downloaded: str):
+        file_size = file_size or 0
+        quality_value = conn.execute('SELECT CAST(? AS INTEGER)', (quality,)).fetchone()[0] or 0
+        quality_count = 1 if quality is not None else 0
+        
+        conn.execute('''
+            INSERT INTO stats_totals (id, downloads, total_size, quality_sum, quality_count, first_download, last_download)
+            VALUES (1, 1, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                downloads = downloads + 1,
+                total_size = total_size + excluded.total_size,
+                quality_sum = quality_sum + excluded.quality_sum,
+                quality_count = quality_count + excluded.quality_count,
+                first_download = COALESCE(MIN(first_download, excluded.first_download), excluded.first_download),
+                last_download = COALESCE(MAX(last_download, excluded.last_download), excluded.last_download)
+        ''', (file_size, quality_value, quality_count, date_downloaded, date_downloaded))
+        
+        if site is not None:
+            conn.execute('''
+                INSERT INTO stats_site (site, downloads, total_size, quality_sum, quality_count)
+                VALUES (?, 1, ?, ?, ?)
+                ON CONFLICT(site) DO UPDATE SET
+                    downloads = downloads + 1,
+                    total_size = total_size + excluded.total_size,
+                    quality_sum = quality_sum + excluded.quality_sum,
+                    quality_count = quality_count + excluded.quality_count
+            ''', (site, file_size, quality_value, quality_count))
+        
+        if quality is not None:
+            conn.execute('''
+                INSERT INTO stats_quality (quality, downloads) VALUES (?, 1)
+                ON CONFLICT(quality) DO UPDATE SET downloads = downloads + 1
+            ''', (quality,))
+        
+        conn.execute('''
+            INSERT INTO stats_daily (day, downloads, total_size) VALUES (?, 1, ?)
+            ON CONFLICT(day) DO UPDATE SET
+                downloads = downloads + 1,
+                total_size = total_size + excluded.total_size
+        ''', (date_downloaded[:10], file_size))
+    
+    def rebuild_stats(self) -> int:
+        with self.storage.transaction() as conn:
+            self._rebuild_rollups(conn)
+            return conn.execute('SELECT downloads FROM stats_totals WHERE id = 1').fetchone()[0]
+    
+    def _video_key(self, url: str) -> Optional[str]:
+        if not url:
+            return None
+        try:
+            from .sites import SiteRegistry
+            return SiteRegistry().get_video_key(url)
+        except Exception:
+            return None
 
     def add_entry(
         self,
@@ -76,20 +214,21 @@ class DatabaseManager:
         duration: str = None
     ):
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
             if not site:
                 site = self._infer_site(url)
             
-            c.execute('''
-                INSERT INTO history 
-                (url, title, filename, quality, date_downloaded, site, file_size, duration, status) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'completed')
-            ''', (url, title, str(filename), str(quality), datetime.now(), site, file_size, duration))
+            video_key = self._video_key(url)
+            date_downloaded = datetime.now().isoformat(' ')
             
-            conn.commit()
-            conn.close()
+            # Rollups are updated in the same transaction so the dashboard never
+            # has to aggregate over the whole history table
+            with self.storage.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO history 
+                    (url, title, filename, quality, date_downloaded, site, file_size, duration, status, video_id) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'completed', ?)
+                ''', (url, title, str(filename), str(quality), date_downloaded, site, file_size, duration, video_key))
+                self._update_rollups(conn, site, str(quality), file_size, date_downloaded)
         except Exception:
             pass
     
@@ -111,15 +250,23 @@ class DatabaseManager:
         self,
         limit: int = 50,
         site: str = None,
-        quality: str = None
+        quality: str = None,
+        after: str = None
     ) -> List[Dict[str, Any]]:
+        return self.get_history_page(limit=limit, site=site, quality=quality, after=after)[0]
+    
+    def get_history_page(
+        self,
+        limit: int = 50,
+        site: str = None,
+        quality: str = None,
+        after: str = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        cursor = self.parse_cursor(after)
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
             query = '''
                 SELECT id, url, title, filename, quality, date_downloaded, 
-                       site, file_size, duration, status
+                       site, file_size, duration, status, video_id
                 FROM history
             '''
             params = []
@@ -131,17 +278,20 @@ class DatabaseManager:
             
             if quality:
                 conditions.append('quality = ?')
-                params.append(quality)
+                params.append(str(quality))
+            
+            # Keyset pagination: continue strictly below the last (date, id) seen
+            if cursor:
+                conditions.append('(date_downloaded, id) < (?, ?)')
+                params.extend(cursor)
             
             if conditions:
                 query += ' WHERE ' + ' AND '.join(conditions)
             
-            query += ' ORDER BY date_downloaded DESC LIMIT ?'
+            query += ' ORDER BY date_downloaded DESC, id DESC LIMIT ?'
             params.append(limit)
             
-            c.execute(query, params)
-            rows = c.fetchall()
-            conn.close()
+            rows = self.storage.query(query, params)
             
             result = []
             for row in rows:
@@ -155,24 +305,37 @@ class DatabaseManager:
                     'site': row[6] if len(row) > 6 else None,
                     'file_size': row[7] if len(row) > 7 else 0,
                     'duration': row[8] if len(row) > 8 else None,
-                    'status': row[9] if len(row) > 9 else 'completed'
+                    'status': row[9] if len(row) > 9 else 'completed',
+                    'video_id': row[10],
+                    'cursor': self.make_cursor(row[5], row[0])
                 })
             
-            return result
+            next_cursor = result[-1]['cursor'] if result and len(result) >= limit else None
+            return result, next_cursor
         except Exception:
-            return []
+            return [], None
+    
+    @staticmethod
+    def make_cursor(date_downloaded: Any, row_id: int) -> str:
+        return f"{date_downloaded}|{row_id}"
+    
+    @staticmethod
+    def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+        if not cursor:
+            return None
+        date_part, _, id_part = str(cursor).rpartition('|')
+        try:
+            return date_part, int(id_part)
+        except ValueError:
+            raise ValueError(f"Invalid history cursor: {cursor}")
     
     def get_history_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''
+            row = self.storage.query_one('''
                 SELECT id, url, title, filename, quality, date_downloaded
                 FROM history WHERE url = ?
                 ORDER BY date_downloaded DESC LIMIT 1
             ''', (url,))
-            row = c.fetchone()
-            conn.close()
             
             if row:
                 return {
@@ -187,22 +350,45 @@ class DatabaseManager:
         except Exception:
             return None
     
-    def clear_history(self, older_than_days: int = None) -> int:
+    def get_history_by_video_key(self, video_key: str) -> Optional[Dict[str, Any]]:
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
+            row = self.storage.query_one('''
+                SELECT id, url, title, filename, quality, date_downloaded, site, file_size
+                FROM history WHERE video_id = ?
+                ORDER BY date_downloaded DESC LIMIT 1
+            ''', (video_key,))
             
-            if older_than_days is not None:
-                c.execute('''
-                    DELETE FROM history 
-                    WHERE datetime(date_downloaded) < datetime('now', ?)
-                ''', (f'-{older_than_days} days',))
-            else:
-                c.execute('DELETE FROM history')
+            if row:
+                return {
+                    'id': row[0],
+                    'url': row[1],
+                    'title': row[2],
+                    'filename': row[3],
+                    'quality': row[4],
+                    'date_downloaded': row[5],
+                    'site': row[6],
+                    'file_size': row[7]
+                }
+            return None
+        except Exception:
+            return None
+    
+    def clear_history(self, older_than_days: int = None) -> int:
+        try:
+            with self.storage.transaction() as conn:
+                if older_than_days is not None:
+                    # Compare the stored ISO text directly so idx_history_date is usable
+                    cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat(' ')
+                    cursor = conn.execute(
+                        'DELETE FROM history WHERE date_downloaded < ?', (cutoff,)
+                    )
+                else:
+                    cursor = conn.execute('DELETE FROM history')
+                
+                deleted = cursor.rowcount
+                if deleted:
+                    self._rebuild_rollups(conn)
             
-            deleted = c.rowcount
-            conn.commit()
-            conn.close()
             return deleted
         except Exception:
             return 0
@@ -285,43 +471,26 @@ class DatabaseManager:
     
     def _get_total_count(self) -> int:
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('SELECT COUNT(*) FROM history')
-            count = c.fetchone()[0]
-            conn.close()
-            return count
+            row = self.storage.query_one('SELECT downloads FROM stats_totals WHERE id = 1')
+            return row[0] if row else 0
         except:
             return 0
 
     def show_stats(self, console: Console):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        c = self.storage.connection().cursor()
         
-        c.execute('SELECT COUNT(*) FROM history')
-        total = c.fetchone()[0]
+        c.execute('SELECT downloads, total_size FROM stats_totals WHERE id = 1')
+        total, total_size = c.fetchone() or (0, 0)
         
         if total == 0:
             console.print("[yellow]No statistics available yet.[/]")
-            conn.close()
             return
 
-        c.execute('SELECT quality, COUNT(*) FROM history GROUP BY quality ORDER BY COUNT(*) DESC')
+        c.execute('SELECT quality, downloads FROM stats_quality ORDER BY downloads DESC')
         quality_stats = c.fetchall()
         
-        try:
-            c.execute('SELECT site, COUNT(*) FROM history WHERE site IS NOT NULL GROUP BY site ORDER BY COUNT(*) DESC')
-            site_stats = c.fetchall()
-        except:
-            site_stats = []
-        
-        try:
-            c.execute('SELECT SUM(file_size) FROM history WHERE file_size > 0')
-            total_size = c.fetchone()[0] or 0
-        except:
-            total_size = 0
-        
-        conn.close()
+        c.execute('SELECT site, downloads FROM stats_site ORDER BY downloads DESC')
+        site_stats = c.fetchall()
 
         size_str = self._format_size(total_size)
         summary = f"[bold green]Total Downloads:[/] {total}\n"
@@ -370,40 +539,25 @@ class DatabaseManager:
     
     def add_search_entry(self, site: str, query: str, filters: str, results_count: int):
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute(
+            self.storage.execute(
                 'INSERT INTO search_history (site, query, filters, results_count, timestamp) VALUES (?, ?, ?, ?, ?)',
-                (site, query, filters, results_count, datetime.now())
+                (site, query, filters, results_count, datetime.now().isoformat(' '))
             )
-            conn.commit()
-            conn.close()
         except Exception:
             pass
     
     def get_search_history(self, limit: int = 20) -> list:
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute(
+            return self.storage.query(
                 'SELECT site, query, results_count, timestamp FROM search_history ORDER BY timestamp DESC LIMIT ?',
                 (limit,)
             )
-            rows = c.fetchall()
-            conn.close()
-            return rows
         except Exception:
             return []
     
     def clear_search_history(self) -> int:
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('DELETE FROM search_history')
-            deleted = c.rowcount
-            conn.commit()
-            conn.close()
-            return deleted
+            return self.storage.execute('DELETE FROM search_history').rowcount
         except Exception:
             return 0
     
@@ -0,0 +1,187 @@
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class QueuedDownload:
+    job_id: str
+    site: str
+    target: Callable[[], Any] = field(repr=False)
+    priority: int = 0
+    seq: int = 0
+
+
+class DownloadQueue:
+
+    def __init__(
+        self,
+        max_workers: int = 3,
+        max_per_site: int = 0,
+        site_limits: Optional[Dict[str, int]] = None
+    ):
+        self.max_workers = max(1, int(max_workers))
+        self.max_per_site = max(0, int(max_per_site))
+        self.site_limits: Dict[str, int] = dict(site_limits or {})
+
+        self._pending: List[QueuedDownload] = []
+        self._running: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._counter = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._retire = 0
+        self._shutdown = False
+
+    def submit(self, job_id: str, site: str, target: Callable[[], Any], priority: int = 0) -> None:
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Download queue is shut down")
+            self._pending.append(QueuedDownload(job_id, site or "", target, priority, next(self._counter)))
+            self._spawn_workers()
+            self._cond.notify_all()
+
+    def cancel(self, job_id: str) -> bool:
+        with self._cond:
+            for index, item in enumerate(self._pending):
+                if item.job_id == job_id:
+                    del self._pending[index]
+                    return True
+        return False
+
+    def resize(self, max_workers: int) -> None:
+        with self._cond:
+            max_workers = max(1, int(max_workers))
+            alive = len([w for w in self._workers if w.is_alive()])
+            self.max_workers = max_workers
+            # Surplus workers exit after their current download; never interrupt one
+            self._retire = max(0, alive - max_workers)
+            self._spawn_workers()
+            self._cond.notify_all()
+
+    def set_site_limits(self, max_per_site: Optional[int] = None, site_limits: Optional[Dict[str, int]] = None) -> None:
+        with self._cond:
+            if max_per_site is not None:
+                self.max_per_site = max(0, int(max_per_site))
+            if site_limits is not None:
+                self.site_limits = {site.lower(): int(limit) for site, limit in site_limits.items()}
+            self._cond.notify_all()
+
+    def site_limit(self, site: str) -> int:
+        return self.site_limits.get(site.lower(), self.max_per_site) if site else self.max_per_site
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            running_by_site: Dict[str, int] = {}
+            for site in self._running.values():
+                running_by_site[site] = running_by_site.get(site, 0) + 1
+            return {
+                "max_concurrent": self.max_workers,
+                "max_per_site": self.max_per_site,
+                "site_limits": dict(self.site_limits),
+                "running": list(self._running),
+                "queued": [item.job_id for item in self._ordered_pending()],
+                "running_by_site": running_by_site,
+            }
+
+    def position(self, job_id: str) -> Optional[int]:
+        with self._cond:
+            for index, item in enumerate(self._ordered_pending()):
+                if item.job_id == job_id:
+                    return index
+        return None
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._cond:
+            self._shutdown = True
+            self._pending.clear()
+            self._cond.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _ordered_pending(self) -> List[QueuedDownload]:
+        return sorted(self._pending, key=lambda item: (-item.priority, item.seq))
+
+    def _spawn_workers(self):
+        self._workers = [w for w in self._workers if w.is_alive()]
+        needed = self.max_workers - (len(self._workers) - self._retire)
+        while needed > 0 and (self._pending or self._retire == 0):
+            if self._retire:
+                # Cancel a pending retirement instead of starting a new thread
+                self._retire -= 1
+            else:
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"download-worker-{next(self._counter)}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            needed -= 1
+
+    def _next_runnable(self) -> Optional[QueuedDownload]:
+        running_by_site: Dict[str, int] = {}
+        for site in self._running.values():
+            running_by_site[site] = running_by_site.get(site, 0) + 1
+
+        for item in self._ordered_pending():
+            # A resumed job waits for its paused run to finish unwinding
+            if item.job_id in self._running:
+                continue
+            limit = self.site_limit(item.site)
+            if limit and running_by_site.get(item.site, 0) >= limit:
+                continue
+            return item
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._shutdown:
+                        return
+                    if self._retire:
+                        self._retire -= 1
+                        self._workers = [w for w in self._workers if w is not threading.current_thread()]
+                        return
+                    item = self._next_runnable()
+                    if item is not None:
+                        break
+                    self._cond.wait()
+                self._pending.remove(item)
+                self._running[item.job_id] = item.site
+
+            try:
+                item.target()
+            except Exception as e:
+                print(f"Download worker error for {item.job_id}: {e}")
+            finally:
+                with self._cond:
+                    self._running.pop(item.job_id, None)
+                    self._cond.notify_all()
+
+
+_default_queue: Optional[DownloadQueue] = None
+_default_queue_lock = threading.Lock()
+
+
+def GetDownloadQueue() -> DownloadQueue:
+    global _default_queue
+    if _default_queue is None:
+        with _default_queue_lock:
+            if _default_queue is None:
+                from .config import GetConfig
+                settings = GetConfig().download
+                queue = DownloadQueue(
+                    max_workers=settings.max_concurrent,
+                    max_per_site=settings.max_per_site,
+                    site_limits=settings.site_limits
+                )
+                from . import metrics
+                metrics.queue_depth.set_function(lambda: len(queue._pending))
+                metrics.active_workers.set_function(lambda: len(queue._running))
+                metrics.max_workers.set_function(lambda: queue.max_workers)
+                _default_queue = queue
+    return _default_queue
@@ -2,6 +2,7 @@ import requests
 import re
 from urllib.parse import urljoin, unquote
 import concurrent.futures
+import queue
 import shutil
 from pathlib import Path
 import sys
@@ -10,14 +11,21 @@ import html
 import time
 import json
 from .converter import VideoConverter
+from .ts_validator import ValidateTsSegment
+from .metrics import segment_seconds, downloaded_bytes, retries as retry_counter, ObserveResponse
+from .playback import LiveStream, GetPlaybackRegistry, CurrentJob
 
 
 class CustomHLSDownloader:
 
     def __init__(self, output_name: str = None, headers: dict | None = None, 
-                 keep_ts: bool = False, proxy: str = None, progress_callback=None, speed_limit: str = None):
+                 keep_ts: bool = False, proxy: str = None, progress_callback=None, speed_limit: str = None,
+                 validate_segments: bool = True, metadata: dict | None = None, site: str = ""):
+        self.site = site or (metadata or {}).get('site') or "unknown"
         self.output_name = Path(output_name) if output_name else None
         self.keep_ts = keep_ts
+        self.metadata = metadata
+        self.validate_segments = validate_segments
         self.session = requests.Session()
         self.progress_callback = progress_callback
         self.speed_limit = self._parse_speed_limit(speed_limit) if speed_limit else None
@@ -233,6 +241,7 @@ class CustomHLSDownloader:
         try:
 
             response = self.session.get(m3u8_url, timeout=10)
+            ObserveResponse(self.site, response.status_code)
             if response.status_code == 403:
                 raise PermissionError("403 Forbidden. Server rejected the request (Check Referer/User-Agent).")
             response.raise_for_status()
@@ -272,68 +281,107 @@ class CustomHLSDownloader:
                     playlist_content = response.text
                     m3u8_url = selected_url
 
-            segments = self._parse_media_playlist(playlist_content, m3u8_url)
-            total_segments = len(segments)
-            temp_dir = Path("temp_segments")
+            entries = self._parse_media_playlist_entries(playlist_content, m3u8_url)
+            segments = [url for url, _ in entries]
+            # One directory per output file, so concurrent downloads never share segments
+            output_path = Path(self.output_name)
+            temp_dir = output_path.with_name(f".{output_path.stem}.segments")
             if temp_dir.exists():
                 shutil.rmtree(temp_dir)
-            temp_dir.mkdir(exist_ok=True)
+            temp_dir.mkdir(parents=True, exist_ok=True)
             
-            downloaded_files = []
+            job_id = CurrentJob()
+            stream = LiveStream(job_id or "", temp_dir, [duration for _, duration in entries])
+            if job_id:
+                GetPlaybackRegistry().register(stream)
             
-            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-                future_to_segment = {
-                    executor.submit(self._download_segment, seg_url, idx, temp_dir): idx 
-                    for idx, seg_url in enumerate(segments)
-                }
+            try:
+                downloaded_files = self._download_segments(stream, segments)
                 
-                completed = 0
-                for future in concurrent.futures.as_completed(future_to_segment):
-                    idx = future_to_segment[future]
-                    try:
-                        file_path = future.result()
-                        downloaded_files.append((idx, file_path))
-                        completed += 1
-                        if self.progress_callback:
-                            should_continue = self.progress_callback(completed, total_segments)
-                            if should_continue is False:
-                                raise RuntimeError("Download cancelled")
-                    except RuntimeError as e:
-                        if str(e) == "Download cancelled":
-                            executor.shutdown(wait=False, cancel_futures=True)
-                            raise e
-                    except Exception as e:
-                        pass 
-
-            downloaded_files.sort(key=lambda x: x[0])
-            
-            with open(self.output_name, 'wb') as outfile:
-                for _, segment_file in downloaded_files:
-                    with open(segment_file, 'rb') as infile:
-                        outfile.write(infile.read())
-            
-            shutil.rmtree(temp_dir)
-            
-            converter = VideoConverter()
-            return converter.ConvertTsToMp4(self.output_name, self.keep_ts)
+                with open(self.output_name, 'wb') as outfile:
+                    for _, segment_file in downloaded_files:
+                        with open(segment_file, 'rb') as infile:
+                            shutil.copyfileobj(infile, outfile)
+                # Players are switched to the merged file before the segments go away
+                stream.set_merged(output_path)
+                
+                shutil.rmtree(temp_dir)
+                
+                converter = VideoConverter(require_ffmpeg=False)
+                metadata = self.metadata
+                if metadata is not None and not metadata.get('title'):
+                    metadata = {**metadata, 'title': Path(self.output_name).stem}
+                return converter.ConvertTsToMp4(self.output_name, self.keep_ts, metadata=metadata)
+            finally:
+                stream.cancel()
+                if job_id:
+                    GetPlaybackRegistry().unregister(job_id)
 
         except KeyboardInterrupt:
             raise
         except Exception as e:
             raise RuntimeError(f"Critical failure: {e}")
 
-    def _parse_media_playlist(self, content: str, base_url: str) -> list[str]:
-        lines = content.splitlines()
-        segments = []
-        for line in lines:
+    def _download_segments(self, stream: LiveStream, segments: list[str], workers: int = 8) -> list[tuple]:
+        # Workers pull segment indexes from the stream in playback order (see
+        # LiveStream.claim_next) instead of the pool draining a fixed FIFO
+        results = queue.Queue()
+        
+        def worker():
+            while True:
+                idx = stream.claim_next()
+                if idx is None:
+                    return
+                try:
+                    file_path = self._download_segment(segments[idx], idx, stream.segment_dir)
+                    stream.mark_done(idx)
+                    results.put((idx, file_path))
+                except Exception:
+                    stream.mark_failed(idx)
+                    results.put((idx, None))
+        
+        downloaded_files = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in range(min(workers, len(segments))):
+                executor.submit(worker)
+            
+            completed = 0
+            try:
+                for _ in range(len(segments)):
+                    idx, file_path = results.get()
+                    if file_path is None:
+                        continue
+                    downloaded_files.append((idx, file_path))
+                    completed += 1
+                    if self.progress_callback:
+                        should_continue = self.progress_callback(completed, len(segments))
+                        if should_continue is False:
+                            raise RuntimeError("Download cancelled")
+            finally:
+                # Stops workers from claiming more; in-flight segments finish on their own
+                stream.cancel()
+        
+        downloaded_files.sort(key=lambda x: x[0])
+        return downloaded_files
+
+    def _parse_media_playlist_entries(self, content: str, base_url: str) -> list[tuple]:
+        entries = []
+        duration = 0.0
+        for line in content.splitlines():
             line = line.strip()
+            if line.startswith("#EXTINF:"):
+                try:
+                    duration = float(line[8:].split(",", 1)[0])
+                except ValueError:
+                    duration = 0.0
+                continue
             if not line or line.startswith("#"):
                 continue
             if not line.startswith("http"):
                 line = urljoin(base_url, line)
-            segments.append(line)
-        
-        return segments
+            entries.append((line, duration or 10.0))
+            duration = 0.0
+        return entries
 
     def _download_segment(self, url: str, index: int, save_dir: Path) -> Path:
         filename = save_dir / f"segment_{index:04d}.ts"
@@ -343,8 +391,12 @@ class CustomHLSDownloader:
 
         retries = 5
         for attempt in range(retries):
+            if attempt:
+                retry_counter.inc(site=self.site)
+            started = time.perf_counter()
             try:
                 response = self.session.get(url, stream=True, timeout=20)
+                ObserveResponse(self.site, response.status_code)
                 if response.status_code != 200:
                     raise requests.RequestException(f"Status {response.status_code}")
                 
@@ -352,18 +404,27 @@ class CustomHLSDownloader:
                 if content_length and int(content_length) == 0:
                     raise requests.RequestException("Empty content-length")
                 
-                bytes_downloaded = 0
-                with open(filename, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            bytes_downloaded += len(chunk)
+                body = bytearray()
+                for chunk in response.iter_content(chunk_size=65536):
+                    if chunk:
+                        body += chunk
+                
+                if not body:
+                    raise requests.RequestException("Downloaded segment is empty (got 0 bytes)")
                 
-                if bytes_downloaded == 0 or not filename.exists() or filename.stat().st_size == 0:
-                    if filename.exists():
-                        filename.unlink()
-                    raise requests.RequestException(f"Downloaded file is empty (got {bytes_downloaded} bytes)")
+                if content_length and 'content-encoding' not in response.headers and len(body) != int(content_length):
+                    raise requests.RequestException(f"Truncated segment (got {len(body)} of {content_length} bytes)")
+                
+                if self.validate_segments:
+                    check = ValidateTsSegment(body)
+                    if not check.valid:
+                        raise requests.RequestException(f"Invalid segment: {check.reason}")
+                
+                with open(filename, 'wb') as f:
+                    f.write(body)
                 
+                segment_seconds.observe(time.perf_counter() - started, site=self.site)
+                downloaded_bytes.inc(len(body), site=self.site)
                 return filename
             except (requests.RequestException, ConnectionError) as e:
                 if attempt < retries - 1:
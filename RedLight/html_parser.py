@@ -0,0 +1,184 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+# Fastest first; html.parser ships with Python and is always there
+PARSER_BACKENDS = ("selectolax", "lxml", "html.parser")
+
+
+class HtmlNode(ABC):
+    """The small slice of a DOM the scrapers need, on top of any backend.
+
+    select/select_one take CSS selectors and, like BeautifulSoup, only match
+    descendants of the node they are called on.
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    @abstractmethod
+    def tag(self) -> str:
+        pass
+
+    @abstractmethod
+    def select(self, selector: str) -> List["HtmlNode"]:
+        pass
+
+    @abstractmethod
+    def select_one(self, selector: str) -> Optional["HtmlNode"]:
+        pass
+
+    @abstractmethod
+    def get(self, name: str, default=None) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def text(self, strip: bool = False) -> str:
+        """All text below the node; strip=True strips every piece before joining"""
+
+    @abstractmethod
+    def closest(self, tag: str) -> Optional["HtmlNode"]:
+        pass
+
+
+class _SoupNode(HtmlNode):
+
+    __slots__ = ()
+
+    @property
+    def tag(self) -> str:
+        return self._node.name
+
+    def select(self, selector: str) -> List[HtmlNode]:
+        return [_SoupNode(node) for node in self._node.select(selector)]
+
+    def select_one(self, selector: str) -> Optional[HtmlNode]:
+        node = self._node.select_one(selector)
+        return _SoupNode(node) if node is not None else None
+
+    def get(self, name: str, default=None) -> Optional[str]:
+        value = self._node.get(name, default)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def text(self, strip: bool = False) -> str:
+        return self._node.get_text(strip=strip)
+
+    def closest(self, tag: str) -> Optional[HtmlNode]:
+        node = self._node.find_parent(tag)
+        return _SoupNode(node) if node is not None else None
+
+
+class _LexborNode(HtmlNode):
+
+    __slots__ = ()
+
+    @property
+    def tag(self) -> str:
+        return self._node.tag
+
+    def select(self, selector: str) -> List[HtmlNode]:
+        # Lexbor matches the node itself as well as its descendants
+        own = self._node.mem_id
+        return [_LexborNode(node) for node in self._node.css(selector) if node.mem_id != own]
+
+    def select_one(self, selector: str) -> Optional[HtmlNode]:
+        node = self._node.css_first(selector)
+        if node is not None and node.mem_id == self._node.mem_id:
+            matches = self._node.css(selector)
+            node = matches[1] if len(matches) > 1 else None
+        return _LexborNode(node) if node is not None else None
+
+    def get(self, name: str, default=None) -> Optional[str]:
+        attributes = self._node.attributes
+        if name not in attributes:
+            return default
+        # Valueless attributes come back as None; BeautifulSoup gives ""
+        value = attributes[name]
+        return value if value is not None else ""
+
+    def text(self, strip: bool = False) -> str:
+        return self._node.text(deep=True, separator="", strip=strip)
+
+    def closest(self, tag: str) -> Optional[HtmlNode]:
+        node = self._node.parent
+        while node is not None:
+            if node.tag == tag:
+                return _LexborNode(node)
+            node = node.parent
+        return None
+
+
+def _has_class(name: str):
+    # While parsing, the strainer sees class as the raw attribute string, so a
+    # plain class_="mb" would miss class="mb hdy"
+    def match(value) -> bool:
+        if not value:
+            return False
+        return name in (value.split() if isinstance(value, str) else value)
+    return match
+
+
+_backend: Optional[str] = None
+_backend_lock = threading.Lock()
+
+
+def GetParserBackend() -> str:
+    if _backend is not None:
+        return _backend
+    if SELECTOLAX_AVAILABLE:
+        return "selectolax"
+    if LXML_AVAILABLE:
+        return "lxml"
+    return "html.parser"
+
+
+def SetParserBackend(name: Optional[str]) -> str:
+    """Force a backend (None goes back to the fastest one installed)"""
+    global _backend
+    if name is not None:
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown HTML parser backend: {name}")
+        if name == "selectolax" and not SELECTOLAX_AVAILABLE:
+            raise ValueError("selectolax is not installed")
+        if name == "lxml" and not LXML_AVAILABLE:
+            raise ValueError("lxml is not installed")
+    with _backend_lock:
+        _backend = name
+    return GetParserBackend()
+
+
+def ParseHTML(html: str, parse_only: Optional[Tuple[str, str]] = None, backend: Optional[str] = None) -> HtmlNode:
+    """Parse a page and return its document node.
+
+    parse_only=(tag, css_class) lets the BeautifulSoup backends build only the
+    subtrees under matching elements instead of the whole page. Only pass it
+    when every selector used afterwards lives inside those elements. The
+    selectolax backend ignores it; its full parse is already cheaper.
+    """
+    backend = backend or GetParserBackend()
+    if backend == "selectolax":
+        try:
+            return _LexborNode(LexborHTMLParser(html).root)
+        except Exception:
+            backend = "lxml" if LXML_AVAILABLE else "html.parser"
+
+    strainer = SoupStrainer(parse_only[0], class_=_has_class(parse_only[1])) if parse_only else None
+    return _SoupNode(BeautifulSoup(html, backend, parse_only=strainer))
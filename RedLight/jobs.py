@@ -0,0 +1,418 @@
+import itertools
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class JobEventType(Enum):
+    QUEUED = "queued"
+    EXTRACTING = "extracting"
+    PROGRESS = "progress"
+    MERGING = "merging"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    PAUSED = "paused"
+
+
+TERMINAL_EVENTS = (JobEventType.DONE, JobEventType.FAILED, JobEventType.CANCELLED)
+
+_EVENT_STATUS = {
+    JobEventType.QUEUED: "queued",
+    JobEventType.EXTRACTING: "extracting",
+    JobEventType.PROGRESS: "downloading",
+    JobEventType.MERGING: "merging",
+    JobEventType.DONE: "completed",
+    JobEventType.FAILED: "failed",
+    JobEventType.CANCELLED: "cancelled",
+    JobEventType.PAUSED: "paused",
+}
+
+
+@dataclass
+class JobEvent:
+    type: JobEventType
+    job_id: str
+    job: Dict[str, Any]
+    seq: int
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.type.value,
+            "job_id": self.job_id,
+            "seq": self.seq,
+            "timestamp": self.timestamp,
+            "job": self.job,
+        }
+
+
+@dataclass
+class Job:
+    job_id: str
+    url: str
+    title: str = ""
+    site: str = ""
+    quality: str = "best"
+    output_path: str = ""
+    qualities: List[int] = field(default_factory=list)
+    status: str = "queued"
+    downloaded: int = 0
+    total: int = 0
+    result: Optional[str] = None
+    error: str = ""
+    persist: bool = False
+    video_key: str = ""
+    from_history: bool = False
+    created_at: str = ""
+    updated_at: str = ""
+    _cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def __post_init__(self):
+        if not self.created_at:
+            self.created_at = datetime.now().isoformat()
+        if not self.updated_at:
+            self.updated_at = self.created_at
+
+    @property
+    def progress_percent(self) -> float:
+        if self.total <= 0:
+            return 0.0
+        return min(100.0, (self.downloaded / self.total) * 100)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Same keys as DownloadState.to_dict so API consumers can use either
+        return {
+            "job_id": self.job_id,
+            "download_id": self.job_id,
+            "url": self.url,
+            "title": self.title,
+            "site": self.site,
+            "quality": self.quality,
+            "output_path": self.output_path,
+            "available_qualities": list(self.qualities),
+            "status": self.status,
+            "downloaded_size": self.downloaded,
+            "total_size": self.total,
+            "progress_percent": self.progress_percent,
+            "result": self.result,
+            "error": self.error,
+            "video_key": self.video_key,
+            "from_history": self.from_history,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class Subscription:
+
+    def __init__(
+        self,
+        bus: "EventBus",
+        callback: Callable[[JobEvent], None],
+        event_types: Optional[Iterable[JobEventType]] = None,
+        job_id: Optional[str] = None,
+        min_interval: float = 0.0
+    ):
+        self._bus = bus
+        self.callback = callback
+        self.event_types = frozenset(event_types) if event_types else None
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._last_sent: Dict[str, float] = {}
+        self._pending: Dict[str, JobEvent] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self.active = True
+
+    def wants(self, event: JobEvent) -> bool:
+        if self.job_id is not None and event.job_id != self.job_id:
+            return False
+        return self.event_types is None or event.type in self.event_types
+
+    def offer(self, event: JobEvent) -> None:
+        if not self.active or not self.wants(event):
+            return
+
+        if event.type != JobEventType.PROGRESS or self.min_interval <= 0:
+            with self._lock:
+                # Flush progress still waiting for its window so it is not
+                # delivered after the state change that follows it
+                pending = self._pending.pop(event.job_id, None)
+                if event.type in TERMINAL_EVENTS:
+                    self._last_sent.pop(event.job_id, None)
+            if pending is not None:
+                self._deliver(pending)
+            self._deliver(event)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._last_sent.get(event.job_id, 0.0)
+            if elapsed >= self.min_interval and event.job_id not in self._pending:
+                self._last_sent[event.job_id] = now
+                deliver = True
+            else:
+                # Coalesce: only the newest progress per job survives the window
+                self._pending[event.job_id] = event
+                deliver = False
+                if self._timer is None:
+                    self._timer = threading.Timer(max(0.0, self.min_interval - elapsed), self._flush_pending)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if deliver:
+            self._deliver(event)
+
+    def _flush_pending(self) -> None:
+        with self._lock:
+            self._timer = None
+            pending, self._pending = self._pending, {}
+            now = time.monotonic()
+            for job_id in pending:
+                self._last_sent[job_id] = now
+        for event in pending.values():
+            self._deliver(event)
+
+    def _deliver(self, event: JobEvent) -> None:
+        if not self.active:
+            return
+        try:
+            self.callback(event)
+        except Exception as e:
+            print(f"Job event subscriber failed: {e}")
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        callback: Callable[[JobEvent], None],
+        event_types: Optional[Iterable[JobEventType]] = None,
+        job_id: Optional[str] = None,
+        min_interval: float = 0.0
+    ) -> Subscription:
+        subscription = Subscription(self, callback, event_types, job_id, min_interval)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.active = False
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        with subscription._lock:
+            if subscription._timer is not None:
+                subscription._timer.cancel()
+                subscription._timer = None
+            subscription._pending.clear()
+
+    def publish(self, event: JobEvent) -> None:
+        # Copy-on-write list, so publishing never holds the lock while calling out
+        for subscription in self._subscriptions:
+            subscription.offer(event)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+
+class JobRegistry:
+
+    def __init__(self, keep_finished: int = 200):
+        self.bus = EventBus()
+        self.keep_finished = keep_finished
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    def create(
+        self,
+        url: str,
+        title: str = "",
+        site: str = "",
+        quality: str = "best",
+        output_path: str = "",
+        job_id: Optional[str] = None,
+        persist: bool = False,
+        video_key: str = "",
+        from_history: bool = False
+    ) -> Job:
+        job = Job(
+            job_id=job_id or str(uuid.uuid4())[:8],
+            url=url,
+            title=title,
+            site=site or "",
+            quality=str(quality),
+            output_path=output_path,
+            persist=persist,
+            video_key=video_key,
+            from_history=from_history
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._publish(JobEventType.QUEUED, job)
+        return job
+
+    def extracting(self, job_id: str, **fields) -> None:
+        self._transition(job_id, JobEventType.EXTRACTING, **fields)
+
+    def progress(self, job_id: str, downloaded: int, total: Optional[int] = None) -> bool:
+        job = self.get(job_id)
+        if job is None:
+            return True
+        if job.is_finished or job.is_cancelled:
+            return False
+
+        with self._lock:
+            job.downloaded = downloaded
+            if total is not None:
+                job.total = total
+            job.status = "downloading"
+            job.updated_at = datetime.now().isoformat()
+        self._publish(JobEventType.PROGRESS, job)
+
+        # Segment downloaders merge as soon as the last piece lands
+        if job.total > 0 and job.downloaded >= job.total:
+            self.merging(job_id)
+        return not job.is_cancelled
+
+    def merging(self, job_id: str) -> None:
+        self._transition(job_id, JobEventType.MERGING)
+
+    def done(self, job_id: str, result: Optional[str] = None) -> None:
+        self._transition(job_id, JobEventType.DONE, result=result)
+
+    def failed(self, job_id: str, error: str = "") -> None:
+        self._transition(job_id, JobEventType.FAILED, error=error)
+
+    def paused(self, job_id: str) -> None:
+        job = self.get(job_id)
+        if job is not None:
+            job._cancel_event.set()
+        self._transition(job_id, JobEventType.PAUSED)
+
+    def resumed(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.status != "paused":
+            return False
+        job._cancel_event.clear()
+        self._transition(job_id, JobEventType.QUEUED)
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job._cancel_event.set()
+        self._transition(job_id, JobEventType.CANCELLED, error="Download cancelled")
+        return True
+
+    def should_continue(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        return job is None or not job.is_cancelled
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find_active(self, video_key: str) -> Optional[Job]:
+        if not video_key:
+            return None
+        with self._lock:
+            for job in self._jobs.values():
+                if job.video_key != video_key or job.is_finished:
+                    continue
+                # Paused jobs count: they still own their output path
+                if job.status == "paused" or not job.is_cancelled:
+                    return job
+        return None
+
+    def list_jobs(self, active_only: bool = False) -> List[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if active_only:
+            jobs = [job for job in jobs if not job.is_finished and job.status != "paused"]
+        return jobs
+
+    def snapshot(self, active_only: bool = False) -> List[Dict[str, Any]]:
+        return [job.to_dict() for job in self.list_jobs(active_only=active_only)]
+
+    def subscribe(
+        self,
+        callback: Callable[[JobEvent], None],
+        event_types: Optional[Iterable[JobEventType]] = None,
+        job_id: Optional[str] = None,
+        min_interval: float = 0.0
+    ) -> Subscription:
+        return self.bus.subscribe(callback, event_types=event_types, job_id=job_id, min_interval=min_interval)
+
+    def _transition(self, job_id: str, event_type: JobEventType, **fields) -> None:
+        job = self.get(job_id)
+        if job is None:
+            return
+        with self._lock:
+            if job.is_finished:
+                return
+            for name, value in fields.items():
+                if value is not None and hasattr(job, name):
+                    setattr(job, name, value)
+            job.status = _EVENT_STATUS[event_type]
+            job.updated_at = datetime.now().isoformat()
+        self._publish(event_type, job)
+
+    def _publish(self, event_type: JobEventType, job: Job) -> None:
+        self.bus.publish(JobEvent(type=event_type, job_id=job.job_id, job=job.to_dict(), seq=next(self._seq)))
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.is_finished]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.job_id]
+
+
+_default_registry: Optional[JobRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def GetJobRegistry() -> JobRegistry:
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                registry = JobRegistry()
+                # Sinks first: a job created through the published registry must reach them
+                _attach_default_sinks(registry)
+                _default_registry = registry
+    return _default_registry
+
+
+def _attach_default_sinks(registry: JobRegistry) -> None:
+    try:
+        from .resume_manager import GetResumeManager
+        GetResumeManager().attach(registry)
+    except Exception as e:
+        print(f"Could not attach download persistence: {e}")
+    try:
+        from .notifications import GetNotifier
+        GetNotifier().attach(registry)
+    except Exception:
+        pass
@@ -1,7 +1,90 @@
 import subprocess
 import shutil
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+
+
+# Download metadata keys -> container tag names
+METADATA_TAGS = {
+    'title': 'title',
+    'site': 'artist',
+    'url': 'comment',
+    'album': 'album',
+    'genre': 'genre',
+    'date': 'date',
+}
+
+
+def MapMetadataTags(metadata: Optional[Dict[str, str]]) -> Dict[str, str]:
+    tags = {}
+    for key, tag in METADATA_TAGS.items():
+        value = (metadata or {}).get(key)
+        if value and tag not in tags:
+            tags[tag] = str(value)
+    return tags
+
+
+def DetectImageFormat(data: bytes) -> Optional[str]:
+    if data[:3] == b'\xff\xd8\xff':
+        return 'jpeg'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    return None
+
+
+@contextmanager
+def ResolvedThumbnail(source: Optional[str], work_path: Path):
+    # Remote thumbnails are fetched once so every muxer pass reads the same local file
+    if not source:
+        yield None
+        return
+
+    if not str(source).startswith(('http://', 'https://')):
+        path = Path(source)
+        yield path if path.exists() else None
+        return
+
+    path = None
+    try:
+        import requests
+        response = requests.get(source, timeout=15, headers={'User-Agent': 'Mozilla/5.0'})
+        response.raise_for_status()
+        ext = {'jpeg': '.jpg', 'png': '.png'}.get(DetectImageFormat(response.content), '.img')
+        path = Path(f"{work_path}.cover{ext}")
+        path.write_bytes(response.content)
+    except Exception as e:
+        print(f"⚠ Could not fetch thumbnail: {e}")
+        path = None
+
+    try:
+        yield path
+    finally:
+        if path and path.exists():
+            path.unlink()
+
+
+def BuildFFmpegMetadataArgs(
+    metadata: Optional[Dict[str, str]],
+    thumbnail: Optional[Path] = None
+) -> Tuple[List[str], List[str]]:
+    input_args = []
+    output_args = []
+
+    if thumbnail:
+        with open(thumbnail, 'rb') as f:
+            image_format = DetectImageFormat(f.read(16))
+        input_args = ['-i', str(thumbnail)]
+        output_args = [
+            '-map', '0:v:0', '-map', '0:a?', '-map', '1:v:0',
+            '-c:v:1', 'copy' if image_format else 'mjpeg',
+            '-disposition:v:1', 'attached_pic'
+        ]
+
+    for tag, value in MapMetadataTags(metadata).items():
+        output_args.extend(['-metadata', f'{tag}={value}'])
+
+    return input_args, output_args
 
 
 class MetadataEditor:
@@ -104,3 +187,44 @@ class MetadataEditor:
             if temp_output.exists():
                 temp_output.unlink()
             raise RuntimeError(f"FFmpeg thumbnail error: {e.stderr}")
+
+    def ApplyMetadata(
+        self,
+        video_path: str,
+        metadata: Dict[str, str],
+        output_path: Optional[str] = None
+    ) -> str:
+        input_path = Path(video_path)
+        if not input_path.exists():
+            raise FileNotFoundError(f"Video not found: {video_path}")
+
+        if not output_path:
+            temp_output = input_path.with_suffix(f".meta{input_path.suffix}")
+        else:
+            temp_output = Path(output_path)
+
+        with ResolvedThumbnail(metadata.get('thumbnail'), input_path) as thumbnail:
+            input_args, output_args = BuildFFmpegMetadataArgs(metadata, thumbnail)
+            cmd = [
+                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+                '-i', str(input_path),
+                *input_args,
+                '-map_metadata', '0',
+                '-c', 'copy',
+                *output_args,
+                '-movflags', '+faststart',
+                str(temp_output)
+            ]
+
+            try:
+                subprocess.run(cmd, check=True, capture_output=True, text=True)
+            except subprocess.CalledProcessError as e:
+                if temp_output.exists():
+                    temp_output.unlink()
+                raise RuntimeError(f"FFmpeg metadata error: {e.stderr}")
+
+        if not output_path:
+            shutil.move(str(temp_output), str(input_path))
+            return str(input_path)
+
+        return str(temp_output)
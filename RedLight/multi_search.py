@@ -1,12 +1,43 @@
+import asyncio
 import concurrent.futures
-from typing import List, Dict, Optional, Callable, Any
+import threading
+import time
+from typing import AsyncIterator, Iterator, List, Dict, Optional, Callable, Any, Tuple
 from .sites import SiteRegistry
+from .metrics import search_seconds
+from .result_merge import MergeResults
+
+
+class _RateLimiter:
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, cancelled: threading.Event) -> bool:
+        """Block until this caller's request slot; False if cancelled meanwhile"""
+        if not self.interval:
+            return not cancelled.is_set()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        return not cancelled.wait(slot - now)
 
 
 class MultiSiteSearch:
     
-    def __init__(self):
+    # Per-site budget for streaming searches; slower sites are reported as timed out
+    DEFAULT_DEADLINE = 10.0
+    
+    # Deep search defaults: pages in flight per site and requests per second per site
+    DEEP_CONCURRENCY = 2
+    DEEP_RATE_LIMIT = 2.0
+    
+    def __init__(self, use_cache: bool = True):
         self.registry = SiteRegistry()
+        self.use_cache = use_cache
     
     def search_all(
         self,
@@ -14,37 +45,243 @@ class MultiSiteSearch:
         page: int = 1,
         sort_by: str = "relevance",
         duration: Optional[str] = None,
-        on_site_complete: Optional[Callable[[str, int], None]] = None
+        on_site_complete: Optional[Callable[[str, int], None]] = None,
+        deadline: Optional[float] = None,
+        merge: bool = True
     ) -> List[Dict[str, Any]]:
-        all_searchers = self.registry.get_all_searchers()
         all_results = []
+        for site_result in self.search_iter(query, page, sort_by, duration, deadline=deadline):
+            all_results.extend(site_result["results"])
+            if on_site_complete:
+                on_site_complete(site_result["site"], len(site_result["results"]))
+        # merge=False keeps the raw per-site lists in completion order
+        return MergeResults(all_results) if merge else all_results
+    
+    def search_iter(
+        self,
+        query: str,
+        page: int = 1,
+        sort_by: str = "relevance",
+        duration: Optional[str] = None,
+        deadline: Optional[float] = None,
+        deadlines: Optional[Dict[str, float]] = None,
+        sites: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield {"site", "status", "results", "elapsed"} per site as each one finishes.
+        
+        status is "ok", "empty", "error" or "timeout"; a site that misses its
+        deadline is yielded once with no results and its late answer is dropped.
+        """
+        searchers = self.registry.get_all_searchers()
+        if sites:
+            wanted = {site.lower() for site in sites}
+            searchers = {name: searcher for name, searcher in searchers.items() if name in wanted}
+        if not searchers:
+            return
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(all_searchers)) as executor:
-            future_to_site = {
-                executor.submit(
-                    self._search_single_site,
-                    searcher,
-                    query,
-                    page,
-                    sort_by,
-                    duration
-                ): site_name
-                for site_name, searcher in all_searchers.items()
+        started = time.monotonic()
+        budgets = {
+            name: (deadlines or {}).get(name, deadline)
+            for name in searchers
+        }
+        
+        # Not used as a context manager: leaving the with-block would wait for
+        # the slowest site, which is exactly what a deadline is meant to avoid
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(searchers), thread_name_prefix="search")
+        try:
+            pending = {
+                executor.submit(self._search_single_site, searcher, query, page, sort_by, duration, True): name
+                for name, searcher in searchers.items()
             }
             
-            for future in concurrent.futures.as_completed(future_to_site):
-                site_name = future_to_site[future]
-                try:
-                    results = future.result()
-                    all_results.extend(results)
-                    
-                    if on_site_complete:
-                        on_site_complete(site_name, len(results))
-                except Exception:
-                    if on_site_complete:
-                        on_site_complete(site_name, 0)
+            while pending:
+                expiries = [started + budgets[name] for name in pending.values() if budgets[name] is not None]
+                timeout = max(0.0, min(expiries) - time.monotonic()) if expiries else None
+                done, _ = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                
+                for future in done:
+                    name = pending.pop(future)
+                    results, status = future.result()
+                    yield {"site": name, "status": status, "results": results, "elapsed": time.monotonic() - started}
+                
+                now = time.monotonic()
+                for future, name in list(pending.items()):
+                    if budgets[name] is not None and now >= started + budgets[name]:
+                        del pending[future]
+                        future.cancel()
+                        yield {"site": name, "status": "timeout", "results": [], "elapsed": now - started}
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def search_async(
+        self,
+        query: str,
+        page: int = 1,
+        sort_by: str = "relevance",
+        duration: Optional[str] = None,
+        deadline: Optional[float] = None,
+        deadlines: Optional[Dict[str, float]] = None,
+        sites: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        iterator = self.search_iter(query, page, sort_by, duration, deadline=deadline, deadlines=deadlines, sites=sites)
+        done = object()
+        try:
+            while True:
+                item = await loop.run_in_executor(None, next, iterator, done)
+                if item is done:
+                    break
+                yield item
+        finally:
+            iterator.close()
+    
+    def search_deep(
+        self,
+        query: str,
+        max_results: int = 200,
+        sort_by: str = "relevance",
+        duration: Optional[str] = None,
+        max_pages: int = 10,
+        concurrency: int = DEEP_CONCURRENCY,
+        concurrencies: Optional[Dict[str, int]] = None,
+        rate_limit: Optional[float] = DEEP_RATE_LIMIT,
+        rate_limits: Optional[Dict[str, float]] = None,
+        deadline: Optional[float] = None,
+        sites: Optional[List[str]] = None,
+        merge: bool = True
+    ) -> List[Dict[str, Any]]:
+        pages: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        for page_result in self.search_deep_iter(
+            query, max_results, sort_by, duration, max_pages=max_pages,
+            concurrency=concurrency, concurrencies=concurrencies,
+            rate_limit=rate_limit, rate_limits=rate_limits,
+            deadline=deadline, sites=sites, merge=merge
+        ):
+            pages[(page_result["site"], page_result["page"])] = page_result["results"]
+        return self.assemble_pages(pages, merge)[:max_results]
+    
+    def search_deep_iter(
+        self,
+        query: str,
+        max_results: int = 200,
+        sort_by: str = "relevance",
+        duration: Optional[str] = None,
+        max_pages: int = 10,
+        concurrency: int = DEEP_CONCURRENCY,
+        concurrencies: Optional[Dict[str, int]] = None,
+        rate_limit: Optional[float] = DEEP_RATE_LIMIT,
+        rate_limits: Optional[Dict[str, float]] = None,
+        deadline: Optional[float] = None,
+        sites: Optional[List[str]] = None,
+        merge: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Fetch pages 1..max_pages of every site concurrently, yielding
+        {"site", "page", "status", "results", "new", "elapsed"} per page.
+        
+        Each site has at most `concurrency` pages in flight and starts at most
+        `rate_limit` requests per second (per-site overrides in concurrencies
+        and rate_limits). A site stops at its first empty page or a page with
+        nothing new. Everything stops once max_results unique results are in
+        (after cross-site merging when merge is set) or the deadline passes;
+        queued pages are then cancelled and late answers dropped.
+        """
+        searchers = self.registry.get_all_searchers()
+        if sites:
+            wanted = {site.lower() for site in sites}
+            searchers = {name: searcher for name, searcher in searchers.items() if name in wanted}
+        if not searchers or max_results <= 0:
+            return
+        
+        limits = {name: max(1, int((concurrencies or {}).get(name, concurrency))) for name in searchers}
+        limiters = {name: _RateLimiter((rate_limits or {}).get(name, rate_limit)) for name in searchers}
+        next_page = {name: 1 for name in searchers}
+        running = {name: 0 for name in searchers}
+        finished = set()
         
-        return all_results
+        pages: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        seen_urls = set()
+        target = max_results
+        cancelled = threading.Event()
+        started = time.monotonic()
+        
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=sum(limits.values()), thread_name_prefix="deep-search")
+        pending: Dict[concurrent.futures.Future, Tuple[str, int]] = {}
+        try:
+            while True:
+                for name, searcher in searchers.items():
+                    while name not in finished and running[name] < limits[name] and next_page[name] <= max_pages:
+                        future = executor.submit(
+                            self._fetch_deep_page, searcher, limiters[name], cancelled,
+                            query, next_page[name], sort_by, duration
+                        )
+                        pending[future] = (name, next_page[name])
+                        next_page[name] += 1
+                        running[name] += 1
+                if not pending:
+                    return
+                
+                timeout = None if deadline is None else max(0.0, started + deadline - time.monotonic())
+                done, _ = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    return
+                
+                for future in done:
+                    name, page = pending.pop(future)
+                    running[name] -= 1
+                    results, status = future.result()
+                    new = 0
+                    for result in results:
+                        url = result.get("url")
+                        if url and url not in seen_urls:
+                            seen_urls.add(url)
+                            new += 1
+                    # Past the last page, or a site that keeps serving its last page again
+                    if not new:
+                        finished.add(name)
+                    pages[(name, page)] = results
+                    yield {
+                        "site": name,
+                        "page": page,
+                        "status": status,
+                        "results": results,
+                        "new": new,
+                        "elapsed": time.monotonic() - started
+                    }
+                
+                if len(seen_urls) >= target:
+                    if not merge:
+                        return
+                    # Mirrors collapse when merged, so check the real count before stopping
+                    merged = len(self.assemble_pages(pages, True))
+                    if merged >= max_results:
+                        return
+                    target = len(seen_urls) + max_results - merged
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _fetch_deep_page(self, searcher, limiter: _RateLimiter, cancelled: threading.Event,
+                         query: str, page: int, sort_by: str, duration: Optional[str]):
+        if not limiter.wait(cancelled):
+            return [], "cancelled"
+        return self._search_single_site(searcher, query, page, sort_by, duration, True)
+    
+    @staticmethod
+    def assemble_pages(pages: Dict[Tuple[str, int], List[Dict[str, Any]]], merge: bool) -> List[Dict[str, Any]]:
+        # Each site's results in page order, whatever order the pages finished in
+        ordered = [result for key in sorted(pages) for result in pages[key]]
+        if merge:
+            return MergeResults(ordered)
+        seen = set()
+        unique = []
+        for result in ordered:
+            url = result.get("url")
+            if url not in seen:
+                seen.add(url)
+                unique.append(result)
+        return unique
     
     def _search_single_site(
         self,
@@ -52,22 +289,31 @@ class MultiSiteSearch:
         query: str,
         page: int,
         sort_by: str,
-        duration: Optional[str]
-    ) -> List[Dict[str, Any]]:
+        duration: Optional[str],
+        with_status: bool = False
+    ):
 
+        started = time.perf_counter()
+        outcome = "error"
         try:
             site_sort = sort_by
             if sort_by == "views" and "mostviewed" in searcher.get_search_filters().get("sort_by", []):
                 site_sort = "mostviewed"
             
-            return searcher.search(
+            search = searcher.cached_search if self.use_cache else searcher.search
+            results = search(
                 query=query,
                 page=page,
                 sort_by=site_sort,
                 duration=duration
             )
+            # Site searchers swallow their own errors and return [], so empty is worth telling apart
+            outcome = "ok" if results else "empty"
+            return (results, outcome) if with_status else results
         except Exception:
-            return []
+            return ([], outcome) if with_status else []
+        finally:
+            search_seconds.observe(time.perf_counter() - started, site=searcher.get_site_name(), outcome=outcome)
     
     def get_supported_sites(self) -> List[str]:
 
@@ -104,6 +104,32 @@ class NotificationManager:
             notif_type = "success"
         self._send_notification(header, msg, notif_type)
     
+    def attach(self, registry) -> None:
+        from .jobs import JobEventType
+        
+        def on_event(event):
+            try:
+                from .config import GetConfig
+                settings = GetConfig().notifications
+            except Exception:
+                settings = None
+            if settings is not None and not settings.enabled:
+                return
+            
+            job = event.job
+            if job.get("from_history"):
+                return
+            title = job.get("title") or job.get("url", "")
+            if event.type == JobEventType.DONE:
+                if settings is None or settings.on_complete:
+                    path = job.get("result") or job.get("output_path") or ""
+                    self.notify_download_complete(title, Path(path).name, path, quality=str(job.get("quality", "")))
+            elif event.type == JobEventType.FAILED:
+                if settings is None or settings.on_error:
+                    self.notify_download_failed(title, job.get("error", ""))
+        
+        registry.subscribe(on_event, event_types=(JobEventType.DONE, JobEventType.FAILED))
+    
     def notify_custom(self, title: str, message: str, notif_type: str = "info"):
         if not self.config.enabled:
             return
@@ -0,0 +1,197 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .segment_bitmap import SegmentBitmap
+
+
+# Set by the job pipeline around a download so the HLS engine can publish
+# its segments under the job id without changing every site's call chain
+_current_job: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("redlight_job_id", default=None)
+
+
+@contextmanager
+def BindJob(job_id: str):
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+def CurrentJob() -> Optional[str]:
+    return _current_job.get()
+
+
+class LiveStream:
+
+    def __init__(self, job_id: str, segment_dir: Path, durations: List[float], segment_name: str = "segment_{:04d}.ts"):
+        self.job_id = job_id
+        self.segment_dir = Path(segment_dir)
+        self.durations = list(durations)
+        self.segment_name = segment_name
+        self.completed = SegmentBitmap(len(durations))
+        self.failed = SegmentBitmap()
+        self.merged_path: Optional[Path] = None
+        self.cancelled = False
+        self._claimed = SegmentBitmap(len(durations))
+        self._playhead = 0
+        self._cond = threading.Condition()
+
+    @property
+    def total(self) -> int:
+        return len(self.durations)
+
+    @property
+    def target_duration(self) -> int:
+        return max(1, int(max(self.durations, default=10) + 0.999))
+
+    @property
+    def is_complete(self) -> bool:
+        with self._cond:
+            return self.completed.count + self.failed.count >= self.total
+
+    def claim_next(self) -> Optional[int]:
+        # Playback order from the playhead first, then whatever is left before it.
+        # Every worker keeps pulling, so throughput is the same as a plain pool;
+        # only the order changes, which is what lets playback start early
+        with self._cond:
+            if self.cancelled:
+                return None
+            index = self._claimed.first_missing(self._playhead, self.total)
+            if index is None:
+                index = self._claimed.first_missing(0, self._playhead)
+            if index is None:
+                return None
+            self._claimed.add(index)
+            return index
+
+    def seek(self, index: int) -> None:
+        with self._cond:
+            self._playhead = max(0, min(index, self.total))
+
+    def mark_done(self, index: int) -> None:
+        with self._cond:
+            self.completed.add(index)
+            self._cond.notify_all()
+
+    def completed_segments(self) -> SegmentBitmap:
+        with self._cond:
+            return self.completed.copy()
+
+    def mark_failed(self, index: int) -> None:
+        with self._cond:
+            self.failed.add(index)
+            self._cond.notify_all()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self.cancelled = True
+            self._cond.notify_all()
+
+    def set_merged(self, path: Path) -> None:
+        with self._cond:
+            self.merged_path = Path(path)
+            self._cond.notify_all()
+
+    def segment_path(self, index: int) -> Path:
+        return self.segment_dir / self.segment_name.format(index)
+
+    def wait_for(self, index: int, timeout: float = 30.0) -> Optional[Path]:
+        """Block until segment index is on disk; None if it failed, was cancelled or timed out"""
+        with self._cond:
+            if index not in self.completed and index not in self.failed:
+                # A player asking for a segment we do not have yet moves the playhead there
+                self._playhead = max(0, min(index, self.total))
+            self._cond.wait_for(
+                lambda: index in self.completed or index in self.failed or self.cancelled,
+                timeout=timeout
+            )
+            if index in self.completed:
+                return self.segment_path(index)
+        return None
+
+    def prefix(self) -> List[Tuple[int, Path, int]]:
+        # (index, path, size) for the contiguous run of finished segments from 0
+        with self._cond:
+            count = min(self.completed.contiguous_prefix(), self.total)
+        entries = []
+        for index in range(count):
+            path = self.segment_path(index)
+            try:
+                entries.append((index, path, path.stat().st_size))
+            except OSError:
+                break
+        return entries
+
+    def follow(self, timeout: float = 60.0) -> Iterator[Path]:
+        # Yields segments in order as they land, skipping ones that failed for good
+        for index in range(self.total):
+            path = self.wait_for(index, timeout=timeout)
+            if path is None:
+                if index in self.failed:
+                    continue
+                return
+            yield path
+
+    def playlist(self, segment_url: str) -> str:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:VOD",
+        ]
+        # Every segment is listed up front so players can seek; a request for one
+        # that is not downloaded yet waits for it and pulls it to the front
+        for index, duration in enumerate(self.durations):
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(segment_url.format(index=index))
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def status(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                "job_id": self.job_id,
+                "segments": self.total,
+                "completed": self.completed.count,
+                "failed": self.failed.count,
+                "contiguous": min(self.completed.contiguous_prefix(), self.total),
+                "playable_seconds": sum(self.durations[:min(self.completed.contiguous_prefix(), self.total)]),
+                "merged": self.merged_path is not None,
+            }
+
+
+class PlaybackRegistry:
+
+    def __init__(self):
+        self._streams: Dict[str, LiveStream] = {}
+        self._lock = threading.Lock()
+
+    def register(self, stream: LiveStream) -> None:
+        with self._lock:
+            self._streams[stream.job_id] = stream
+
+    def unregister(self, job_id: str) -> None:
+        with self._lock:
+            self._streams.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[LiveStream]:
+        with self._lock:
+            return self._streams.get(job_id)
+
+
+_default_playback: Optional[PlaybackRegistry] = None
+_default_playback_lock = threading.Lock()
+
+
+def GetPlaybackRegistry() -> PlaybackRegistry:
+    global _default_playback
+    if _default_playback is None:
+        with _default_playback_lock:
+            if _default_playback is None:
+                _default_playback = PlaybackRegistry()
+    return _default_playback
@@ -1,9 +1,10 @@
 import requests
-from bs4 import BeautifulSoup
 from typing import List, Optional
 import re
 from urllib.parse import urljoin
 
+from .html_parser import ParseHTML
+
 
 class PlaylistDownloader:
     
@@ -48,14 +49,14 @@ class PlaylistDownloader:
                     break
                 
                 response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = ParseHTML(response.text, parse_only=('div', 'mb'))
                 
                 found_on_page = 0
                 
-                for item in soup.find_all('div', class_='mb'):
-                    link = item.find('a', href=True)
+                for item in soup.select('div.mb'):
+                    link = item.select_one('a[href]')
                     if link:
-                        href = link['href']
+                        href = link.get('href')
                         if '/video-' in href or '/video/' in href:
                             full_url = urljoin("https://www.eporner.com", href)
                             if full_url not in videos:
@@ -101,7 +102,7 @@ class PlaylistDownloader:
                     break
                 
                 response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = ParseHTML(response.text)
                 
                 found_on_page = 0
                 
@@ -156,13 +157,13 @@ class PlaylistDownloader:
                     break
                 
                 response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = ParseHTML(response.text)
                 
                 found_on_page = 0
                 
-                for item in soup.find_all('div', class_='thumb-block'):
-                    for link in item.find_all('a', href=True):
-                        href = link['href']
+                for item in soup.select('div.thumb-block'):
+                    for link in item.select('a[href]'):
+                        href = link.get('href')
                         if '/video.' in href or '/video/' in href:
                             full_url = urljoin("https://www.xvideos.com", href)
                             full_url = re.sub(r'/\d+/', '/', full_url)
@@ -176,9 +177,9 @@ class PlaylistDownloader:
                         break
                 
                 if found_on_page == 0:
-                    for item in soup.find_all('div', class_='post-block'):
-                        for link in item.find_all('a', href=True):
-                            href = link['href']
+                    for item in soup.select('div.post-block'):
+                        for link in item.select('a[href]'):
+                            href = link.get('href')
                             if '/video.' in href or '/video/' in href:
                                 full_url = urljoin("https://www.xvideos.com", href)
                                 full_url = re.sub(r'/\d+/', '/', full_url)
@@ -235,14 +236,14 @@ class PlaylistDownloader:
                     break
                 
                 response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = ParseHTML(response.text, parse_only=('div', 'video-item'))
                 
                 found_on_page = 0
                 
-                for item in soup.find_all('div', class_='video-item'):
-                    link = item.find('a', href=True)
+                for item in soup.select('div.video-item'):
+                    link = item.select_one('a[href]')
                     if link:
-                        href = link['href']
+                        href = link.get('href')
                         if href and not href.startswith('#'):
                             full_url = urljoin("https://spankbang.com", href)
                             if '/video/' in full_url or re.match(r'.*/[\w]+/video/', full_url):
@@ -0,0 +1,71 @@
+import concurrent.futures
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class Prefetcher:
+    """Runs speculative work (next result page, video info) in the background.
+
+    At most max_workers jobs run and max_pending are held at once; anything
+    beyond that is dropped, since a prefetch is only ever a shortcut.
+    cancel_all() drops queued jobs and makes ones that have not started yet
+    return without running. Jobs already running finish, which only warms
+    the caches they write to.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8):
+        self.max_pending = max(1, int(max_pending))
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, int(max_workers)),
+            thread_name_prefix="prefetch"
+        )
+        self._futures: Dict[Hashable, concurrent.futures.Future] = {}
+        self._generation = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, fn: Callable[[], Any]) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            existing = self._futures.get(key)
+            if existing is not None and not existing.done():
+                return False
+            self._futures = {k: f for k, f in self._futures.items() if not f.done()}
+            if len(self._futures) >= self.max_pending:
+                return False
+            self._futures[key] = self._executor.submit(self._run, self._generation, fn)
+            return True
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            self._generation += 1
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for future in self._futures.values() if not future.done())
+
+    def close(self) -> None:
+        self.cancel_all()
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> "Prefetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _run(self, generation: int, fn: Callable[[], Any]) -> Any:
+        # Queued before a cancel_all() that could not reach it in time
+        if generation != self._generation:
+            return None
+        try:
+            return fn()
+        except Exception:
+            return None
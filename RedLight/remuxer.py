@@ -0,0 +1,703 @@
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .metadata import DetectImageFormat, MapMetadataTags
+from .ts_validator import NUMPY_AVAILABLE, TS_PACKET_SIZE, TS_SYNC_BYTE, parse_packet_headers
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+STREAM_TYPE_H264 = 0x1B
+STREAM_TYPE_AAC_ADTS = 0x0F
+
+VIDEO_TIMESCALE = 90000
+MOVIE_TIMESCALE = 1000
+AAC_FRAME_SAMPLES = 1024
+
+AAC_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350]
+
+SAMPLE_FLAGS_SYNC = 0x02000000
+SAMPLE_FLAGS_NON_SYNC = 0x01010000
+
+ILST_ATOMS = {
+    'title': b'\xa9nam',
+    'artist': b'\xa9ART',
+    'comment': b'\xa9cmt',
+    'album': b'\xa9alb',
+    'genre': b'\xa9gen',
+    'date': b'\xa9day',
+}
+
+_MATRIX = struct.pack('>9I', 0x00010000, 0, 0, 0, 0x00010000, 0, 0, 0, 0x40000000)
+
+
+class RemuxError(RuntimeError):
+    pass
+
+
+def _box(kind: bytes, *parts: bytes) -> bytes:
+    payload = b''.join(parts)
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def _full_box(kind: bytes, version: int, flags: int, *parts: bytes) -> bytes:
+    return _box(kind, struct.pack('>I', (version << 24) | flags), *parts)
+
+
+def _descriptor(tag: int, payload: bytes) -> bytes:
+    return bytes([tag, len(payload)]) + payload
+
+
+class _BitReader:
+
+    def __init__(self, data: bytes):
+        self.value = int.from_bytes(data, 'big')
+        self.size = len(data) * 8
+        self.pos = 0
+
+    def bits(self, count: int) -> int:
+        if self.pos + count > self.size:
+            raise RemuxError("SPS truncated")
+        self.pos += count
+        return (self.value >> (self.size - self.pos)) & ((1 << count) - 1)
+
+    def ue(self) -> int:
+        zeros = 0
+        while self.bits(1) == 0:
+            zeros += 1
+        return (1 << zeros) - 1 + self.bits(zeros)
+
+    def se(self) -> int:
+        value = self.ue()
+        return (value + 1) // 2 if value & 1 else -(value // 2)
+
+
+def _unescape_rbsp(nal: bytes) -> bytes:
+    return nal.replace(b'\x00\x00\x03', b'\x00\x00')
+
+
+def _parse_sps(sps: bytes) -> Dict[str, int]:
+    r = _BitReader(_unescape_rbsp(sps[1:]))
+    info = {"profile": r.bits(8), "compat": r.bits(8), "level": r.bits(8)}
+    r.ue()
+
+    chroma_format_idc = 1
+    info["bit_depth_luma"] = info["bit_depth_chroma"] = 8
+    if info["profile"] in (100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135):
+        chroma_format_idc = r.ue()
+        if chroma_format_idc == 3:
+            r.bits(1)
+        info["bit_depth_luma"] = r.ue() + 8
+        info["bit_depth_chroma"] = r.ue() + 8
+        r.bits(1)
+        if r.bits(1):
+            for i in range(12 if chroma_format_idc == 3 else 8):
+                if r.bits(1):
+                    last, nxt = 8, 8
+                    for _ in range(16 if i < 6 else 64):
+                        if nxt != 0:
+                            nxt = (last + r.se() + 256) % 256
+                        last = last if nxt == 0 else nxt
+    info["chroma_format"] = chroma_format_idc
+
+    r.ue()
+    poc_type = r.ue()
+    if poc_type == 0:
+        r.ue()
+    elif poc_type == 1:
+        r.bits(1)
+        r.se()
+        r.se()
+        for _ in range(r.ue()):
+            r.se()
+    r.ue()
+    r.bits(1)
+
+    width = (r.ue() + 1) * 16
+    height_in_map_units = r.ue() + 1
+    frame_mbs_only = r.bits(1)
+    height = height_in_map_units * 16 * (2 - frame_mbs_only)
+    if not frame_mbs_only:
+        r.bits(1)
+    r.bits(1)
+
+    if r.bits(1):
+        left, right, top, bottom = r.ue(), r.ue(), r.ue(), r.ue()
+        sub_width = 2 if chroma_format_idc in (1, 2) else 1
+        sub_height = 2 if chroma_format_idc == 1 else 1
+        width -= (left + right) * sub_width
+        height -= (top + bottom) * sub_height * (2 - frame_mbs_only)
+
+    info["width"] = width
+    info["height"] = height
+    return info
+
+
+def _split_nals(data: bytes) -> List[bytes]:
+    nals = []
+    start = data.find(b'\x00\x00\x01')
+    while start >= 0:
+        start += 3
+        end = data.find(b'\x00\x00\x01', start)
+        nal = data[start:end if end >= 0 else len(data)].rstrip(b'\x00')
+        if nal:
+            nals.append(nal)
+        start = end
+    return nals
+
+
+def _parse_timestamp(b: bytes) -> int:
+    return (((b[0] >> 1) & 0x07) << 30) | (b[1] << 22) | ((b[2] >> 1) << 15) | (b[3] << 7) | (b[4] >> 1)
+
+
+def _parse_pes(pes: bytes) -> Tuple[Optional[int], Optional[int], bytes]:
+    if len(pes) < 9 or pes[:3] != b'\x00\x00\x01':
+        return None, None, b''
+    flags = pes[7]
+    header_end = 9 + pes[8]
+    pts = _parse_timestamp(pes[9:14]) if flags & 0x80 and len(pes) >= 14 else None
+    dts = _parse_timestamp(pes[14:19]) if flags & 0x40 and len(pes) >= 19 else pts
+    return pts, dts, pes[header_end:]
+
+
+class _Unwrapper:
+    # PTS/DTS are 33-bit counters that wrap roughly every 26.5 hours
+
+    def __init__(self):
+        self.last = None
+        self.offset = 0
+
+    def __call__(self, value: int) -> int:
+        value += self.offset
+        if self.last is not None and value < self.last - (1 << 32):
+            self.offset += 1 << 33
+            value += 1 << 33
+        self.last = value
+        return value
+
+
+class _VideoTrack:
+
+    def __init__(self):
+        self.track_id = 0
+        self.sps: Optional[bytes] = None
+        self.pps: Optional[bytes] = None
+        self.info: Dict[str, int] = {}
+        self.started = False
+        self.pending: List[Tuple[int, int, bytes, bool]] = []
+        self.pending_bytes = 0
+        self.last_duration = VIDEO_TIMESCALE // 30
+        self.end_time = 0
+        self.unwrap = _Unwrapper()
+
+    @property
+    def ready(self) -> bool:
+        return self.sps is not None and self.pps is not None and bool(self.pending)
+
+    def sample_entry(self) -> bytes:
+        info = self.info
+        avcc = bytes([1, info["profile"], info["compat"], info["level"], 0xFF, 0xE1])
+        avcc += struct.pack('>H', len(self.sps)) + self.sps
+        avcc += bytes([1]) + struct.pack('>H', len(self.pps)) + self.pps
+        if info["profile"] in (100, 110, 122, 144):
+            avcc += bytes([
+                0xFC | info["chroma_format"],
+                0xF8 | (info["bit_depth_luma"] - 8),
+                0xF8 | (info["bit_depth_chroma"] - 8),
+                0
+            ])
+        return _box(
+            b'avc1',
+            bytes(6), struct.pack('>H', 1),
+            bytes(16),
+            struct.pack('>HHIIIH', info["width"], info["height"], 0x00480000, 0x00480000, 0, 1),
+            bytes(32),
+            struct.pack('>Hh', 0x0018, -1),
+            _box(b'avcC', avcc)
+        )
+
+
+class _AudioTrack:
+
+    def __init__(self):
+        self.track_id = 0
+        self.config: Optional[bytes] = None
+        self.sample_rate = 0
+        self.channels = 0
+        self.first_pts: Optional[int] = None
+        self.start_samples = 0
+        self.frames_written = 0
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.remainder = b''
+        self.unwrap = _Unwrapper()
+
+    @property
+    def ready(self) -> bool:
+        return self.config is not None and self.first_pts is not None
+
+    def sample_entry(self) -> bytes:
+        decoder_config = _descriptor(
+            0x04,
+            bytes([0x40, 0x15]) + bytes(3) + struct.pack('>II', 0, 0) + _descriptor(0x05, self.config)
+        )
+        es = _descriptor(0x03, struct.pack('>HB', 0, 0) + decoder_config + _descriptor(0x06, b'\x02'))
+        return _box(
+            b'mp4a',
+            bytes(6), struct.pack('>H', 1),
+            bytes(8),
+            struct.pack('>HHHH', self.channels, 16, 0, 0),
+            struct.pack('>I', self.sample_rate << 16),
+            _full_box(b'esds', 0, 0, es)
+        )
+
+
+class TsToMp4Remuxer:
+
+    CHUNK_PACKETS = 4096
+
+    def __init__(self, fragment_bytes_limit: int = 16 * 1024 * 1024):
+        self.fragment_bytes_limit = fragment_bytes_limit
+
+    def remux(self, input_file, output_file=None, metadata: Optional[Dict[str, str]] = None) -> str:
+        input_path = Path(input_file)
+        output_path = Path(output_file) if output_file else input_path.with_suffix('.mp4')
+
+        self._reset()
+        self._metadata = metadata or {}
+        try:
+            with open(input_path, 'rb') as src, open(output_path, 'wb') as out:
+                self._out = out
+                self._read_stream(src)
+                self._finish()
+        except Exception:
+            if output_path.exists():
+                output_path.unlink()
+            raise
+
+        return str(output_path)
+
+    def _reset(self):
+        self._out = None
+        self._pmt_pid: Optional[int] = None
+        self._video_pid: Optional[int] = None
+        self._audio_pid: Optional[int] = None
+        self._pes: Dict[int, List[bytes]] = {}
+        self._video = _VideoTrack()
+        self._audio = _AudioTrack()
+        self._tracks: List[object] = []
+        self._origin: Optional[int] = None
+        self._sequence = 0
+        self._mehd_offset: Optional[int] = None
+
+    def _read_stream(self, src):
+        head = src.read(TS_PACKET_SIZE * 2)
+        start = head.find(bytes([TS_SYNC_BYTE]))
+        if start < 0 or (len(head) > start + TS_PACKET_SIZE and head[start + TS_PACKET_SIZE] != TS_SYNC_BYTE):
+            raise RemuxError("Input is not an MPEG-TS stream")
+        src.seek(start)
+
+        chunk_size = TS_PACKET_SIZE * self.CHUNK_PACKETS
+        while True:
+            chunk = src.read(chunk_size)
+            if len(chunk) < TS_PACKET_SIZE:
+                break
+            if NUMPY_AVAILABLE:
+                self._demux_numpy(chunk)
+            else:
+                self._demux_python(chunk)
+
+        for pid, parts in list(self._pes.items()):
+            if parts:
+                self._on_pes(pid, b''.join(parts))
+        self._pes.clear()
+
+    def _demux_numpy(self, chunk: bytes):
+        count = len(chunk) // TS_PACKET_SIZE
+        packets = np.frombuffer(chunk, dtype=np.uint8, count=count * TS_PACKET_SIZE).reshape(count, TS_PACKET_SIZE)
+        headers = parse_packet_headers(packets)
+        usable = (packets[:, 0] == TS_SYNC_BYTE) & headers["has_payload"] & (headers["payload_offset"] < TS_PACKET_SIZE)
+
+        # PSI first so that streams announced in this chunk are picked up below
+        for attr in (None, '_pmt_pid', '_video_pid', '_audio_pid'):
+            pid = getattr(self, attr) if attr else 0
+            if pid is None:
+                continue
+            rows = np.flatnonzero(usable & (headers["pid"] == pid))
+            if not rows.size:
+                continue
+            pusi = headers["pusi"][rows]
+            offsets = headers["payload_offset"][rows]
+            bounds = [0] + [int(i) for i in np.flatnonzero(pusi) if i > 0] + [rows.size]
+
+            # Each run is one PES (or the tail of one), gathered in a single copy
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                run_offsets = offsets[a:b]
+                if (run_offsets == 4).all():
+                    data = packets[rows[a:b], 4:].tobytes()
+                else:
+                    data = b''.join(packets[r, o:].tobytes() for r, o in zip(rows[a:b], run_offsets))
+                self._feed(pid, bool(pusi[a]), data)
+
+    def _demux_python(self, chunk: bytes):
+        for offset in range(0, len(chunk) - TS_PACKET_SIZE + 1, TS_PACKET_SIZE):
+            if chunk[offset] != TS_SYNC_BYTE:
+                continue
+            b1 = chunk[offset + 1]
+            pid = ((b1 & 0x1F) << 8) | chunk[offset + 2]
+            if pid not in (0, self._pmt_pid, self._video_pid, self._audio_pid):
+                continue
+            afc = (chunk[offset + 3] >> 4) & 0x3
+            if not afc & 0x1:
+                continue
+            start = 4 + (chunk[offset + 4] + 1 if afc & 0x2 else 0)
+            if start >= TS_PACKET_SIZE:
+                continue
+            self._feed(pid, bool(b1 & 0x40), chunk[offset + start:offset + TS_PACKET_SIZE])
+
+    def _feed(self, pid: int, pusi: bool, data: bytes):
+        if pid == 0:
+            if pusi:
+                self._parse_pat(data)
+            return
+        if pid == self._pmt_pid:
+            if pusi:
+                self._parse_pmt(data)
+            return
+
+        parts = self._pes.get(pid)
+        if pusi:
+            if parts:
+                self._on_pes(pid, b''.join(parts))
+            self._pes[pid] = [data]
+        elif parts is not None:
+            parts.append(data)
+
+    def _psi_section(self, data: bytes) -> bytes:
+        start = 1 + data[0]
+        section = data[start:]
+        length = ((section[1] & 0x0F) << 8) | section[2]
+        return section[:3 + length - 4]
+
+    def _parse_pat(self, data: bytes):
+        if self._pmt_pid is not None:
+            return
+        section = self._psi_section(data)
+        for pos in range(8, len(section) - 3, 4):
+            program = struct.unpack('>H', section[pos:pos + 2])[0]
+            if program != 0:
+                self._pmt_pid = ((section[pos + 2] & 0x1F) << 8) | section[pos + 3]
+                return
+
+    def _parse_pmt(self, data: bytes):
+        if self._video_pid is not None or self._audio_pid is not None:
+            return
+        section = self._psi_section(data)
+        pos = 12 + (((section[10] & 0x0F) << 8) | section[11])
+        unsupported = []
+        while pos + 5 <= len(section):
+            stream_type = section[pos]
+            pid = ((section[pos + 1] & 0x1F) << 8) | section[pos + 2]
+            info_length = ((section[pos + 3] & 0x0F) << 8) | section[pos + 4]
+            if stream_type == STREAM_TYPE_H264 and self._video_pid is None:
+                self._video_pid = pid
+            elif stream_type == STREAM_TYPE_AAC_ADTS and self._audio_pid is None:
+                self._audio_pid = pid
+            else:
+                unsupported.append(stream_type)
+            pos += 5 + info_length
+
+        if self._video_pid is None and self._audio_pid is None:
+            types = ", ".join(f"0x{t:02x}" for t in unsupported) or "none"
+            raise RemuxError(f"No H.264/AAC streams found (stream types: {types})")
+
+    def _on_pes(self, pid: int, pes: bytes):
+        if pid == self._video_pid:
+            self._on_video_pes(pes)
+        elif pid == self._audio_pid:
+            self._on_audio_pes(pes)
+
+    def _on_video_pes(self, pes: bytes):
+        video = self._video
+        pts, dts, payload = _parse_pes(pes)
+        if pts is None:
+            return
+
+        parts = []
+        keyframe = False
+        for nal in _split_nals(payload):
+            nal_type = nal[0] & 0x1F
+            if nal_type == 9:
+                continue
+            if nal_type == 7 and video.sps is None:
+                video.sps = nal
+                video.info = _parse_sps(nal)
+            elif nal_type == 8 and video.pps is None:
+                video.pps = nal
+            elif nal_type == 5:
+                keyframe = True
+            parts.append(struct.pack('>I', len(nal)))
+            parts.append(nal)
+
+        if not parts:
+            return
+        if not video.started:
+            if not keyframe:
+                return
+            video.started = True
+
+        dts = video.unwrap(dts)
+        pts = dts + ((pts - dts + (1 << 32)) % (1 << 33)) - (1 << 32)
+        data = b''.join(parts)
+        video.pending.append((dts, pts, data, keyframe))
+        video.pending_bytes += len(data)
+
+        if (keyframe and len(video.pending) > 1) or video.pending_bytes >= self.fragment_bytes_limit:
+            self._flush()
+
+    def _on_audio_pes(self, pes: bytes):
+        audio = self._audio
+        pts, _, payload = _parse_pes(pes)
+        data = audio.remainder + payload
+        if audio.first_pts is None:
+            if pts is None:
+                return
+            audio.first_pts = audio.unwrap(pts)
+
+        pos = 0
+        while pos + 7 <= len(data):
+            if data[pos] != 0xFF or data[pos + 1] & 0xF0 != 0xF0:
+                pos = data.find(b'\xff', pos + 1)
+                if pos < 0:
+                    pos = len(data)
+                continue
+            header_length = 7 if data[pos + 1] & 0x01 else 9
+            frame_length = ((data[pos + 3] & 0x03) << 11) | (data[pos + 4] << 3) | (data[pos + 5] >> 5)
+            if frame_length <= header_length:
+                pos += 1
+                continue
+            if pos + frame_length > len(data):
+                break
+
+            if audio.config is None:
+                object_type = ((data[pos + 2] >> 6) & 0x03) + 1
+                rate_index = (data[pos + 2] >> 2) & 0x0F
+                channels = ((data[pos + 2] & 0x01) << 2) | (data[pos + 3] >> 6)
+                if rate_index >= len(AAC_SAMPLE_RATES):
+                    raise RemuxError(f"Unsupported AAC sampling frequency index {rate_index}")
+                audio.sample_rate = AAC_SAMPLE_RATES[rate_index]
+                audio.channels = channels
+                audio.config = bytes([
+                    (object_type << 3) | (rate_index >> 1),
+                    ((rate_index & 0x01) << 7) | (channels << 3)
+                ])
+
+            frame = data[pos + header_length:pos + frame_length]
+            audio.pending.append(frame)
+            audio.pending_bytes += len(frame)
+            pos += frame_length
+
+        audio.remainder = data[pos:]
+
+        if self._video_pid is None and len(audio.pending) >= 256:
+            self._flush()
+
+    def _write_header(self):
+        video, audio = self._video, self._audio
+        if self._video_pid is not None and video.ready:
+            self._tracks.append(video)
+        if self._audio_pid is not None and audio.ready:
+            self._tracks.append(audio)
+        if not self._tracks:
+            raise RemuxError("No decodable H.264/AAC samples found")
+
+        for track_id, track in enumerate(self._tracks, 1):
+            track.track_id = track_id
+
+        starts = []
+        if video in self._tracks:
+            starts.append(video.pending[0][0])
+        if audio in self._tracks:
+            starts.append(audio.first_pts)
+        self._origin = min(starts)
+        if audio in self._tracks:
+            audio.start_samples = round((audio.first_pts - self._origin) * audio.sample_rate / VIDEO_TIMESCALE)
+
+        header = _box(b'ftyp', b'isom', struct.pack('>I', 0x200), b'isom', b'iso6', b'iso2', b'avc1', b'mp41')
+        moov = self._build_moov()
+        self._mehd_offset = len(header) + moov.index(b'mehd') + 8
+        self._out.write(header + moov)
+
+    def _build_moov(self) -> bytes:
+        mvhd = _full_box(
+            b'mvhd', 0, 0,
+            struct.pack('>IIIIIH', 0, 0, MOVIE_TIMESCALE, 0, 0x00010000, 0x0100),
+            bytes(10), _MATRIX, bytes(24),
+            struct.pack('>I', len(self._tracks) + 1)
+        )
+        traks = [self._build_trak(track) for track in self._tracks]
+        mvex = _box(
+            b'mvex',
+            _full_box(b'mehd', 1, 0, struct.pack('>Q', 0)),
+            *[_full_box(b'trex', 0, 0, struct.pack('>IIIII', t.track_id, 1, 0, 0, 0)) for t in self._tracks]
+        )
+        udta = self._build_udta()
+        return _box(b'moov', mvhd, *traks, mvex, *([udta] if udta else []))
+
+    def _build_udta(self) -> Optional[bytes]:
+        items = []
+        for tag, value in MapMetadataTags(self._metadata).items():
+            data = _full_box(b'data', 0, 1, bytes(4), value.encode('utf-8'))
+            items.append(_box(ILST_ATOMS[tag], data))
+
+        thumbnail = self._metadata.get('thumbnail')
+        if thumbnail and Path(thumbnail).exists():
+            image = Path(thumbnail).read_bytes()
+            image_type = {'jpeg': 13, 'png': 14}.get(DetectImageFormat(image))
+            if image_type:
+                items.append(_box(b'covr', _full_box(b'data', 0, image_type, bytes(4), image)))
+
+        if not items:
+            return None
+
+        hdlr = _full_box(b'hdlr', 0, 0, struct.pack('>I4s', 0, b'mdir'), b'appl', bytes(8), b'\x00')
+        return _box(b'udta', _full_box(b'meta', 0, 0, hdlr, _box(b'ilst', *items)))
+
+    def _build_trak(self, track) -> bytes:
+        is_video = track is self._video
+        width = track.info["width"] if is_video else 0
+        height = track.info["height"] if is_video else 0
+        timescale = VIDEO_TIMESCALE if is_video else track.sample_rate
+
+        tkhd = _full_box(
+            b'tkhd', 0, 0x000003,
+            struct.pack('>IIIII', 0, 0, track.track_id, 0, 0),
+            bytes(8),
+            struct.pack('>hhhH', 0, 0, 0 if is_video else 0x0100, 0),
+            _MATRIX,
+            struct.pack('>II', width << 16, height << 16)
+        )
+        mdhd = _full_box(b'mdhd', 0, 0, struct.pack('>IIIIHH', 0, 0, timescale, 0, 0x55C4, 0))
+        hdlr = _full_box(
+            b'hdlr', 0, 0,
+            struct.pack('>I4s', 0, b'vide' if is_video else b'soun'),
+            bytes(12),
+            b'VideoHandler\x00' if is_video else b'SoundHandler\x00'
+        )
+        media_header = (
+            _full_box(b'vmhd', 0, 1, bytes(8)) if is_video
+            else _full_box(b'smhd', 0, 0, bytes(4))
+        )
+        dinf = _box(b'dinf', _full_box(b'dref', 0, 0, struct.pack('>I', 1), _full_box(b'url ', 0, 1)))
+        stbl = _box(
+            b'stbl',
+            _full_box(b'stsd', 0, 0, struct.pack('>I', 1), track.sample_entry()),
+            _full_box(b'stts', 0, 0, struct.pack('>I', 0)),
+            _full_box(b'stsc', 0, 0, struct.pack('>I', 0)),
+            _full_box(b'stsz', 0, 0, struct.pack('>II', 0, 0)),
+            _full_box(b'stco', 0, 0, struct.pack('>I', 0)),
+        )
+        minf = _box(b'minf', media_header, dinf, stbl)
+        return _box(b'trak', tkhd, _box(b'mdia', mdhd, hdlr, minf))
+
+    def _flush(self, final: bool = False):
+        video, audio = self._video, self._audio
+
+        if not self._tracks:
+            # Hold the header until audio shows up, but only up to one fragment's
+            # worth of samples: audio that never arrives gives a video-only file
+            waiting = video.pending_bytes + audio.pending_bytes
+            if not final and self._audio_pid is not None and not audio.ready and waiting < self.fragment_bytes_limit:
+                return
+            self._write_header()
+
+        trafs = []
+        payloads = []
+
+        if video in self._tracks and video.pending:
+            samples = video.pending if final else video.pending[:-1]
+            video.pending = [] if final else video.pending[-1:]
+            video.pending_bytes = sum(len(s[2]) for s in video.pending)
+            if samples:
+                entries = []
+                for i, (dts, pts, data, keyframe) in enumerate(samples):
+                    if i + 1 < len(samples):
+                        duration = samples[i + 1][0] - dts
+                    elif video.pending:
+                        duration = video.pending[0][0] - dts
+                    else:
+                        duration = video.last_duration
+                    duration = max(1, duration)
+                    video.last_duration = duration
+                    flags = SAMPLE_FLAGS_SYNC if keyframe else SAMPLE_FLAGS_NON_SYNC
+                    entries.append(struct.pack('>IIIi', duration, len(data), flags, pts - dts))
+                base = max(0, samples[0][0] - self._origin)
+                video.end_time = samples[-1][0] + video.last_duration - self._origin
+                trafs.append((video.track_id, base, 1, 0x000F01, entries))
+                payloads.append(b''.join(s[2] for s in samples))
+
+        if audio in self._tracks and audio.pending:
+            frames = audio.pending
+            audio.pending = []
+            audio.pending_bytes = 0
+            entries = [struct.pack('>II', AAC_FRAME_SAMPLES, len(f)) for f in frames]
+            base = audio.start_samples + audio.frames_written * AAC_FRAME_SAMPLES
+            audio.frames_written += len(frames)
+            trafs.append((audio.track_id, base, 0, 0x000301, entries))
+            payloads.append(b''.join(frames))
+        elif audio not in self._tracks:
+            audio.pending = []
+            audio.pending_bytes = 0
+
+        if trafs:
+            self._write_fragment(trafs, payloads)
+
+    def _write_fragment(self, trafs, payloads: List[bytes]):
+        self._sequence += 1
+
+        def build(offsets):
+            boxes = []
+            for (track_id, base, version, flags, entries), offset in zip(trafs, offsets):
+                boxes.append(_box(
+                    b'traf',
+                    _full_box(b'tfhd', 0, 0x020000, struct.pack('>I', track_id)),
+                    _full_box(b'tfdt', 1, 0, struct.pack('>Q', base)),
+                    _full_box(b'trun', version, flags, struct.pack('>Ii', len(entries), offset), *entries)
+                ))
+            return _box(b'moof', _full_box(b'mfhd', 0, 0, struct.pack('>I', self._sequence)), *boxes)
+
+        # Offsets are relative to the moof start and every field is fixed-size,
+        # so a dry run with zero offsets gives the final moof length.
+        moof_size = len(build([0] * len(trafs)))
+        offsets = []
+        position = moof_size + 8
+        for payload in payloads:
+            offsets.append(position)
+            position += len(payload)
+
+        mdat_size = 8 + sum(len(p) for p in payloads)
+        self._out.write(build(offsets))
+        self._out.write(struct.pack('>I4s', mdat_size, b'mdat'))
+        for payload in payloads:
+            self._out.write(payload)
+
+    def _finish(self):
+        if self._video_pid is None and self._audio_pid is None:
+            raise RemuxError("No program map table found in stream")
+        self._flush(final=True)
+
+        durations = []
+        if self._video in self._tracks:
+            durations.append(self._video.end_time * MOVIE_TIMESCALE // VIDEO_TIMESCALE)
+        if self._audio in self._tracks:
+            samples = self._audio.start_samples + self._audio.frames_written * AAC_FRAME_SAMPLES
+            durations.append(samples * MOVIE_TIMESCALE // self._audio.sample_rate)
+
+        self._out.seek(self._mehd_offset)
+        self._out.write(struct.pack('>Q', max(durations)))
+
+
+def RemuxTsToMp4(input_file, output_file=None, metadata: Optional[Dict[str, str]] = None) -> str:
+    return TsToMp4Remuxer().remux(input_file, output_file, metadata)
@@ -0,0 +1,243 @@
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_CLOCK = re.compile(r"(?:(\d+):)?(\d+):(\d{1,2})")
+_UNITS = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hrs?|hours?|m|mins?|minutes?|s|secs?|seconds?)\b")
+
+# Words mirrors add or drop without it being a different clip
+_NOISE_WORDS = frozenset({
+    "a", "an", "the", "and", "of", "in", "on", "with", "for", "to",
+    "hd", "4k", "1080p", "720p", "480p", "full", "video", "new", "free",
+})
+
+# Reciprocal rank fusion constant; larger values flatten the gap between ranks
+RANK_K = 60
+# Results are only compared when they share one of their rarest words; the
+# prefix also lines up longer suffixes the plural stemming leaves ("beach"/"beaches")
+BLOCK_KEYS = 3
+BLOCK_PREFIX = 5
+
+
+def NormalizeTitle(title: str) -> str:
+    text = unicodedata.normalize("NFKD", str(title or "")).encode("ascii", "ignore").decode().lower()
+    return " ".join(token for token in _TOKEN.findall(text) if token not in _NOISE_WORDS)
+
+
+def _stem(token: str) -> str:
+    # Plural "s" only: "trips" -> "trip", while "boss" and "bus" stay as they are
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss") and not token.isdigit():
+        return token[:-1]
+    return token
+
+
+def _parse_duration(value: Any) -> Optional[Tuple[int, int]]:
+    # (seconds, precision in seconds); "10 min" is only good to the minute
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value), 1
+    text = str(value).strip().lower()
+    match = _CLOCK.fullmatch(text)
+    if match:
+        hours, minutes, seconds = match.groups()
+        return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds), 1
+    parts = _UNITS.findall(text)
+    if not parts:
+        return None
+    total, precision = 0.0, 3600
+    for amount, unit in parts:
+        scale = 3600 if unit.startswith("h") else 60 if unit.startswith("m") else 1
+        total += float(amount) * scale
+        precision = min(precision, scale)
+    return int(total), precision
+
+
+def ParseDuration(value: Any) -> Optional[int]:
+    """Seconds from '12:34', '1:02:03', '10 min', '1h 5m', '45 sec' or a number; None if unknown"""
+    parsed = _parse_duration(value)
+    return parsed[0] if parsed else None
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+def Simhash(text: str) -> int:
+    # Character 3-gram shingles: a reordered or extra word flips a dozen or
+    # so of the 64 bits, unrelated titles differ in ~30. Plurals are best
+    # stemmed away first, a trailing "s" alone can flip as many bits
+    padded = f" {text} "
+    shingles = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    if not shingles:
+        return 0
+    # Column-wise bit counts over the binary strings; zip does the per-bit
+    # work in C, which is several times faster than shifting in a Python loop
+    rows = [format(_feature_hash(shingle), "064b") for shingle in shingles]
+    half = len(rows) / 2
+    value = 0
+    for column in zip(*rows):
+        value = value << 1 | (column.count("1") > half)
+    return value
+
+
+@lru_cache(maxsize=16384)
+def _title_hash(title: str) -> int:
+    return Simhash(title)
+
+
+class _UnionFind:
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+def _durations_match(a: Optional[Tuple[int, int]], b: Optional[Tuple[int, int]], tolerance: float) -> bool:
+    if a is None or b is None:
+        return True
+    allowed = max(tolerance, a[1], b[1], 0.03 * max(a[0], b[0]))
+    return abs(a[0] - b[0]) <= allowed
+
+
+def _completeness(result: Dict[str, Any]) -> int:
+    return sum(1 for key in ("title", "duration", "views", "thumbnail") if result.get(key))
+
+
+def MergeResults(
+    results: List[Dict[str, Any]],
+    max_distance: int = 12,
+    strict_distance: int = 6,
+    duration_tolerance: float = 8.0,
+    bucket_limit: int = 64
+) -> List[Dict[str, Any]]:
+    """Cluster the same clip found on several sites and rank the clusters.
+
+    Titles are normalized, plurals stemmed, and fingerprinted with a 64-bit
+    simhash of their character shingles. Two results are one clip when the
+    fingerprints are within max_distance bits and the durations agree, or
+    within strict_distance bits when a duration is missing. Numbered titles
+    ("Part 2") only match titles with the same numbers. Only results sharing
+    one of their rarest words are compared, so the merge stays close to
+    linear instead of comparing every pair.
+
+    Each cluster is represented by its most complete result, which gains
+    "sites" and "mirrors". Clusters are ranked by reciprocal rank fusion over
+    each site's own ordering, so the output does not depend on which site
+    answered first and clips several sites rank highly come first.
+    """
+    count = len(results)
+    if count == 0:
+        return []
+
+    positions: List[int] = []
+    seen_per_site: Dict[str, int] = {}
+    titles: List[str] = []
+    durations: List[Optional[Tuple[int, int]]] = []
+    for result in results:
+        site = result.get("site") or ""
+        positions.append(seen_per_site.get(site, 0))
+        seen_per_site[site] = positions[-1] + 1
+        titles.append(" ".join(_stem(token) for token in NormalizeTitle(result.get("title", "")).split()))
+        durations.append(_parse_duration(result.get("duration")))
+
+    stems = [{token[:BLOCK_PREFIX] for token in title.split()} for title in titles]
+    # "Part 1" and "Part 2" are close titles with similar lengths but not the
+    # same clip, and neither is the same clip as the unnumbered title
+    numbers = [frozenset(token for token in title.split() if any(c.isdigit() for c in token)) for title in titles]
+    frequency = Counter(stem for title_stems in stems for stem in title_stems)
+
+    clusters = _UnionFind(count)
+    hashes: Dict[int, int] = {}
+    by_url: Dict[str, int] = {}
+    by_title: Dict[str, List[int]] = {}
+    blocks: Dict[str, List[int]] = {}
+
+    for index, result in enumerate(results):
+        url = result.get("url")
+        if url:
+            if url in by_url:
+                clusters.union(by_url[url], index)
+            else:
+                by_url[url] = index
+
+        title = titles[index]
+        if not title:
+            continue
+
+        for other in by_title.get(title, ())[:bucket_limit]:
+            if _durations_match(durations[index], durations[other], duration_tolerance):
+                clusters.union(other, index)
+        by_title.setdefault(title, []).append(index)
+
+        # A single word is too little to fingerprint: exact title matches only
+        if len(stems[index]) < 2:
+            continue
+        hashes[index] = _title_hash(title)
+        compared = set()
+        for key in sorted(stems[index], key=lambda stem: (frequency[stem], stem))[:BLOCK_KEYS]:
+            block = blocks.setdefault(key, [])
+            for other in block[:bucket_limit]:
+                if other in compared:
+                    continue
+                compared.add(other)
+                if numbers[index] != numbers[other]:
+                    continue
+                if not _durations_match(durations[index], durations[other], duration_tolerance):
+                    continue
+                # A missing duration cannot back up a loose title match
+                limit = max_distance if durations[index] and durations[other] else strict_distance
+                if bin(hashes[index] ^ hashes[other]).count("1") <= limit:
+                    clusters.union(other, index)
+            block.append(index)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(count):
+        groups.setdefault(clusters.find(index), []).append(index)
+
+    ranked = []
+    for members in groups.values():
+        members.sort(key=lambda i: (-_completeness(results[i]), positions[i], results[i].get("site") or "", results[i].get("url") or ""))
+        best_rank: Dict[str, int] = {}
+        for i in members:
+            site = results[i].get("site") or ""
+            best_rank[site] = min(best_rank.get(site, positions[i]), positions[i])
+        score = sum(1.0 / (RANK_K + rank + 1) for rank in best_rank.values())
+
+        lead = results[members[0]]
+        merged = dict(lead)
+        merged["sites"] = [lead.get("site") or ""] + sorted(site for site in best_rank if site != (lead.get("site") or ""))
+        mirror_urls = {lead.get("url")}
+        merged["mirrors"] = []
+        for i in members[1:]:
+            url = results[i].get("url")
+            if url not in mirror_urls:
+                mirror_urls.add(url)
+                merged["mirrors"].append({"site": results[i].get("site"), "url": url})
+        ranked.append((-score, -len(best_rank), titles[members[0]], lead.get("url") or "", merged))
+
+    ranked.sort(key=lambda item: item[:4])
+    return [item[4] for item in ranked]
@@ -1,12 +1,16 @@
-import sqlite3
 import uuid
 import json
+import atexit
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable, Union
+from dataclasses import dataclass, fields
 from enum import Enum
 
+from .storage import GetStorage
+from .segment_bitmap import SegmentBitmap
+
 
 class DownloadStatus(Enum):
     PENDING = "pending"
@@ -28,14 +32,14 @@ class DownloadState:
     quality: str = "best"
     site: str = ""
     title: str = ""
-    segments_completed: List[int] = None
+    segments_completed: SegmentBitmap = None
     temp_dir: str = ""
     created_at: str = ""
     updated_at: str = ""
     
     def __post_init__(self):
-        if self.segments_completed is None:
-            self.segments_completed = []
+        if not isinstance(self.segments_completed, SegmentBitmap):
+            self.segments_completed = SegmentBitmap.from_iterable(self.segments_completed or [])
         if not self.created_at:
             self.created_at = datetime.now().isoformat()
         if not self.updated_at:
@@ -52,7 +56,10 @@ class DownloadState:
         return self.status in (DownloadStatus.PAUSED.value, DownloadStatus.FAILED.value)
     
     def to_dict(self) -> Dict[str, Any]:
-        data = asdict(self)
+        # fields() rather than asdict(), which would deep-copy the bitmap first
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data['segments_completed'] = self.segments_completed.to_list()
+        data['segments_completed_count'] = self.segments_completed.count
         data['progress_percent'] = self.progress_percent
         data['is_resumable'] = self.is_resumable
         return data
@@ -60,16 +67,26 @@ class DownloadState:
 
 class ResumeManager:
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, flush_interval: float = 2.0, flush_threshold: int = 500):
         self.db_path = Path(db_path) if db_path else Path.home() / ".RedLight" / "downloads.db"
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.storage = GetStorage(self.db_path)
         self._init_db()
         self._active_downloads: Dict[str, bool] = {}
+        
+        # Write-behind progress: only the latest state per download is kept and
+        # a background thread persists it in one transaction per interval
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_updates = 0
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        atexit.register(self.flush)
     
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''
+        self.storage.migrate('download_states', ['''
             CREATE TABLE IF NOT EXISTS download_states (
                 download_id TEXT PRIMARY KEY,
                 url TEXT NOT NULL,
@@ -85,118 +102,163 @@ class ResumeManager:
                 created_at TIMESTAMP,
                 updated_at TIMESTAMP
             )
-        ''')
-        conn.commit()
-        conn.close()
+        ''', self._create_indexes, self._add_segments_blob])
+    
+    def _create_indexes(self, conn):
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_download_states_status ON download_states(status, updated_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_download_states_updated ON download_states(updated_at)')
+    
+    def _add_segments_blob(self, conn):
+        existing_columns = {col[1] for col in conn.execute("PRAGMA table_info(download_states)")}
+        if 'segments_blob' not in existing_columns:
+            conn.execute('ALTER TABLE download_states ADD COLUMN segments_blob BLOB')
     
     def create_download(self, url: str, output_path: str, quality: str = "best",
                        site: str = "", title: str = "", total_size: int = 0) -> str:
         download_id = str(uuid.uuid4())[:8]
         now = datetime.now().isoformat()
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''
+        self.storage.execute('''
             INSERT INTO download_states 
             (download_id, url, output_path, total_size, downloaded_size, status, 
              quality, site, title, segments_json, temp_dir, created_at, updated_at)
             VALUES (?, ?, ?, ?, 0, 'pending', ?, ?, ?, '[]', '', ?, ?)
         ''', (download_id, url, output_path, total_size, quality, site, title, now, now))
-        conn.commit()
-        conn.close()
         
         self._active_downloads[download_id] = True
         return download_id
     
     def update_progress(self, download_id: str, downloaded_size: int,
                        total_size: Optional[int] = None,
-                       segments_completed: Optional[List[int]] = None) -> bool:
+                       segments_completed: Optional[Union[SegmentBitmap, Iterable[int]]] = None) -> bool:
         if download_id in self._active_downloads and not self._active_downloads[download_id]:
             return False
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        now = datetime.now().isoformat()
+        with self._pending_lock:
+            entry = self._pending.setdefault(download_id, {"total_size": None, "segments": None})
+            entry["downloaded_size"] = downloaded_size
+            entry["updated_at"] = datetime.now().isoformat()
+            if total_size is not None:
+                entry["total_size"] = total_size
+            if segments_completed is not None:
+                if not isinstance(segments_completed, SegmentBitmap):
+                    segments_completed = SegmentBitmap.from_iterable(segments_completed)
+                entry["segments"] = segments_completed
+            self._pending_updates += 1
+            flush_now = self._pending_updates >= self.flush_threshold
         
-        if total_size is not None and segments_completed is not None:
-            c.execute('''UPDATE download_states SET downloaded_size = ?, total_size = ?, 
-                        segments_json = ?, status = 'downloading', updated_at = ? WHERE download_id = ?''',
-                     (downloaded_size, total_size, json.dumps(segments_completed), now, download_id))
-        elif total_size is not None:
-            c.execute('''UPDATE download_states SET downloaded_size = ?, total_size = ?, 
-                        status = 'downloading', updated_at = ? WHERE download_id = ?''',
-                     (downloaded_size, total_size, now, download_id))
-        elif segments_completed is not None:
-            c.execute('''UPDATE download_states SET downloaded_size = ?, segments_json = ?, 
-                        status = 'downloading', updated_at = ? WHERE download_id = ?''',
-                     (downloaded_size, json.dumps(segments_completed), now, download_id))
-        else:
-            c.execute('''UPDATE download_states SET downloaded_size = ?, 
-                        status = 'downloading', updated_at = ? WHERE download_id = ?''',
-                     (downloaded_size, now, download_id))
+        self._ensure_flusher()
+        if flush_now:
+            self._flush_event.set()
         
-        conn.commit()
-        conn.close()
         return self._active_downloads.get(download_id, True)
     
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+                self._pending_updates = 0
+            
+            rows = [
+                (
+                    entry["downloaded_size"],
+                    entry["total_size"],
+                    entry["segments"].to_bytes() if entry["segments"] is not None else None,
+                    entry["updated_at"],
+                    download_id
+                )
+                for download_id, entry in pending.items()
+            ]
+            
+            try:
+                self.storage.executemany('''UPDATE download_states SET downloaded_size = ?,
+                            total_size = COALESCE(?, total_size),
+                            segments_blob = COALESCE(?, segments_blob),
+                            status = 'downloading', updated_at = ?
+                            WHERE download_id = ? AND status IN ('pending', 'downloading')''', rows)
+            except Exception as e:
+                # Keep the data for the next attempt unless newer progress arrived meanwhile
+                with self._pending_lock:
+                    for download_id, entry in pending.items():
+                        self._pending.setdefault(download_id, entry)
+                print(f"Failed to flush download progress: {e}")
+                return 0
+            
+            return len(rows)
+    
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._pending_lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name="resume-flusher", daemon=True)
+                self._flusher.start()
+    
+    def _flush_loop(self):
+        while True:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            self.flush()
+    
+    def _apply_pending(self, state: DownloadState) -> DownloadState:
+        with self._pending_lock:
+            entry = self._pending.get(state.download_id)
+            if entry and state.status in ('pending', 'downloading'):
+                state.downloaded_size = entry["downloaded_size"]
+                state.updated_at = entry["updated_at"]
+                state.status = 'downloading'
+                if entry["total_size"] is not None:
+                    state.total_size = entry["total_size"]
+                if entry["segments"] is not None:
+                    state.segments_completed = entry["segments"].copy()
+        return state
+    
     def pause_download(self, download_id: str) -> bool:
         self._active_downloads[download_id] = False
+        self.flush()
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''UPDATE download_states SET status = 'paused', updated_at = ?
-                    WHERE download_id = ? AND status = 'downloading' ''',
+        cursor = self.storage.execute('''UPDATE download_states SET status = 'paused', updated_at = ?
+                    WHERE download_id = ? AND status IN ('pending', 'downloading')''',
                  (datetime.now().isoformat(), download_id))
-        affected = c.rowcount
-        conn.commit()
-        conn.close()
-        return affected > 0
+        return cursor.rowcount > 0
     
     def resume_download(self, download_id: str) -> Optional[DownloadState]:
+        self.flush()
         state = self.get_download_state(download_id)
         if state and state.is_resumable:
             self._active_downloads[download_id] = True
-            
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''UPDATE download_states SET status = 'downloading', updated_at = ?
-                        WHERE download_id = ?''', (datetime.now().isoformat(), download_id))
-            conn.commit()
-            conn.close()
+            self.mark_downloading(download_id)
             return state
         return None
     
     def cancel_download(self, download_id: str) -> bool:
         # Keep False so update_progress returns False and stops the download
         self._active_downloads[download_id] = False
+        self.flush()
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''UPDATE download_states SET status = 'cancelled', updated_at = ?
+        cursor = self.storage.execute('''UPDATE download_states SET status = 'cancelled', updated_at = ?
                     WHERE download_id = ?''', (datetime.now().isoformat(), download_id))
-        affected = c.rowcount
-        conn.commit()
-        conn.close()
+        affected = cursor.rowcount
         
         # Don't pop here - let update_progress return False to stop the thread
         # The key will be cleaned up after the thread exits
         return affected > 0
     
     def complete_download(self, download_id: str, final_path: str = None) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        self.flush()
+        
         now = datetime.now().isoformat()
         
         if final_path:
-            c.execute('''UPDATE download_states SET status = 'completed', output_path = ?, 
+            cursor = self.storage.execute('''UPDATE download_states SET status = 'completed', output_path = ?, 
                         updated_at = ? WHERE download_id = ?''', (final_path, now, download_id))
         else:
-            c.execute('''UPDATE download_states SET status = 'completed', updated_at = ?
+            cursor = self.storage.execute('''UPDATE download_states SET status = 'completed', updated_at = ?
                         WHERE download_id = ?''', (now, download_id))
         
-        affected = c.rowcount
-        conn.commit()
-        conn.close()
+        affected = cursor.rowcount
         
         # Sync with history database
         if affected > 0:
@@ -230,24 +292,24 @@ class ResumeManager:
         return affected > 0
     
     def fail_download(self, download_id: str, error: str = "") -> bool:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''UPDATE download_states SET status = 'failed', updated_at = ?
+        self.flush()
+        
+        cursor = self.storage.execute('''UPDATE download_states SET status = 'failed', updated_at = ?
                     WHERE download_id = ?''', (datetime.now().isoformat(), download_id))
-        affected = c.rowcount
-        conn.commit()
-        conn.close()
         self._active_downloads.pop(download_id, None)
-        return affected > 0
+        return cursor.rowcount > 0
+    
+    def mark_downloading(self, download_id: str, title: Optional[str] = None,
+                         output_path: Optional[str] = None) -> bool:
+        cursor = self.storage.execute('''UPDATE download_states SET status = 'downloading', updated_at = ?,
+                    title = COALESCE(?, title), output_path = COALESCE(?, output_path)
+                    WHERE download_id = ?''', (datetime.now().isoformat(), title or None, output_path or None, download_id))
+        return cursor.rowcount > 0
     
     def get_download_state(self, download_id: str) -> Optional[DownloadState]:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''SELECT download_id, url, output_path, total_size, downloaded_size,
-                    status, quality, site, title, segments_json, temp_dir, created_at, updated_at
+        row = self.storage.query_one('''SELECT download_id, url, output_path, total_size, downloaded_size,
+                    status, quality, site, title, segments_json, temp_dir, created_at, updated_at, segments_blob
                     FROM download_states WHERE download_id = ?''', (download_id,))
-        row = c.fetchone()
-        conn.close()
         
         if row:
             return self._row_to_state(row)
@@ -263,56 +325,75 @@ class ResumeManager:
         return self._list_by_status('failed')
     
     def list_all_downloads(self, limit: int = 50) -> List[DownloadState]:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''SELECT download_id, url, output_path, total_size, downloaded_size,
-                    status, quality, site, title, segments_json, temp_dir, created_at, updated_at
+        rows = self.storage.query('''SELECT download_id, url, output_path, total_size, downloaded_size,
+                    status, quality, site, title, segments_json, temp_dir, created_at, updated_at, segments_blob
                     FROM download_states ORDER BY updated_at DESC LIMIT ?''', (limit,))
-        rows = c.fetchall()
-        conn.close()
         return [self._row_to_state(row) for row in rows]
     
     def _list_by_status(self, status: str) -> List[DownloadState]:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''SELECT download_id, url, output_path, total_size, downloaded_size,
-                    status, quality, site, title, segments_json, temp_dir, created_at, updated_at
+        rows = self.storage.query('''SELECT download_id, url, output_path, total_size, downloaded_size,
+                    status, quality, site, title, segments_json, temp_dir, created_at, updated_at, segments_blob
                     FROM download_states WHERE status = ? ORDER BY updated_at DESC''', (status,))
-        rows = c.fetchall()
-        conn.close()
         return [self._row_to_state(row) for row in rows]
     
     def _row_to_state(self, row) -> DownloadState:
-        segments = json.loads(row[9]) if row[9] else []
-        return DownloadState(
+        # Rows written before segments_blob existed still carry the JSON list
+        if row[13] is not None:
+            segments = SegmentBitmap.from_bytes(row[13])
+        else:
+            segments = SegmentBitmap.from_iterable(json.loads(row[9]) if row[9] else [])
+        return self._apply_pending(DownloadState(
             download_id=row[0], url=row[1], output_path=row[2],
             total_size=row[3], downloaded_size=row[4], status=row[5],
             quality=row[6], site=row[7] or "", title=row[8] or "",
             segments_completed=segments, temp_dir=row[10] or "",
             created_at=row[11], updated_at=row[12]
-        )
+        ))
     
     def cleanup_completed(self, days_old: int = 7) -> int:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''DELETE FROM download_states WHERE status IN ('completed', 'cancelled')
-                    AND datetime(updated_at) < datetime('now', ?)''', (f'-{days_old} days',))
-        affected = c.rowcount
-        conn.commit()
-        conn.close()
-        return affected
+        cutoff = (datetime.now() - timedelta(days=days_old)).isoformat()
+        cursor = self.storage.execute('''DELETE FROM download_states WHERE status IN ('completed', 'cancelled')
+                    AND updated_at < ?''', (cutoff,))
+        return cursor.rowcount
     
     def cleanup_all_completed(self) -> int:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("DELETE FROM download_states WHERE status IN ('completed', 'cancelled')")
-        affected = c.rowcount
-        conn.commit()
-        conn.close()
-        return affected
+        return self.storage.execute("DELETE FROM download_states WHERE status IN ('completed', 'cancelled')").rowcount
     
     def should_continue(self, download_id: str) -> bool:
         return self._active_downloads.get(download_id, True)
+    
+    def attach(self, registry) -> None:
+        from .jobs import JobEventType
+        from .playback import GetPlaybackRegistry
+        
+        # Persistence sink: the registry is the source of truth while a download
+        # runs, SQLite only records what is needed to resume after a restart
+        def on_event(event):
+            job = registry.get(event.job_id)
+            if job is None or not job.persist:
+                return
+            if event.type == JobEventType.EXTRACTING:
+                self.mark_downloading(event.job_id, job.title, job.output_path)
+            elif event.type == JobEventType.PROGRESS:
+                # Only the HLS engine counts in segments and it publishes which ones
+                # landed; byte-range downloaders report bytes, so record no bitmap
+                stream = GetPlaybackRegistry().get(event.job_id)
+                self.update_progress(
+                    event.job_id,
+                    downloaded_size=job.downloaded,
+                    total_size=job.total,
+                    segments_completed=stream.completed_segments() if stream is not None else None
+                )
+            elif event.type == JobEventType.DONE:
+                self.complete_download(event.job_id, job.result)
+            elif event.type == JobEventType.FAILED:
+                self.fail_download(event.job_id, job.error)
+            elif event.type == JobEventType.CANCELLED:
+                self.cancel_download(event.job_id)
+            elif event.type == JobEventType.PAUSED:
+                self.pause_download(event.job_id)
+        
+        registry.subscribe(on_event)
 
 
 _default_manager: Optional[ResumeManager] = None
@@ -1,7 +1,6 @@
 import requests
-from bs4 import BeautifulSoup
+from .html_parser import ParseHTML
 from rich.console import Console
-import re
 
 console = Console()
 
@@ -37,7 +36,7 @@ class PornHubSearch:
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = ParseHTML(response.text)
             videos = []
             
             selectors = [
@@ -48,20 +47,20 @@ class PornHubSearch:
             
             video_items = []
             for tag, class_name in selectors:
-                items = soup.find_all(tag, class_=class_name)
+                items = soup.select(f"{tag}.{class_name}")
                 if items:
                     video_items = items
                     break
             
             if not video_items:
-                all_links = soup.find_all('a', href=re.compile(r'/view_video\.php\?viewkey='))
+                all_links = soup.select('a[href*="/view_video.php?viewkey="]')
                 for link in all_links[:20]:
                     try:
                         url = link.get('href', '')
                         if not url.startswith('http'):
                             url = f"{self.base_url}{url}"
                         
-                        title = link.get('title', link.text.strip() or 'Unknown')
+                        title = link.get('title', link.text().strip() or 'Unknown')
                         videos.append({
                             'title': title,
                             'url': url,
@@ -74,7 +73,7 @@ class PornHubSearch:
             
             for item in video_items:
                 try:
-                    link_elem = item.find('a')
+                    link_elem = item.select_one('a')
                     if not link_elem:
                         continue
                     
@@ -87,24 +86,24 @@ class PornHubSearch:
                     
                     title_elem = link_elem.get('title', '')
                     if not title_elem:
-                        img_elem = link_elem.find('img')
+                        img_elem = link_elem.select_one('img')
                         if img_elem:
                             title_elem = img_elem.get('alt', img_elem.get('title', 'Unknown'))
                     
                     title = title_elem.strip() if title_elem else 'Unknown Title'
                     
                     duration = 'Unknown'
-                    parent = item.find_parent('li')
+                    parent = item.closest('li')
                     if parent:
-                        duration_elem = parent.find('var', class_='duration')
+                        duration_elem = parent.select_one('var.duration')
                         if duration_elem:
-                            duration = duration_elem.text.strip()
+                            duration = duration_elem.text().strip()
                     
                     views = 'Unknown'
                     if parent:
-                        views_elem = parent.find(class_='views')
+                        views_elem = parent.select_one('.views')
                         if views_elem:
-                            views = views_elem.text.strip()
+                            views = views_elem.text().strip()
                     
                     videos.append({
                         'title': title,
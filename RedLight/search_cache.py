@@ -0,0 +1,244 @@
+import copy
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import search_cache_requests
+from .singleflight import SingleFlight
+from .storage import GetStorage
+
+
+SearchLoader = Callable[[], List[Dict[str, Any]]]
+
+
+def NormalizeQuery(query: str) -> str:
+    return re.sub(r"\s+", " ", (query or "").strip()).casefold()
+
+
+class SearchCache:
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl: float = 600.0,
+        stale_ttl: float = 86400.0,
+        max_memory_entries: int = 256,
+        enabled: bool = True
+    ):
+        self.db_path = Path(db_path) if db_path else Path.home() / ".RedLight" / "search_cache.db"
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_memory_entries = max(0, int(max_memory_entries))
+        self.enabled = enabled
+
+        self._memory: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing = set()
+        self._writes = 0
+
+        self.storage = GetStorage(self.db_path)
+        self.storage.migrate("search_cache", [
+            '''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                query TEXT NOT NULL,
+                results TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            ''',
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_fetched ON search_cache(fetched_at)",
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_site ON search_cache(site, query)",
+        ])
+        self.purge_expired()
+
+    @staticmethod
+    def make_key(
+        site: str,
+        query: str,
+        page: int = 1,
+        sort_by: Optional[str] = None,
+        duration: Optional[str] = None,
+        **extra
+    ) -> str:
+        parts = [site.lower(), NormalizeQuery(query), str(int(page or 1)), sort_by or "", duration or ""]
+        if extra:
+            parts.append(json.dumps(extra, sort_keys=True, default=str))
+        return "\x1f".join(parts)
+
+    def fetch(
+        self,
+        site: str,
+        query: str,
+        page: int,
+        sort_by: Optional[str],
+        duration: Optional[str],
+        loader: SearchLoader,
+        **extra
+    ) -> List[Dict[str, Any]]:
+        """Cached results for one site's result page, calling loader only when needed.
+
+        Fresh entries (younger than ttl) are returned as is. Entries up to
+        stale_ttl old are returned at once and refreshed in the background.
+        Anything older, or missing, is loaded; concurrent misses share one load.
+        """
+        if not self.enabled:
+            return loader()
+
+        key = self.make_key(site, query, page, sort_by, duration, **extra)
+        entry = self._lookup(key)
+        if entry is not None:
+            fetched_at, results = entry
+            age = time.time() - fetched_at
+            if age < self.ttl:
+                search_cache_requests.inc(site=site, result="fresh")
+                return copy.deepcopy(results)
+            if age < self.stale_ttl:
+                search_cache_requests.inc(site=site, result="stale")
+                self._revalidate(key, site, query, loader)
+                return copy.deepcopy(results)
+
+        search_cache_requests.inc(site=site, result="miss")
+        return self._flight.do(key, lambda: self._load(key, site, query, loader))
+
+    def get(self, site: str, query: str, page: int = 1, sort_by: Optional[str] = None,
+            duration: Optional[str] = None, **extra) -> Optional[List[Dict[str, Any]]]:
+        entry = self._lookup(self.make_key(site, query, page, sort_by, duration, **extra))
+        if entry is None or time.time() - entry[0] >= self.stale_ttl:
+            return None
+        return copy.deepcopy(entry[1])
+
+    def put(self, site: str, query: str, page: int, sort_by: Optional[str], duration: Optional[str],
+            results: List[Dict[str, Any]], **extra) -> None:
+        self._store(self.make_key(site, query, page, sort_by, duration, **extra), site, query, results)
+
+    def invalidate(self, site: Optional[str] = None, query: Optional[str] = None) -> int:
+        conditions, params = [], []
+        if site:
+            conditions.append("site = ?")
+            params.append(site.lower())
+        if query is not None:
+            conditions.append("query = ?")
+            params.append(NormalizeQuery(query))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            for key in list(self._memory):
+                key_site, key_query = key.split("\x1f", 2)[:2]
+                if (not site or key_site == site.lower()) and (query is None or key_query == NormalizeQuery(query)):
+                    del self._memory[key]
+        return self.storage.execute(f"DELETE FROM search_cache{where}", params).rowcount
+
+    def clear(self) -> int:
+        return self.invalidate()
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.stale_ttl
+        return self.storage.execute("DELETE FROM search_cache WHERE fetched_at < ?", (cutoff,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        row = self.storage.query_one("SELECT COUNT(*) FROM search_cache")
+        with self._lock:
+            memory_entries = len(self._memory)
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "memory_entries": memory_entries,
+            "stored_entries": row[0] if row else 0,
+            "refreshing": len(self._refreshing),
+        }
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        try:
+            row = self.storage.query_one("SELECT fetched_at, results FROM search_cache WHERE key = ?", (key,))
+            if row is None:
+                return None
+            entry = (row[0], json.loads(row[1]))
+        except Exception:
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Tuple[float, List[Dict[str, Any]]]) -> None:
+        if not self.max_memory_entries:
+            return
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _load(self, key: str, site: str, query: str, loader: SearchLoader) -> List[Dict[str, Any]]:
+        results = loader()
+        # Site searchers return [] when they fail or get blocked, so an empty
+        # page is never cached; the next request tries the site again
+        if results:
+            self._store(key, site, query, results)
+        return results
+
+    def _store(self, key: str, site: str, query: str, results: List[Dict[str, Any]]) -> None:
+        fetched_at = time.time()
+        self._remember(key, (fetched_at, copy.deepcopy(results)))
+        try:
+            self.storage.execute(
+                "INSERT OR REPLACE INTO search_cache (key, site, query, results, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, site.lower(), NormalizeQuery(query), json.dumps(results, default=str), fetched_at)
+            )
+            self._writes += 1
+            if self._writes % 200 == 0:
+                self.purge_expired()
+        except Exception as e:
+            print(f"Search cache write failed: {e}")
+
+    def _revalidate(self, key: str, site: str, query: str, loader: SearchLoader) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._flight.do(key, lambda: self._load(key, site, query, loader))
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="search-cache-refresh", daemon=True).start()
+
+
+_default_cache: Optional[SearchCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def GetSearchCache() -> SearchCache:
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                from .config import GetConfig
+                settings = GetConfig().search
+                _default_cache = SearchCache(
+                    ttl=settings.cache_ttl,
+                    stale_ttl=settings.cache_stale_ttl,
+                    max_memory_entries=settings.cache_memory_entries,
+                    enabled=settings.cache_enabled
+                )
+    return _default_cache
+
+
+def ClearSearchCache(site: Optional[str] = None) -> int:
+    return GetSearchCache().invalidate(site=site)
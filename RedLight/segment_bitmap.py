@@ -0,0 +1,132 @@
+import zlib
+from typing import Iterable, Iterator, List, Optional
+
+
+_FORMAT_VERSION = 1
+
+
+class SegmentBitmap:
+
+    __slots__ = ("_bits", "_count")
+
+    def __init__(self, size_hint: int = 0):
+        self._bits = bytearray((size_hint + 7) // 8)
+        self._count = 0
+
+    @classmethod
+    def from_iterable(cls, indexes: Iterable[int]) -> "SegmentBitmap":
+        if isinstance(indexes, SegmentBitmap):
+            return indexes.copy()
+        bitmap = cls()
+        for index in indexes:
+            bitmap.add(index)
+        return bitmap
+
+    @classmethod
+    def from_prefix(cls, count: int) -> "SegmentBitmap":
+        bitmap = cls(count)
+        full, rest = divmod(max(0, count), 8)
+        bitmap._bits[:full] = b"\xff" * full
+        if rest:
+            bitmap._bits[full] = (1 << rest) - 1
+        bitmap._count = max(0, count)
+        return bitmap
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "SegmentBitmap":
+        bitmap = cls()
+        if not data:
+            return bitmap
+        if data[0] != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported segment bitmap format: {data[0]}")
+        bitmap._bits = bytearray(zlib.decompress(data[1:]))
+        bitmap._count = int.from_bytes(bitmap._bits, "little").bit_count()
+        return bitmap
+
+    def to_bytes(self) -> bytes:
+        end = len(self._bits)
+        while end and not self._bits[end - 1]:
+            end -= 1
+        return bytes((_FORMAT_VERSION,)) + zlib.compress(bytes(self._bits[:end]))
+
+    def add(self, index: int) -> None:
+        if index < 0:
+            raise ValueError("Segment index must be non-negative")
+        byte, mask = index >> 3, 1 << (index & 7)
+        if byte >= len(self._bits):
+            # Grow geometrically so appending in order stays amortised O(1)
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        if not self._bits[byte] & mask:
+            self._bits[byte] |= mask
+            self._count += 1
+
+    def discard(self, index: int) -> None:
+        byte, mask = index >> 3, 1 << (index & 7)
+        if 0 <= byte < len(self._bits) and self._bits[byte] & mask:
+            self._bits[byte] &= ~mask
+            self._count -= 1
+
+    def update(self, indexes: Iterable[int]) -> None:
+        for index in indexes:
+            self.add(index)
+
+    def contiguous_prefix(self) -> int:
+        # Number of segments completed from index 0 without a gap
+        for byte_index, value in enumerate(self._bits):
+            if value != 0xFF:
+                bit = 0
+                while value & (1 << bit):
+                    bit += 1
+                return byte_index * 8 + bit
+        return len(self._bits) * 8
+
+    def first_missing(self, start: int = 0, limit: Optional[int] = None) -> Optional[int]:
+        index = max(0, start)
+        while limit is None or index < limit:
+            byte = index >> 3
+            if byte >= len(self._bits):
+                return index
+            if self._bits[byte] == 0xFF and not index & 7:
+                index += 8
+                continue
+            if not self._bits[byte] & (1 << (index & 7)):
+                return index
+            index += 1
+        return None
+
+    def copy(self) -> "SegmentBitmap":
+        bitmap = SegmentBitmap()
+        bitmap._bits = bytearray(self._bits)
+        bitmap._count = self._count
+        return bitmap
+
+    def to_list(self) -> List[int]:
+        return list(self)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def __contains__(self, index: int) -> bool:
+        byte = index >> 3
+        return 0 <= byte < len(self._bits) and bool(self._bits[byte] & (1 << (index & 7)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        for byte_index, value in enumerate(self._bits):
+            if not value:
+                continue
+            base = byte_index * 8
+            for bit in range(8):
+                if value & (1 << bit):
+                    yield base + bit
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SegmentBitmap):
+            return self._count == other._count and self._bits.rstrip(b"\x00") == other._bits.rstrip(b"\x00")
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SegmentBitmap(count={self._count})"
@@ -1,9 +1,26 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context, send_file
 from flask_cors import CORS
 import sys
 import os
+import gzip
+import itertools
+import json
+import queue
+import threading
 import traceback
 
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    from waitress import serve as waitress_serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
 # Ensure we can import from local package
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -11,11 +28,18 @@ from RedLight.api import (
     GetActiveDownloads,
     StartResumableDownload,
     GetVideoInfo,
+    GetVideoInfoBatch,
     CancelDownload,
     GetStatistics,
-    GetDownloadHistory
+    GetDownloadHistory,
+    GetDownloadQueueStatus,
+    SetMaxConcurrentDownloads
 )
 from RedLight.config import ConfigManager
+from RedLight.jobs import GetJobRegistry, JobEventType, TERMINAL_EVENTS
+from RedLight.statistics import GetStatistics as GetStatisticsCollector
+from RedLight.metrics import GetMetrics
+from RedLight.playback import GetPlaybackRegistry
 
 app = Flask(__name__) # Initialize first to access helpers if needed, but we'll override static config
 
@@ -36,7 +60,83 @@ def get_static_folder():
 
 static_folder = get_static_folder()
 app = Flask(__name__, static_folder=static_folder, static_url_path='/')
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'image/svg+xml',
+)
+MIN_COMPRESS_SIZE = 512
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Compressed static assets keyed by (path, etag, encoding); dist files never
+# change without their ETag changing, so entries never need invalidating
+_compressed_assets = {}
+_compressed_assets_lock = threading.Lock()
+
+def _pick_encoding():
+    accept = request.accept_encodings
+    if BROTLI_AVAILABLE and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+@app.after_request
+def optimize_response(response):
+    is_static = request.endpoint in ('static', 'index')
+    if is_static and response.status_code in (200, 304):
+        if request.path.startswith('/assets/'):
+            # Vite fingerprints everything under assets/, so it can be cached forever
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+    
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    if response.is_streamed and not (is_static and response.direct_passthrough):
+        # Never buffer generators such as the SSE stream
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = _pick_encoding()
+    if encoding is None:
+        return response
+    
+    etag, _ = response.get_etag()
+    if is_static:
+        response.direct_passthrough = False
+    key = (request.path, etag, encoding)
+    with _compressed_assets_lock:
+        body = _compressed_assets.get(key) if is_static and etag else None
+    if body is not None:
+        close = getattr(response.response, 'close', None)
+        if close is not None:
+            response.call_on_close(close)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return response
+        body = _compress(data, encoding)
+        if is_static and etag:
+            with _compressed_assets_lock:
+                _compressed_assets[key] = body
+    
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        # Same representation modulo encoding, so a weak validator still matches
+        response.set_etag(etag, weak=True)
+    return response
 
 @app.route('/')
 def index():
@@ -59,9 +159,19 @@ def get_stats():
 @app.route('/api/downloads/history', methods=['GET'])
 def get_history():
     try:
-        limit = int(request.args.get('limit', 10))
-        history = GetDownloadHistory(limit=limit)
-        return jsonify(history)
+        limit = min(int(request.args.get('limit', 10)), 500)
+        history = GetDownloadHistory(
+            limit=limit,
+            site=request.args.get('site') or None,
+            quality=request.args.get('quality') or None,
+            after=request.args.get('after') or None
+        )
+        response = jsonify(history)
+        if len(history) >= limit:
+            response.headers['X-Next-Cursor'] = history[-1]['cursor']
+        return response
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         traceback.print_exc()
         try:
@@ -79,6 +189,80 @@ def get_active():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of transfer, extraction, search, queue and SQLite metrics"""
+    from RedLight.download_queue import GetDownloadQueue
+    GetDownloadQueue()
+    return Response(GetMetrics().render(), mimetype='text/plain', headers={'Cache-Control': 'no-store'})
+
+@app.route('/api/downloads/queue', methods=['GET'])
+def get_queue():
+    try:
+        return jsonify(GetDownloadQueueStatus())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _sse(event: str, data, event_id=None) -> str:
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, default=str)}\n\n"
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events stream of download progress and stats changes"""
+    jobs = GetJobRegistry()
+    interval = max(0.05, float(request.args.get('interval', 0.25)))
+    events = queue.Queue(maxsize=1000)
+    
+    def enqueue(event):
+        try:
+            events.put_nowait(event)
+        except queue.Full:
+            pass
+    
+    # Progress is coalesced per job by the subscription, state changes pass straight through
+    subscription = jobs.subscribe(enqueue, min_interval=interval)
+    
+    def generate():
+        last_sent = {}
+        try:
+            yield "retry: 3000\n\n"
+            snapshot = jobs.snapshot(active_only=True)
+            for job in snapshot:
+                last_sent[job['download_id']] = job
+            yield _sse('snapshot', {"downloads": snapshot, "stats": GetStatistics()})
+            
+            while True:
+                try:
+                    event = events.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                # Only send the fields that changed since this client's last update
+                previous = last_sent.get(event.job_id) or {}
+                delta = {k: v for k, v in event.job.items() if previous.get(k) != v}
+                delta['download_id'] = event.job_id
+                if event.type in TERMINAL_EVENTS or event.type == JobEventType.PAUSED:
+                    last_sent.pop(event.job_id, None)
+                else:
+                    last_sent[event.job_id] = event.job
+                yield _sse(event.type.value, delta, event.seq)
+                
+                if event.type == JobEventType.DONE:
+                    GetStatisticsCollector().invalidate()
+                    yield _sse('stats', GetStatistics())
+        finally:
+            subscription.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/download', methods=['POST'])
 def start_download():
     data = request.json
@@ -88,8 +272,13 @@ def start_download():
     
     try:
         # Start async/resumable download
-        download_id = StartResumableDownload(url)
-        return jsonify({"success": True, "id": download_id})
+        # Returns as soon as the job is queued; title and qualities follow as job events
+        download_id = StartResumableDownload(url, metadata=data.get('metadata'), force=bool(data.get('force')))
+        job = GetJobRegistry().get(download_id)
+        status = job.status if job is not None else "queued"
+        return jsonify({"success": True, "id": download_id, "status": status}), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -105,6 +294,149 @@ def cancel_download():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+PLAYBACK_CHUNK = 256 * 1024
+
+def _finished_file(job_id):
+    stream = GetPlaybackRegistry().get(job_id)
+    if stream is not None and stream.merged_path is not None and stream.merged_path.exists():
+        return stream.merged_path
+    job = GetJobRegistry().get(job_id)
+    if job is not None and job.result and os.path.isfile(job.result):
+        return job.result
+    return None
+
+def _read_span(stream, entries, start, stop):
+    # Yields bytes [start, stop) of the concatenated segment files
+    position = start
+    offset = 0
+    try:
+        for _, path, size in entries:
+            if offset + size <= start:
+                offset += size
+                continue
+            if offset >= stop:
+                break
+            with open(path, 'rb') as f:
+                f.seek(max(0, start - offset))
+                remaining = min(stop, offset + size) - max(start, offset)
+                while remaining > 0:
+                    chunk = f.read(min(PLAYBACK_CHUNK, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    position += len(chunk)
+                    yield chunk
+            offset += size
+        return
+    except FileNotFoundError:
+        pass
+    # Segments were merged and removed under us, as in play_stream's follow()
+    if stream.merged_path is None or not stream.merged_path.exists():
+        return
+    with open(stream.merged_path, 'rb') as f:
+        f.seek(position)
+        while position < stop:
+            chunk = f.read(min(PLAYBACK_CHUNK, stop - position))
+            if not chunk:
+                break
+            position += len(chunk)
+            yield chunk
+
+@app.route('/api/play/<job_id>', methods=['GET'])
+def play_status(job_id):
+    stream = GetPlaybackRegistry().get(job_id)
+    if stream is not None:
+        return jsonify({**stream.status(), "playlist": f"/api/play/{job_id}/index.m3u8", "stream": f"/api/play/{job_id}/stream"})
+    if _finished_file(job_id):
+        return jsonify({"job_id": job_id, "merged": True, "stream": f"/api/play/{job_id}/stream"})
+    return jsonify({"error": "Nothing playable for this download yet"}), 404
+
+@app.route('/api/play/<job_id>/index.m3u8', methods=['GET'])
+def play_playlist(job_id):
+    stream = GetPlaybackRegistry().get(job_id)
+    if stream is None or stream.merged_path is not None:
+        return jsonify({"error": "No live HLS stream for this download", "stream": f"/api/play/{job_id}/stream"}), 404
+    body = stream.playlist(f"/api/play/{job_id}/segment/{{index}}.ts")
+    return Response(body, mimetype='application/vnd.apple.mpegurl', headers={'Cache-Control': 'no-store'})
+
+@app.route('/api/play/<job_id>/segment/<int:index>.ts', methods=['GET'])
+def play_segment(job_id, index):
+    stream = GetPlaybackRegistry().get(job_id)
+    if stream is None or not 0 <= index < stream.total:
+        return jsonify({"error": "Unknown segment"}), 404
+    path = stream.wait_for(index, timeout=float(request.args.get('wait', 30)))
+    if path is None:
+        if index in stream.failed:
+            return jsonify({"error": "Segment failed to download"}), 404
+        return jsonify({"error": "Segment not ready"}), 503, {'Retry-After': '2'}
+    try:
+        return send_file(path, mimetype='video/mp2t', conditional=True, max_age=3600)
+    except FileNotFoundError:
+        # Segments are removed once merged; the player should move to the stream URL
+        return jsonify({"error": "Segment no longer available"}), 410
+
+@app.route('/api/play/<job_id>/stream', methods=['GET'])
+def play_stream(job_id):
+    """MPEG-TS byte stream of an in-progress download: follows new segments, or serves a Range of the contiguous prefix"""
+    stream = GetPlaybackRegistry().get(job_id)
+    if stream is None or stream.merged_path is not None:
+        path = _finished_file(job_id)
+        if path is None:
+            return jsonify({"error": "Nothing playable for this download yet"}), 404
+        return send_file(path, conditional=True)
+    
+    headers = {'Accept-Ranges': 'bytes', 'Cache-Control': 'no-store'}
+    if request.range is None:
+        def follow():
+            sent = 0
+            for path in stream.follow():
+                try:
+                    with open(path, 'rb') as f:
+                        while True:
+                            chunk = f.read(PLAYBACK_CHUNK)
+                            if not chunk:
+                                break
+                            sent += len(chunk)
+                            yield chunk
+                except FileNotFoundError:
+                    break
+            else:
+                return
+            # Segments were merged and removed under us; the merged file has the
+            # same bytes in the same order, so carry on from the same offset
+            if stream.merged_path is None or not stream.merged_path.exists():
+                return
+            with open(stream.merged_path, 'rb') as f:
+                f.seek(sent)
+                while True:
+                    chunk = f.read(PLAYBACK_CHUNK)
+                    if not chunk:
+                        break
+                    yield chunk
+        return Response(stream_with_context(follow()), mimetype='video/mp2t', headers=headers)
+    
+    entries = stream.prefix()
+    available = sum(size for _, _, size in entries)
+    span = request.range.range_for_length(available) if request.range.units == 'bytes' else None
+    if span is None:
+        return Response(status=416, headers={**headers, 'Content-Range': f'bytes */{available}'})
+    start, stop = span
+    # Total length is unknown until the download finishes
+    body = _read_span(stream, entries, start, stop)
+    # Read ahead one chunk so a span whose files are already gone is refused
+    # before Content-Length is promised
+    first = next(body, b'')
+    if not first:
+        return jsonify({"error": "Segments were removed; request the stream again"}), 409
+    headers['Content-Range'] = f'bytes {start}-{stop - 1}/*'
+    headers['Content-Length'] = str(stop - start)
+    return Response(
+        stream_with_context(itertools.chain((first,), body)),
+        status=206,
+        mimetype='video/mp2t',
+        headers=headers
+    )
+
 @app.route('/api/info', methods=['GET'])
 def get_info():
     url = request.args.get('url')
@@ -116,6 +448,53 @@ def get_info():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+MAX_BATCH_URLS = 1000
+MAX_BATCH_CONCURRENCY = 32
+
+def _batch_urls():
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not urls:
+        return None, (jsonify({"error": "'urls' must be a non-empty list"}), 400)
+    if len(urls) > MAX_BATCH_URLS:
+        return None, (jsonify({"error": f"At most {MAX_BATCH_URLS} URLs per batch"}), 400)
+    return [str(url).strip() for url in urls], None
+
+def _ndjson(rows):
+    return Response(
+        stream_with_context(json.dumps(row, default=str) + "\n" for row in rows),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/info/batch', methods=['POST'])
+def get_info_batch():
+    """Extract info for many URLs concurrently, streaming one NDJSON line per URL as it resolves"""
+    urls, error = _batch_urls()
+    if error:
+        return error
+    data = request.get_json(silent=True) or {}
+    concurrency = max(1, min(int(data.get('concurrency', 8)), MAX_BATCH_CONCURRENCY))
+    return _ndjson(GetVideoInfoBatch(urls, max_workers=concurrency))
+
+@app.route('/api/downloads/batch', methods=['POST'])
+def start_download_batch():
+    """Queue many downloads; extraction runs on the download pool, ids stream back as NDJSON"""
+    urls, error = _batch_urls()
+    if error:
+        return error
+    data = request.get_json(silent=True) or {}
+    metadata = data.get('metadata')
+    
+    def queue_all():
+        for index, url in enumerate(urls):
+            try:
+                yield {"index": index, "url": url, "id": StartResumableDownload(url, metadata=metadata), "status": "queued"}
+            except Exception as e:
+                yield {"index": index, "url": url, "error": str(e)}
+    
+    return _ndjson(queue_all())
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     try:
@@ -137,7 +516,20 @@ def update_config():
         if 'downloadPath' in data:
             current_config.download.output_directory = data['downloadPath']
         if 'maxConcurrent' in data:
-            current_config.download.max_concurrent = int(data['maxConcurrent'])
+            current_config.download.max_concurrent = max(1, int(data['maxConcurrent']))
+            SetMaxConcurrentDownloads(current_config.download.max_concurrent)
+        if 'maxPerSite' in data or 'siteLimits' in data:
+            from RedLight.download_queue import GetDownloadQueue
+            if 'maxPerSite' in data:
+                current_config.download.max_per_site = max(0, int(data['maxPerSite']))
+            if 'siteLimits' in data:
+                current_config.download.site_limits = {
+                    str(site).lower(): int(limit) for site, limit in (data['siteLimits'] or {}).items()
+                }
+            GetDownloadQueue().set_site_limits(
+                current_config.download.max_per_site,
+                current_config.download.site_limits
+            )
         if 'quality' in data:
             current_config.download.default_quality = data['quality']
         
@@ -153,12 +545,77 @@ def search_videos():
         return jsonify({"error": "Query is required"}), 400
     try:
         from RedLight.multi_search import MultiSiteSearch
-        engine = MultiSiteSearch()
-        results = engine.search_all(query)
-        return jsonify(results)
+        from RedLight.result_merge import MergeResults
+        # fresh=1 skips the result cache and re-scrapes every site
+        engine = MultiSiteSearch(use_cache=request.args.get('fresh') != '1')
+        
+        streaming = request.args.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', '')
+        merge = request.args.get('merge') != '0'
+        if request.args.get('deep') == '1':
+            return _deep_search(engine, query, streaming, merge)
+        if not streaming:
+            return jsonify(engine.search_all(query, merge=merge))
+        
+        # One NDJSON line per site as soon as it answers, then a summary line
+        deadline = min(float(request.args.get('deadline', engine.DEFAULT_DEADLINE)), 60.0)
+        sites = [s for s in request.args.get('sites', '').split(',') if s] or None
+        page = int(request.args.get('page', 1))
+        
+        def rows():
+            collected = []
+            timed_out = []
+            for site_result in engine.search_iter(query, page=page, deadline=deadline, sites=sites):
+                collected.extend(site_result["results"])
+                if site_result["status"] == "timeout":
+                    timed_out.append(site_result["site"])
+                yield site_result
+            summary = {"done": True, "total": len(collected), "timed_out": timed_out, "partial": bool(timed_out)}
+            if merge:
+                # Final deduplicated, ranked list to replace what was shown while streaming
+                summary["merged"] = MergeResults(collected)
+            yield summary
+        
+        return _ndjson(rows())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+MAX_DEEP_RESULTS = 2000
+MAX_DEEP_PAGES = 50
+
+def _deep_search(engine, query, streaming, merge):
+    options = {
+        "max_results": max(1, min(int(request.args.get('max_results', 200)), MAX_DEEP_RESULTS)),
+        "max_pages": max(1, min(int(request.args.get('max_pages', 10)), MAX_DEEP_PAGES)),
+        "sites": [s for s in request.args.get('sites', '').split(',') if s] or None,
+        "deadline": min(float(request.args.get('deadline', 60.0)), 300.0),
+        "merge": merge,
+    }
+    if not streaming:
+        return jsonify(engine.search_deep(query, **options))
+    
+    # One NDJSON line per page as it lands, then the merged result set
+    def rows():
+        pages = {}
+        for page_result in engine.search_deep_iter(query, **options):
+            pages[(page_result["site"], page_result["page"])] = page_result["results"]
+            yield page_result
+        results = engine.assemble_pages(pages, merge)[:options["max_results"]]
+        summary = {"done": True, "total": sum(len(r) for r in pages.values()), "pages": len(pages)}
+        if merge:
+            summary["merged"] = results
+        yield summary
+    
+    return _ndjson(rows())
+
+@app.route('/api/search/cache', methods=['GET', 'DELETE'])
+def search_cache():
+    from RedLight.search_cache import GetSearchCache
+    cache = GetSearchCache()
+    if request.method == 'DELETE':
+        removed = cache.invalidate(site=request.args.get('site'), query=request.args.get('q'))
+        return jsonify({"success": True, "removed": removed})
+    return jsonify(cache.stats())
+
 @app.route('/api/playlist', methods=['GET'])
 def get_playlist_videos():
     """Get list of videos from a channel/playlist URL"""
@@ -205,6 +662,21 @@ def download_playlist():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+def serve(host: str = '127.0.0.1', port: int = 5000, threads: int = 16):
+    """Serve the API with a production WSGI server (waitress, or a threaded werkzeug server)"""
+    if WAITRESS_AVAILABLE:
+        print(f"Serving RedLight API on http://{host}:{port} (waitress, {threads} threads)", flush=True)
+        # Each open /api/events stream occupies a thread, so keep headroom above the GUI's needs
+        waitress_serve(app, host=host, port=port, threads=threads, channel_timeout=60, ident='RedLight')
+        return
+    
+    from werkzeug.serving import make_server
+    print(f"Serving RedLight API on http://{host}:{port} (threaded werkzeug; pip install waitress for better throughput)", flush=True)
+    make_server(host, port, app, threaded=True).serve_forever()
+
 if __name__ == '__main__':
-    print("Starting RedLight API Server on port 5000...")
-    app.run(host='127.0.0.1', port=5000, debug=True)
+    if '--dev' in sys.argv:
+        print("Starting RedLight API Server on port 5000 (development mode)...")
+        app.run(host='127.0.0.1', port=5000, debug=True, threaded=True)
+    else:
+        serve()
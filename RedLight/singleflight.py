@@ -0,0 +1,90 @@
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+
+    __slots__ = ("event", "result", "error", "expires")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.expires = 0.0
+
+
+class SingleFlight:
+
+    def __init__(self, ttl: float = 0.0, max_entries: int = 1024):
+        # ttl > 0 also keeps successful results around briefly, so back-to-back
+        # calls for the same key are answered without running fn again
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        result, _ = self.do_shared(key, fn)
+        return result
+
+    def do_shared(self, key: Hashable, fn: Callable[[], Any]):
+        """Return (result, shared) where shared is True if another caller's run was reused"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.event.is_set() and call.expires <= time.monotonic():
+                del self._calls[key]
+                call = None
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            # Callers are free to mutate what they get back
+            return copy.deepcopy(call.result), True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and self.ttl > 0:
+                    call.expires = time.monotonic() + self.ttl
+                    call.result = copy.deepcopy(call.result)
+                    self._prune()
+                elif self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
+
+    def forget(self, key: Hashable) -> None:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.event.is_set():
+                del self._calls[key]
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(1 for call in self._calls.values() if not call.event.is_set())
+
+    def _prune(self):
+        if len(self._calls) <= self.max_entries:
+            return
+        now = time.monotonic()
+        for key, call in list(self._calls.items()):
+            if call.event.is_set() and call.expires <= now:
+                del self._calls[key]
+        # Still over: drop the oldest finished entries (dicts keep insertion order)
+        for key, call in list(self._calls.items()):
+            if len(self._calls) <= self.max_entries:
+                break
+            if call.event.is_set():
+                del self._calls[key]
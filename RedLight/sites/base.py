@@ -1,9 +1,16 @@
+import re
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple
+
+from ..metadata import MetadataEditor
 
 
 class BaseSiteDownloader(ABC):
     
+    VIDEO_ID_PATTERNS: Tuple[str, ...] = ()
+    # get_info can fall back to driving a real browser, too heavy to run speculatively
+    BROWSER_FALLBACK: bool = False
+    
     @abstractmethod
     def download(
         self,
@@ -13,10 +20,28 @@ class BaseSiteDownloader(ABC):
         filename: Optional[str] = None,
         keep_original: bool = False,
         proxy: Optional[str] = None,
-        on_progress: Optional[Callable[[int, int], None]] = None
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        metadata: Optional[Dict[str, str]] = None
     ) -> str:
         pass
     
+    def _apply_metadata(self, video_path: str, metadata: Optional[Dict[str, str]], title: str) -> str:
+        if not metadata:
+            return video_path
+        try:
+            return MetadataEditor().ApplyMetadata(video_path, {'title': title, **metadata})
+        except Exception as e:
+            print(f"⚠ Could not write metadata: {e}")
+            return video_path
+    
+    @classmethod
+    def get_video_id(cls, url: str) -> Optional[str]:
+        for pattern in cls.VIDEO_ID_PATTERNS:
+            match = re.search(pattern, url or "")
+            if match:
+                return match.group(1)
+        return None
+    
     @abstractmethod
     def get_info(self, url: str) -> Dict[str, Any]:
         pass
@@ -49,6 +74,25 @@ class BaseSiteSearch(ABC):
     ) -> List[Dict[str, Any]]:
         pass
     
+    def cached_search(
+        self,
+        query: str,
+        page: int = 1,
+        sort_by: Optional[str] = None,
+        duration: Optional[str] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        from ..search_cache import GetSearchCache
+        options = dict(kwargs, duration=duration)
+        if sort_by is not None:
+            # Left out otherwise, so each site keeps its own default order
+            options["sort_by"] = sort_by
+        return GetSearchCache().fetch(
+            self.get_site_name(), query, page, sort_by, duration,
+            lambda: self.search(query, page=page, **options),
+            **kwargs
+        )
+    
     @staticmethod
     @abstractmethod
     def get_site_name() -> str:
@@ -7,13 +7,16 @@ import concurrent.futures
 import time
 from pathlib import Path
 from typing import Dict, List, Optional, Callable, Any
-from bs4 import BeautifulSoup
 
 from .base import BaseSiteDownloader, BaseSiteSearch
+from ..html_parser import ParseHTML
+from ..metrics import chunk_seconds, downloaded_bytes, ObserveResponse
 
 
 class EpornerDownloader(BaseSiteDownloader):
     
+    VIDEO_ID_PATTERNS = (r'/video-([^/]+)/', r'/hd-porn/([^/]+)/')
+    
     def __init__(self):
         self.session = requests.Session()
         self.headers = {
@@ -32,7 +35,8 @@ class EpornerDownloader(BaseSiteDownloader):
         filename: Optional[str] = None,
         keep_original: bool = False,
         proxy: Optional[str] = None,
-        on_progress: Optional[Callable[[int, int], None]] = None
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        metadata: Optional[Dict[str, str]] = None
     ) -> str:
 
         title, links = self._extract_info(url)
@@ -53,7 +57,7 @@ class EpornerDownloader(BaseSiteDownloader):
         
         self._download_manager(final_url, str(output_file), on_progress)
         
-        return str(output_file)
+        return self._apply_metadata(str(output_file), metadata, title)
     
     def get_info(self, url: str) -> Dict[str, Any]:
 
@@ -270,7 +274,9 @@ class EpornerDownloader(BaseSiteDownloader):
         headers = self.session.headers.copy()
         headers['Range'] = f'bytes={start}-{end}'
         
+        started = time.perf_counter()
         response = self.session.get(url, headers=headers, stream=True, timeout=20)
+        ObserveResponse("eporner", response.status_code)
         response.raise_for_status()
         
         with open(filename, 'r+b') as f:
@@ -280,6 +286,8 @@ class EpornerDownloader(BaseSiteDownloader):
                 if chunk:
                     f.write(chunk)
                     total_written += len(chunk)
+        chunk_seconds.observe(time.perf_counter() - started, site="eporner")
+        downloaded_bytes.inc(total_written, site="eporner")
         return total_written
     
     def _download_single(self, url: str, filename: str):
@@ -295,11 +303,7 @@ class EpornerDownloader(BaseSiteDownloader):
         return re.sub(r'[\\/*?:"<>|]', "", title)
     
     def _extract_video_id(self, url: str) -> str:
-
-        match = re.search(r'/video-([^/]+)/', url)
-        if match:
-            return match.group(1)
-        return "unknown"
+        return self.get_video_id(url) or "unknown"
 
 
 class EpornerSearch(BaseSiteSearch):
@@ -338,31 +342,31 @@ class EpornerSearch(BaseSiteSearch):
             response = self.session.get(search_url, params=params, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = ParseHTML(response.text, parse_only=('div', 'mb'))
             results = []
             
-            video_items = soup.find_all('div', class_='mb')
+            video_items = soup.select('div.mb')
             
             for item in video_items[:50]:
                 try:
-                    link_elem = item.find('a', href=True)
+                    link_elem = item.select_one('a[href]')
                     if not link_elem:
                         continue
                     
-                    video_url = link_elem['href']
+                    video_url = link_elem.get('href')
                     if not video_url.startswith('http'):
                         video_url = self.base_url + video_url
                     
-                    title_elem = link_elem.get('title') or link_elem.text.strip()
+                    title_elem = link_elem.get('title') or link_elem.text().strip()
                     
-                    img_elem = item.find('img')
+                    img_elem = item.select_one('img')
                     thumbnail = img_elem.get('src', '') if img_elem else ''
                     
-                    duration_elem = item.find('div', class_='mbtim')
-                    duration_str = duration_elem.text.strip() if duration_elem else ''
+                    duration_elem = item.select_one('div.mbtim')
+                    duration_str = duration_elem.text().strip() if duration_elem else ''
                     
-                    views_elem = item.find('div', class_='mbvie')
-                    views_str = views_elem.text.strip() if views_elem else ''
+                    views_elem = item.select_one('div.mbvie')
+                    views_str = views_elem.text().strip() if views_elem else ''
                     
                     results.append({
                         "title": title_elem if isinstance(title_elem, str) else title_elem,
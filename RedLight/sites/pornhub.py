@@ -8,6 +8,8 @@ from ..search import PornHubSearch as OriginalPornHubSearch
 
 class PornHubDownloader(BaseSiteDownloader):
     
+    VIDEO_ID_PATTERNS = (r'viewkey=([a-zA-Z0-9]+)', r'/shorties/([a-zA-Z0-9]+)')
+    
     def download(
         self,
         url: str,
@@ -16,7 +18,8 @@ class PornHubDownloader(BaseSiteDownloader):
         filename: Optional[str] = None,
         keep_original: bool = False,
         proxy: Optional[str] = None,
-        on_progress: Optional[Callable[[int, int], None]] = None
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        metadata: Optional[Dict[str, str]] = None
     ) -> str:
 
         output_path = Path(output_dir)
@@ -30,7 +33,9 @@ class PornHubDownloader(BaseSiteDownloader):
             output_name=str(output_file) if output_file else None,
             keep_ts=keep_original,
             proxy=proxy,
-            progress_callback=on_progress
+            progress_callback=on_progress,
+            metadata=metadata,
+            site="pornhub"
         )
         
         streams = downloader.extract_video_info(url)
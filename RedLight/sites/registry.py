@@ -78,6 +78,21 @@ class SiteRegistry:
                 return site_info["name"]
         return None
     
+    def get_video_key(self, url: str) -> Optional[str]:
+        for site_info in self._sites.values():
+            downloader_class = site_info["downloader"]
+            if downloader_class.is_supported_url(url):
+                video_id = downloader_class.get_video_id(url)
+                return f"{site_info['name']}:{video_id}" if video_id else None
+        return None
+
+    def needs_browser(self, url: str) -> bool:
+        for site_info in self._sites.values():
+            downloader_class = site_info["downloader"]
+            if downloader_class.is_supported_url(url):
+                return downloader_class.BROWSER_FALLBACK
+        return False
+
     def is_supported_url(self, url: str) -> bool:
         return self.detect_site(url) is not None
     
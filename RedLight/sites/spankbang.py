@@ -9,7 +9,6 @@ import ast
 import html
 from pathlib import Path
 from typing import Dict, List, Optional, Callable, Any
-from bs4 import BeautifulSoup
 
 try:
     from selenium import webdriver
@@ -21,10 +20,16 @@ except ImportError:
     SELENIUM_AVAILABLE = False
 
 from .base import BaseSiteDownloader, BaseSiteSearch
+from ..html_parser import ParseHTML
+from ..metrics import chunk_seconds, downloaded_bytes, ObserveResponse
+from ..metadata import BuildFFmpegMetadataArgs, ResolvedThumbnail
 
 
 class SpankBangDownloader(BaseSiteDownloader):
     
+    VIDEO_ID_PATTERNS = (r'spankbang\.com/([a-z0-9]+)/(?:video|play)/',)
+    BROWSER_FALLBACK = True
+    
     def __init__(self):
         self.session = requests.Session()
         self.headers = {
@@ -42,7 +47,8 @@ class SpankBangDownloader(BaseSiteDownloader):
         filename: Optional[str] = None,
         keep_original: bool = False,
         proxy: Optional[str] = None,
-        on_progress: Optional[Callable[[int, int], None]] = None
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        metadata: Optional[Dict[str, str]] = None
     ) -> str:
         
         title, links = self._extract_info(url)
@@ -60,11 +66,12 @@ class SpankBangDownloader(BaseSiteDownloader):
             output_file = output_path / f"{self._sanitize_filename(title)}_{clean_quality}.mp4"
             
         if 'm3u8' in download_url:
-            self._download_hls_ffmpeg(download_url, str(output_file))
-        else:
-            self._download_manager(download_url, str(output_file), on_progress)
+            tags = {'title': title, **metadata} if metadata is not None else None
+            return self._download_hls_ffmpeg(download_url, str(output_file), tags)
+        
+        self._download_manager(download_url, str(output_file), on_progress)
             
-        return str(output_file)
+        return self._apply_metadata(str(output_file), metadata, title)
     
     def get_info(self, url: str) -> Dict[str, Any]:
         title, links = self._extract_info(url)
@@ -288,7 +295,9 @@ class SpankBangDownloader(BaseSiteDownloader):
     def _download_chunk(self, url: str, filename: str, start: int, end: int) -> int:
         headers = self.session.headers.copy()
         headers['Range'] = f'bytes={start}-{end}'
+        started = time.perf_counter()
         response = self.session.get(url, headers=headers, stream=True, timeout=20)
+        ObserveResponse("spankbang", response.status_code)
         
         with open(filename, 'r+b') as f:
             f.seek(start)
@@ -296,13 +305,23 @@ class SpankBangDownloader(BaseSiteDownloader):
             for chunk in response.iter_content(chunk_size=8192):
                 f.write(chunk)
                 total += len(chunk)
+        chunk_seconds.observe(time.perf_counter() - started, site="spankbang")
+        downloaded_bytes.inc(total, site="spankbang")
         return total
 
-    def _download_hls_ffmpeg(self, url: str, filename: str):
+    def _download_hls_ffmpeg(self, url: str, filename: str, metadata: Optional[Dict[str, str]] = None) -> str:
         if not shutil.which("ffmpeg"):
             raise RuntimeError("FFmpeg not found")
-        cmd = ['ffmpeg', '-y', '-i', url, '-c', 'copy', '-bsf:a', 'aac_adtstoasc', filename]
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with ResolvedThumbnail((metadata or {}).get('thumbnail'), Path(filename)) as thumbnail:
+            input_args, output_args = BuildFFmpegMetadataArgs(metadata, thumbnail)
+            cmd = [
+                'ffmpeg', '-y', '-i', url, *input_args,
+                '-c', 'copy', '-bsf:a', 'aac_adtstoasc',
+                *output_args, '-movflags', '+faststart', filename
+            ]
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        
+        return filename
         
     def _sanitize_filename(self, title: str) -> str:
         return re.sub(r'[\\/*?:"<>|]', "", title)
@@ -336,7 +355,7 @@ class SpankBangSearch(BaseSiteSearch):
             return []
 
     def _parse_results(self, html_content: str) -> List[Dict[str, Any]]:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = ParseHTML(html_content)
         results = []
         
         items = soup.select('div[data-testid="video-item"]')
@@ -345,13 +364,13 @@ class SpankBangSearch(BaseSiteSearch):
             
         for item in items:
             try:
-                link = item.find('a', href=True)
+                link = item.select_one('a[href]')
                 if not link: continue
                 
-                href = link['href']
+                href = link.get('href')
                 if not href.startswith('http'): href = self.base_url + href
                 
-                img = item.find('img')
+                img = item.select_one('img')
                 title = link.get('title') or (img.get('alt') if img else None) or "Unknown Video"
                 
                 thumb = ''
@@ -361,10 +380,10 @@ class SpankBangSearch(BaseSiteSearch):
                 duration = ''
                 dur_elem = item.select_one('[data-testid="video-item-length"]')
                 if dur_elem:
-                    duration = dur_elem.text.strip()
+                    duration = dur_elem.text().strip()
                 else:
                     dur_elem = item.select_one('span.l')
-                    if dur_elem: duration = dur_elem.text.strip()
+                    if dur_elem: duration = dur_elem.text().strip()
                 
                 results.append({
                     "title": title,
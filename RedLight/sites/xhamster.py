@@ -4,14 +4,16 @@ import time
 from pathlib import Path
 from typing import Dict, List, Optional, Callable, Any
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
 
 from .base import BaseSiteDownloader, BaseSiteSearch
+from ..html_parser import ParseHTML
 from ..downloader import CustomHLSDownloader
 
 
 class XHamsterDownloader(BaseSiteDownloader):
     
+    VIDEO_ID_PATTERNS = (r'/videos/([^/?#]+)',)
+    
     FALLBACK_DOMAINS = ['xhamster2.com', 'xhamster.desi', 'xhamster3.com']
     
     def __init__(self):
@@ -40,7 +42,8 @@ class XHamsterDownloader(BaseSiteDownloader):
         filename: Optional[str] = None,
         keep_original: bool = False,
         proxy: Optional[str] = None,
-        on_progress: Optional[Callable[[int, int], None]] = None
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        metadata: Optional[Dict[str, str]] = None
     ) -> str:
         
         output_path = Path(output_dir)
@@ -60,7 +63,9 @@ class XHamsterDownloader(BaseSiteDownloader):
             headers=self.headers,
             keep_ts=keep_original,
             proxy=proxy,
-            progress_callback=on_progress
+            progress_callback=on_progress,
+            metadata={'title': title, **metadata} if metadata is not None else None,
+            site="xhamster"
         )
         
         result_path = downloader.download_stream(hls_url, preferred_quality=quality)
@@ -190,11 +195,7 @@ class XHamsterDownloader(BaseSiteDownloader):
         return cleaned[:200] if cleaned else f"video_{int(time.time())}"
     
     def _extract_video_id(self, url: str) -> str:
-        
-        match = re.search(r'/videos/([^/]+)', url)
-        if match:
-            return match.group(1)
-        return "unknown"
+        return self.get_video_id(url) or "unknown"
 
 
 class XHamsterSearch(BaseSiteSearch):
@@ -226,7 +227,7 @@ class XHamsterSearch(BaseSiteSearch):
             response = self.session.get(search_url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = ParseHTML(response.text)
             results = []
             
             video_items = soup.select('div.thumb-list__item, article.thumb-list__item')
@@ -236,11 +237,11 @@ class XHamsterSearch(BaseSiteSearch):
             
             for item in video_items[:30]:
                 try:
-                    link_elem = item.find('a', href=True)
+                    link_elem = item.select_one('a[href]')
                     if not link_elem:
                         continue
                     
-                    video_url = link_elem['href']
+                    video_url = link_elem.get('href')
                     if not video_url.startswith('http'):
                         video_url = urljoin(self.base_url, video_url)
                     
@@ -250,22 +251,22 @@ class XHamsterSearch(BaseSiteSearch):
                     title = link_elem.get('title', '')
                     if not title:
                         title_elem = item.select_one('.video-thumb-info__name, .thumb-image-container__title')
-                        title = title_elem.text.strip() if title_elem else ''
+                        title = title_elem.text().strip() if title_elem else ''
                     
                     if not title:
-                        img_elem = item.find('img')
+                        img_elem = item.select_one('img')
                         title = img_elem.get('alt', '') if img_elem else 'Unknown'
                     
-                    thumb_elem = item.find('img')
+                    thumb_elem = item.select_one('img')
                     thumbnail = ''
                     if thumb_elem:
                         thumbnail = thumb_elem.get('src') or thumb_elem.get('data-src') or ''
                     
                     duration_elem = item.select_one('.thumb-image-container__duration, .duration')
-                    duration_str = duration_elem.text.strip() if duration_elem else ''
+                    duration_str = duration_elem.text().strip() if duration_elem else ''
                     
                     views_elem = item.select_one('.video-thumb-info__views, .views')
-                    views_str = views_elem.text.strip() if views_elem else ''
+                    views_str = views_elem.text().strip() if views_elem else ''
                     
                     results.append({
                         "title": title.strip(),
@@ -9,10 +9,15 @@ from typing import Dict, List, Optional, Callable, Any
 from urllib.parse import unquote
 
 from .base import BaseSiteDownloader, BaseSiteSearch
+from ..html_parser import ParseHTML
+from ..metrics import chunk_seconds, downloaded_bytes, ObserveResponse
+from ..metadata import BuildFFmpegMetadataArgs, ResolvedThumbnail
 
 
 class XNXXDownloader(BaseSiteDownloader):
     
+    VIDEO_ID_PATTERNS = (r'/video-([a-z0-9]+)/',)
+    
     def __init__(self):
         self.session = requests.Session()
         self.headers = {
@@ -29,7 +34,8 @@ class XNXXDownloader(BaseSiteDownloader):
         filename: Optional[str] = None,
         keep_original: bool = False,
         proxy: Optional[str] = None,
-        on_progress: Optional[Callable[[int, int], None]] = None
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        metadata: Optional[Dict[str, str]] = None
     ) -> str:
         
         output_path = Path(output_dir)
@@ -47,11 +53,12 @@ class XNXXDownloader(BaseSiteDownloader):
             output_file = output_path / f"{safe_title}_{selected_quality.replace(' ','')}{ext}"
         
         if '.m3u8' in selected_url:
-            self._download_hls_ffmpeg(selected_url, str(output_file))
-        else:
-            self._download_with_progress(selected_url, str(output_file), on_progress)
+            tags = {'title': title, **metadata} if metadata is not None else None
+            return self._download_hls_ffmpeg(selected_url, str(output_file), tags)
+        
+        self._download_with_progress(selected_url, str(output_file), on_progress)
         
-        return str(output_file)
+        return self._apply_metadata(str(output_file), metadata, title)
     
     def get_info(self, url: str) -> Dict[str, Any]:
         
@@ -164,7 +171,7 @@ class XNXXDownloader(BaseSiteDownloader):
             
             return list(links.keys())[0], list(links.values())[0]
     
-    def _download_hls_ffmpeg(self, url: str, filename: str):
+    def _download_hls_ffmpeg(self, url: str, filename: str, metadata: Optional[Dict[str, str]] = None) -> str:
         
         if not shutil.which("ffmpeg"):
             raise RuntimeError("FFmpeg is required for HLS downloads. Please install FFmpeg.")
@@ -172,8 +179,16 @@ class XNXXDownloader(BaseSiteDownloader):
         if not filename.endswith(".mp4"):
             filename = filename.replace(".ts", ".mp4")
         
-        cmd = ['ffmpeg', '-y', '-i', url, '-c', 'copy', '-bsf:a', 'aac_adtstoasc', filename]
-        subprocess.run(cmd, check=True, capture_output=True)
+        with ResolvedThumbnail((metadata or {}).get('thumbnail'), Path(filename)) as thumbnail:
+            input_args, output_args = BuildFFmpegMetadataArgs(metadata, thumbnail)
+            cmd = [
+                'ffmpeg', '-y', '-i', url, *input_args,
+                '-c', 'copy', '-bsf:a', 'aac_adtstoasc',
+                *output_args, '-movflags', '+faststart', filename
+            ]
+            subprocess.run(cmd, check=True, capture_output=True)
+        
+        return filename
     
     def _download_with_progress(
         self,
@@ -224,7 +239,9 @@ class XNXXDownloader(BaseSiteDownloader):
         headers = self.session.headers.copy()
         headers['Range'] = f'bytes={start}-{end}'
         
+        started = time.perf_counter()
         response = self.session.get(url, headers=headers, stream=True, timeout=30)
+        ObserveResponse("xnxx", response.status_code)
         response.raise_for_status()
         
         with open(filename, 'r+b') as f:
@@ -235,6 +252,8 @@ class XNXXDownloader(BaseSiteDownloader):
                     f.write(chunk)
                     written += len(chunk)
         
+        chunk_seconds.observe(time.perf_counter() - started, site="xnxx")
+        downloaded_bytes.inc(written, site="xnxx")
         return written
     
     def _download_single(self, url: str, filename: str):
@@ -253,11 +272,7 @@ class XNXXDownloader(BaseSiteDownloader):
         return cleaned[:200] if cleaned else f"video_{int(time.time())}"
     
     def _extract_video_id(self, url: str) -> str:
-        
-        match = re.search(r'/video-([a-z0-9]+)/', url)
-        if match:
-            return match.group(1)
-        return "unknown"
+        return self.get_video_id(url) or "unknown"
 
 
 class XNXXSearch(BaseSiteSearch):
@@ -287,39 +302,38 @@ class XNXXSearch(BaseSiteSearch):
             response = self.session.get(search_url, timeout=10)
             response.raise_for_status()
             
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = ParseHTML(response.text, parse_only=('div', 'thumb-block'))
             results = []
             
-            video_items = soup.find_all('div', class_='thumb-block')
+            video_items = soup.select('div.thumb-block')
             
             for item in video_items[:20]:
                 try:
-                    link_elem = item.find('a', href=True)
+                    link_elem = item.select_one('a[href]')
                     if not link_elem:
                         continue
                     
-                    video_url = link_elem['href']
+                    video_url = link_elem.get('href')
                     if not video_url.startswith('http'):
                         video_url = self.base_url + video_url
                     
                     title = link_elem.get('title', '').strip()
                     if not title:
-                        title_elem = item.find('p', class_='title')
+                        title_elem = item.select_one('p.title')
                         if title_elem:
-                            title = title_elem.get_text(strip=True)
+                            title = title_elem.text(strip=True)
                     if not title:
                         url_match = re.search(r'/video-[^/]+/(.+)$', video_url)
                         if url_match:
                             title = url_match.group(1).replace('_', ' ').replace('-', ' ')
                     
-                    thumb_elem = item.find('img')
+                    thumb_elem = item.select_one('img')
                     thumbnail = ''
                     if thumb_elem:
                         thumbnail = thumb_elem.get('data-src') or thumb_elem.get('src') or ''
                     
-                    duration_elem = item.find('span', class_='duration')
-                    duration_str = duration_elem.text.strip() if duration_elem else ''
+                    duration_elem = item.select_one('span.duration')
+                    duration_str = duration_elem.text().strip() if duration_elem else ''
                     
                     results.append({
                         "title": title,
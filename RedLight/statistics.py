@@ -1,162 +1,148 @@
+import copy
 import sqlite3
+import threading
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from collections import defaultdict
+from typing import Dict, List, Optional, Any, Callable, Tuple
 
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich import box
 
+from .storage import GetStorage
+
 
 class DownloadStatistics:
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, cache_ttl: float = 2.0):
         self.db_path = Path(db_path) if db_path else Path.home() / ".RedLight" / "history.db"
         self.console = Console()
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[Any, Tuple[float, Any]] = {}
+        self._cache_lock = threading.Lock()
+        self._migrated = False
     
     def _get_connection(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+        if not self._migrated:
+            # Make sure the rollup tables exist for databases created by older versions
+            from .database import DatabaseManager
+            DatabaseManager(self.db_path)
+            self._migrated = True
+        return GetStorage(self.db_path).connection()
+    
+    def _cached(self, key: Any, loader: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry and now - entry[0] < self.cache_ttl:
+                return copy.deepcopy(entry[1])
+        
+        value = loader()
+        with self._cache_lock:
+            self._cache[key] = (now, value)
+        return copy.deepcopy(value)
+    
+    def invalidate(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def rebuild(self) -> int:
+        from .database import DatabaseManager
+        count = DatabaseManager(self.db_path).rebuild_stats()
+        self.invalidate()
+        return count
     
     def get_summary(self) -> Dict[str, Any]:
         if not self.db_path.exists():
             return {"total_downloads": 0, "total_size": 0, "avg_quality": 0, 
                     "top_site": None, "first_download": None, "last_download": None}
-        
-        conn = self._get_connection()
-        c = conn.cursor()
+        return self._cached("summary", self._load_summary)
+    
+    def _load_summary(self) -> Dict[str, Any]:
         result = {"total_downloads": 0, "total_size": 0, "avg_quality": 0,
                   "top_site": None, "first_download": None, "last_download": None}
         
         try:
-            c.execute('SELECT COUNT(*) FROM history')
-            result["total_downloads"] = c.fetchone()[0]
-            
-            if result["total_downloads"] == 0:
+            c = self._get_connection().cursor()
+            c.execute('''SELECT downloads, total_size, quality_sum, quality_count, first_download, last_download
+                        FROM stats_totals WHERE id = 1''')
+            row = c.fetchone()
+            if not row or row[0] == 0:
                 return result
             
-            try:
-                c.execute('SELECT SUM(file_size) FROM history WHERE file_size IS NOT NULL')
-                size = c.fetchone()[0]
-                result["total_size"] = size if size else 0
-            except sqlite3.OperationalError:
-                pass
+            downloads, total_size, quality_sum, quality_count, first, last = row
+            result["total_downloads"] = downloads
+            result["total_size"] = total_size or 0
+            result["avg_quality"] = int(quality_sum / quality_count) if quality_count and quality_sum else 0
+            result["first_download"], result["last_download"] = first, last
             
-            c.execute('SELECT AVG(CAST(quality AS INTEGER)) FROM history WHERE quality IS NOT NULL')
-            avg = c.fetchone()[0]
-            result["avg_quality"] = int(avg) if avg else 0
-            
-            try:
-                c.execute('''SELECT site, COUNT(*) as count FROM history 
-                            WHERE site IS NOT NULL GROUP BY site ORDER BY count DESC LIMIT 1''')
-                row = c.fetchone()
-                result["top_site"] = row[0] if row else None
-            except sqlite3.OperationalError:
-                pass
-            
-            c.execute('SELECT MIN(date_downloaded), MAX(date_downloaded) FROM history')
+            c.execute('SELECT site FROM stats_site ORDER BY downloads DESC LIMIT 1')
             row = c.fetchone()
-            if row:
-                result["first_download"], result["last_download"] = row
+            result["top_site"] = row[0] if row else None
         except Exception:
             pass
-        finally:
-            conn.close()
         
         return result
     
     def get_by_site(self) -> Dict[str, Dict[str, Any]]:
         if not self.db_path.exists():
             return {}
-        
-        conn = self._get_connection()
-        c = conn.cursor()
+        return self._cached("by_site", self._load_by_site)
+    
+    def _load_by_site(self) -> Dict[str, Dict[str, Any]]:
         result = {}
         
         try:
-            c.execute("PRAGMA table_info(history)")
-            columns = [col[1] for col in c.fetchall()]
+            c = self._get_connection().cursor()
+            c.execute('SELECT site, downloads, total_size, quality_sum, quality_count FROM stats_site')
             
-            if 'site' not in columns:
-                c.execute('SELECT url, quality FROM history')
-                site_data = defaultdict(lambda: {"count": 0, "qualities": []})
-                
-                for url, quality in c.fetchall():
-                    site = self._infer_site(url)
-                    site_data[site]["count"] += 1
-                    if quality:
-                        try:
-                            site_data[site]["qualities"].append(int(quality))
-                        except ValueError:
-                            pass
-                
-                for site, data in site_data.items():
-                    result[site] = {
-                        "count": data["count"], "size": 0,
-                        "avg_quality": int(sum(data["qualities"]) / len(data["qualities"])) if data["qualities"] else 0
-                    }
-            else:
-                c.execute('''SELECT site, COUNT(*), COALESCE(SUM(file_size), 0), AVG(CAST(quality AS INTEGER))
-                            FROM history WHERE site IS NOT NULL GROUP BY site''')
-                
-                for site, count, size, avg_quality in c.fetchall():
-                    result[site] = {"count": count, "size": size or 0, "avg_quality": int(avg_quality) if avg_quality else 0}
+            for site, count, size, quality_sum, quality_count in c.fetchall():
+                avg_quality = int(quality_sum / quality_count) if quality_count and quality_sum else 0
+                result[site] = {"count": count, "size": size or 0, "avg_quality": avg_quality}
         except Exception:
             pass
-        finally:
-            conn.close()
         
         return result
     
-    def _infer_site(self, url: str) -> str:
-        if not url:
-            return "unknown"
-        url = url.lower()
-        for site in ["pornhub", "eporner", "spankbang", "xvideos"]:
-            if site in url:
-                return site
-        return "unknown"
-    
     def get_by_quality(self) -> Dict[str, int]:
         if not self.db_path.exists():
             return {}
-        
-        conn = self._get_connection()
-        c = conn.cursor()
+        return self._cached("by_quality", self._load_by_quality)
+    
+    def _load_by_quality(self) -> Dict[str, int]:
         result = {}
         
         try:
-            c.execute('''SELECT quality, COUNT(*) FROM history WHERE quality IS NOT NULL 
-                        GROUP BY quality ORDER BY CAST(quality AS INTEGER) DESC''')
+            c = self._get_connection().cursor()
+            c.execute('''SELECT quality, downloads FROM stats_quality
+                        ORDER BY CAST(quality AS INTEGER) DESC''')
             for quality, count in c.fetchall():
                 result[str(quality)] = count
         except Exception:
             pass
-        finally:
-            conn.close()
         
         return result
     
     def get_by_date(self, days: int = 30) -> List[Dict[str, Any]]:
         if not self.db_path.exists():
             return []
-        
-        conn = self._get_connection()
-        c = conn.cursor()
+        return self._cached(("by_date", days), lambda: self._load_by_date(days))
+    
+    def _load_by_date(self, days: int) -> List[Dict[str, Any]]:
         result = []
         
         try:
+            c = self._get_connection().cursor()
             cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-            c.execute('''SELECT DATE(date_downloaded) as d, COUNT(*) FROM history 
-                        WHERE DATE(date_downloaded) >= ? GROUP BY d ORDER BY d DESC''', (cutoff,))
+            c.execute('''SELECT day, downloads, total_size FROM stats_daily
+                        WHERE day >= ? ORDER BY day DESC''', (cutoff,))
             
-            for date_str, count in c.fetchall():
-                result.append({"date": date_str, "count": count, "size": 0})
+            for date_str, count, size in c.fetchall():
+                result.append({"date": date_str, "count": count, "size": size or 0})
         except Exception:
             pass
-        finally:
-            conn.close()
         
         return result
     
@@ -175,8 +161,6 @@ class DownloadStatistics:
                 result.append({"query": query, "count": count, "last_searched": last})
         except Exception:
             pass
-        finally:
-            conn.close()
         
         return result
     
@@ -200,8 +184,6 @@ class DownloadStatistics:
                 result["searches_by_site"][site] = count
         except Exception:
             pass
-        finally:
-            conn.close()
         
         return result
     
@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from .metrics import sqlite_write_seconds
+
+
+Migration = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+class Storage:
+
+    def __init__(self, db_path: Union[str, Path], busy_timeout: float = 10.0, cached_statements: int = 256):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.label = self.db_path.stem
+        self._local = threading.local()
+        self._migrate_lock = threading.Lock()
+        self._version_table_ready = False
+
+    def connection(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 keeps compiled statements cached
+        # on the connection, so reusing it also reuses the prepared statements
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                cached_statements=self.cached_statements
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers
+        # wait on busy_timeout instead of failing on a lock upgrade
+        conn = self.connection()
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+            sqlite_write_seconds.observe(time.perf_counter() - started, db=self.label)
+
+    def execute(self, sql: str, params: Sequence = ()) -> sqlite3.Cursor:
+        conn = self.connection()
+        if conn.in_transaction or sql.lstrip()[:6].upper() == "SELECT":
+            return conn.execute(sql, params)
+        # Autocommit write: the statement itself is the transaction
+        started = time.perf_counter()
+        cursor = conn.execute(sql, params)
+        sqlite_write_seconds.observe(time.perf_counter() - started, db=self.label)
+        return cursor
+
+    def executemany(self, sql: str, rows: Iterable[Sequence]) -> int:
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        return self.connection().execute(sql, params).fetchone()
+
+    def schema_version(self, component: str) -> int:
+        self._ensure_version_table()
+        row = self.query_one("SELECT version FROM schema_version WHERE component = ?", (component,))
+        return row[0] if row else 0
+
+    def migrate(self, component: str, migrations: List[Migration]) -> int:
+        # migrations[i] upgrades the component from version i to i + 1.
+        # Callers run this on every construction, so an up-to-date schema is
+        # a plain read and never takes the write lock
+        version = self.schema_version(component)
+        if version >= len(migrations):
+            return version
+
+        with self._migrate_lock:
+            with self.transaction() as conn:
+                # Re-read under the write lock: another thread or process may have migrated
+                row = conn.execute(
+                    "SELECT version FROM schema_version WHERE component = ?", (component,)
+                ).fetchone()
+                version = row[0] if row else 0
+                if version >= len(migrations):
+                    return version
+
+                for step in migrations[version:]:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                    version += 1
+
+                conn.execute(
+                    "INSERT INTO schema_version (component, version, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(component) DO UPDATE SET version = excluded.version, updated_at = excluded.updated_at",
+                    (component, version, datetime.now().isoformat())
+                )
+            return version
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _ensure_version_table(self):
+        if self._version_table_ready:
+            return
+        self.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                component TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                updated_at TIMESTAMP
+            )
+        ''')
+        self._version_table_ready = True
+
+
+_storages: Dict[Path, Storage] = {}
+_storages_lock = threading.Lock()
+
+
+def GetStorage(db_path: Union[str, Path]) -> Storage:
+    path = Path(db_path).expanduser().resolve()
+    with _storages_lock:
+        storage = _storages.get(path)
+        if storage is None:
+            storage = Storage(path)
+            _storages[path] = storage
+        return storage
@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+from typing import Dict, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+TS_PACKET_SIZE = 188
+TS_SYNC_BYTE = 0x47
+NULL_PID = 0x1FFF
+PCR_WRAP = (1 << 33) * 300
+
+_FMP4_BOXES = (b'ftyp', b'styp', b'moof', b'sidx', b'moov')
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+@dataclass
+class TsValidationResult:
+    valid: bool
+    packets: int = 0
+    reason: str = ""
+    continuity_errors: int = 0
+    pcr_errors: int = 0
+
+    def __bool__(self) -> bool:
+        return self.valid
+
+
+def _id3_length(data: BytesLike) -> int:
+    # HLS packed audio and some CDNs prepend an ID3v2 tag with timing metadata
+    if len(data) < 10 or bytes(data[:3]) != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _looks_like_text(data: BytesLike) -> bool:
+    head = bytes(data[:64]).lstrip()
+    return head[:1] in (b'<', b'{') or head[:9].upper() == b'<!DOCTYPE'
+
+
+def parse_packet_headers(packets) -> Dict[str, "np.ndarray"]:
+    pid = ((packets[:, 1].astype(np.uint16) & 0x1F) << 8) | packets[:, 2]
+    afc = (packets[:, 3] >> 4) & 0x3
+    has_af = (afc & 0x2) != 0
+    af_len = np.where(has_af, packets[:, 4], 0).astype(np.int32)
+    af_flags = np.where(has_af & (af_len > 0), packets[:, 5], 0)
+
+    return {
+        "pid": pid,
+        "pusi": (packets[:, 1] & 0x40) != 0,
+        "cc": packets[:, 3] & 0x0F,
+        "has_payload": (afc & 0x1) != 0,
+        "has_af": has_af,
+        "af_len": af_len,
+        "discontinuity": (af_flags & 0x80) != 0,
+        "pcr_flag": (af_flags & 0x10) != 0,
+        "payload_offset": np.where(has_af, 5 + af_len, 4),
+    }
+
+
+def _pcr_values_numpy(rows) -> "np.ndarray":
+    b = rows[:, 6:12].astype(np.int64)
+    base = (b[:, 0] << 25) | (b[:, 1] << 17) | (b[:, 2] << 9) | (b[:, 3] << 1) | (b[:, 4] >> 7)
+    ext = ((b[:, 4] & 0x1) << 8) | b[:, 5]
+    return base * 300 + ext
+
+
+def _per_pid_steps(pids, values, discontinuity):
+    # Stable sort keeps stream order inside each PID, so neighbours that share a
+    # PID are consecutive packets of that elementary stream.
+    order = np.argsort(pids, kind='stable')
+    sorted_pids = pids[order]
+    same_pid = sorted_pids[1:] == sorted_pids[:-1]
+    sorted_values = values[order]
+    return same_pid, sorted_values[:-1], sorted_values[1:], discontinuity[order][1:]
+
+
+def _validate_numpy(data: BytesLike, count: int, check_continuity: bool, check_pcr: bool) -> TsValidationResult:
+    packets = np.frombuffer(data, dtype=np.uint8, count=count * TS_PACKET_SIZE).reshape(count, TS_PACKET_SIZE)
+
+    lost_sync = np.flatnonzero(packets[:, 0] != TS_SYNC_BYTE)
+    if lost_sync.size:
+        return TsValidationResult(False, count, f"lost sync at packet {int(lost_sync[0])}")
+
+    headers = parse_packet_headers(packets)
+    malformed = np.flatnonzero(headers["payload_offset"] > TS_PACKET_SIZE)
+    if malformed.size:
+        return TsValidationResult(False, count, f"malformed adaptation field at packet {int(malformed[0])}")
+
+    result = TsValidationResult(True, count)
+
+    if check_continuity:
+        mask = headers["has_payload"] & (headers["pid"] != NULL_PID)
+        same_pid, prev_cc, cc, disc = _per_pid_steps(
+            headers["pid"][mask], headers["cc"][mask], headers["discontinuity"][mask]
+        )
+        ok = (cc == ((prev_cc + 1) & 0x0F)) | (cc == prev_cc) | disc
+        result.continuity_errors = int(np.count_nonzero(same_pid & ~ok))
+
+    if check_pcr:
+        mask = headers["pcr_flag"] & (headers["af_len"] >= 7)
+        if np.count_nonzero(mask) > 1:
+            same_pid, prev_pcr, pcr, disc = _per_pid_steps(
+                headers["pid"][mask], _pcr_values_numpy(packets[mask]), headers["discontinuity"][mask]
+            )
+            delta = pcr - prev_pcr
+            backwards = (delta < 0) & (delta > -PCR_WRAP // 2) & ~disc
+            result.pcr_errors = int(np.count_nonzero(same_pid & backwards))
+
+    return result
+
+
+def _validate_python(data: BytesLike, count: int, check_continuity: bool, check_pcr: bool) -> TsValidationResult:
+    last_cc: Dict[int, int] = {}
+    last_pcr: Dict[int, int] = {}
+    result = TsValidationResult(True, count)
+
+    for index in range(count):
+        offset = index * TS_PACKET_SIZE
+        if data[offset] != TS_SYNC_BYTE:
+            return TsValidationResult(False, count, f"lost sync at packet {index}")
+
+        pid = ((data[offset + 1] & 0x1F) << 8) | data[offset + 2]
+        afc = (data[offset + 3] >> 4) & 0x3
+        cc = data[offset + 3] & 0x0F
+
+        discontinuity = False
+        pcr = None
+        if afc & 0x2:
+            af_len = data[offset + 4]
+            if 5 + af_len > TS_PACKET_SIZE:
+                return TsValidationResult(False, count, f"malformed adaptation field at packet {index}")
+            if af_len > 0:
+                flags = data[offset + 5]
+                discontinuity = bool(flags & 0x80)
+                if flags & 0x10 and af_len >= 7:
+                    b = data[offset + 6:offset + 12]
+                    base = (b[0] << 25) | (b[1] << 17) | (b[2] << 9) | (b[3] << 1) | (b[4] >> 7)
+                    pcr = base * 300 + (((b[4] & 0x1) << 8) | b[5])
+
+        if check_continuity and afc & 0x1 and pid != NULL_PID:
+            prev = last_cc.get(pid)
+            if prev is not None and not discontinuity and cc not in (prev, (prev + 1) & 0x0F):
+                result.continuity_errors += 1
+            last_cc[pid] = cc
+
+        if check_pcr and pcr is not None:
+            prev = last_pcr.get(pid)
+            if prev is not None and not discontinuity and -PCR_WRAP // 2 < pcr - prev < 0:
+                result.pcr_errors += 1
+            last_pcr[pid] = pcr
+
+    return result
+
+
+def ValidateTsSegment(
+    data: BytesLike,
+    check_continuity: bool = True,
+    check_pcr: bool = True
+) -> TsValidationResult:
+    if not data:
+        return TsValidationResult(False, 0, "empty segment")
+
+    start = _id3_length(data)
+    body = memoryview(data)[start:]
+
+    if len(body) >= 8 and bytes(body[4:8]) in _FMP4_BOXES:
+        return TsValidationResult(True, 0, "not mpeg-ts (fragmented mp4)")
+
+    if _looks_like_text(body):
+        return TsValidationResult(False, 0, "received HTML/text instead of MPEG-TS")
+
+    count, trailing = divmod(len(body), TS_PACKET_SIZE)
+    if count == 0:
+        return TsValidationResult(False, 0, f"truncated segment ({len(body)} bytes)")
+    if trailing:
+        return TsValidationResult(False, count, f"truncated segment ({trailing} trailing bytes)")
+
+    if NUMPY_AVAILABLE:
+        result = _validate_numpy(body, count, check_continuity, check_pcr)
+    else:
+        result = _validate_python(body, count, check_continuity, check_pcr)
+
+    if result.valid and result.continuity_errors:
+        result.valid = False
+        result.reason = f"{result.continuity_errors} continuity counter errors"
+    elif result.valid and result.pcr_errors:
+        result.valid = False
+        result.reason = f"{result.pcr_errors} non-monotonic PCR values"
+
+    return result
+
+
+def ValidateTsFile(path, check_continuity: bool = True, check_pcr: bool = True) -> TsValidationResult:
+    with open(path, 'rb') as f:
+        return ValidateTsSegment(f.read(), check_continuity, check_pcr)
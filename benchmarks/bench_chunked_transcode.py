@@ -0,0 +1,104 @@
+"""
+Chunked vs single-process transcoding benchmark
+
+Compresses the same input with VideoConverter.Compress twice, once as a
+single ffmpeg process and once split on keyframes and encoded across a
+pool, then reports wall time, speedup and a frame/duration check.
+
+Usage:
+    python benchmarks/bench_chunked_transcode.py
+    python benchmarks/bench_chunked_transcode.py --duration 600 --size 1920x1080
+    python benchmarks/bench_chunked_transcode.py --input movie.mp4 --workers 8
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from RedLight.converter import VideoConverter
+
+
+def make_input(path: Path, duration: int, size: str) -> None:
+    # Keyframe every 2s like typical HLS sources
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30",
+            "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000",
+            "-t", str(duration),
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "60",
+            "-c:a", "aac", "-b:a", "128k",
+            str(path)
+        ],
+        check=True
+    )
+
+
+def count_frames(path: Path) -> int:
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-progress", "pipe:1", "-i", str(path),
+         "-map", "0:v:0", "-f", "null", "-"],
+        capture_output=True, text=True, errors="replace"
+    )
+    matches = re.findall(r"^frame=(\d+)", result.stdout, re.MULTILINE)
+    return int(matches[-1]) if matches else -1
+
+
+def run(label: str, input_file: Path, output_file: Path, quality: int, chunked: bool, workers: int) -> float:
+    converter = VideoConverter()
+    start = time.perf_counter()
+    converter.Convert(
+        input_file=str(input_file),
+        compress_quality=quality,
+        output_file=str(output_file),
+        chunked=chunked,
+        chunk_workers=workers
+    )
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:8.2f}s  {output_file.stat().st_size / 1024 / 1024:8.1f} MB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="Existing video to compress (default: generate one)")
+    parser.add_argument("--duration", type=int, default=120, help="Generated input length in seconds")
+    parser.add_argument("--size", default="1280x720", help="Generated input resolution")
+    parser.add_argument("--quality", type=int, default=60, help="Compress quality (0-100)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Chunk encoder processes")
+    args = parser.parse_args()
+
+    if not VideoConverter.IsFFmpegAvailable():
+        sys.exit("ffmpeg not found in PATH")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        if args.input:
+            input_file = Path(args.input)
+        else:
+            input_file = tmp_path / "input.mp4"
+            print(f"Generating {args.duration}s {args.size} test input...")
+            make_input(input_file, args.duration, args.size)
+
+        print(f"CPUs: {os.cpu_count()}  workers: {args.workers}  quality: {args.quality}\n")
+
+        single_out = tmp_path / "single.mp4"
+        chunked_out = tmp_path / "chunked.mp4"
+        single = run("single", input_file, single_out, args.quality, False, args.workers)
+        chunked = run("chunked", input_file, chunked_out, args.quality, True, args.workers)
+
+        converter = VideoConverter()
+        print(f"\nspeedup: {single / chunked:.2f}x")
+        print(f"frames:   source={count_frames(input_file)} single={count_frames(single_out)} chunked={count_frames(chunked_out)}")
+        print(f"duration: single={converter.ProbeDuration(str(single_out))} chunked={converter.ProbeDuration(str(chunked_out))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+HTML parsing benchmark for search and playlist scraping
+
+Feeds the same page to every site searcher and playlist scraper once per
+HTML parser backend and reports the median time per page. The "legacy" row
+is the previous code path: a full html.parser tree with no parse_only
+filter. Every backend's results are compared with legacy, so a speedup
+that changes what gets scraped shows up as a mismatch.
+
+Pages are generated to look like real result pages (navigation, category
+lists, a large inline player config, ~40 result cards). To use saved real
+pages instead, put them in a directory as <case>.html, for example
+search-pornhub.html or playlist-xvideos.html, and pass --fixtures.
+
+Usage:
+    python benchmarks/bench_html_parsing.py
+    python benchmarks/bench_html_parsing.py --runs 50 --items 60
+    python benchmarks/bench_html_parsing.py --fixtures ./saved_pages
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from RedLight import html_parser
+from RedLight.html_parser import LXML_AVAILABLE, SELECTOLAX_AVAILABLE, SetParserBackend
+from RedLight.playlist import PlaylistDownloader
+from RedLight.search import PornHubSearch
+from RedLight.sites.eporner import EpornerSearch
+from RedLight.sites.spankbang import SpankBangSearch
+from RedLight.sites.xhamster import XHamsterSearch
+from RedLight.sites.xnxx import XNXXSearch
+from RedLight.sites.xvideos import XVideosSearch
+
+
+def pornhub_item(i):
+    return (
+        f'<li class="pcVideoListItem js-pop videoblock videoBox" data-video-id="{i}" data-video-vkey="ph{i:08x}">'
+        f'<div class="wrap"><div class="phimage"><a href="/view_video.php?viewkey=ph{i:08x}" title="Video title {i}" '
+        f'class="fade videoPreviewBg linkVideoThumb js-linkVideoThumb img" data-related-url="/video/ajax_related_video?vkey={i}">'
+        f'<img src="https://ei.phncdn.com/videos/{i}/thumb.jpg" data-mediumthumb="https://ei.phncdn.com/videos/{i}/m.jpg" '
+        f'alt="Video title {i}" width="258" height="145"></a>'
+        f'<div class="marker-overlays js-noFade"><var class="duration">{i % 50 + 1}:{i % 60:02d}</var></div></div>'
+        f'<div class="thumbnail-info-wrapper clearfix"><span class="title"><a href="/view_video.php?viewkey=ph{i:08x}" '
+        f'title="Video title {i}">Video title {i}</a></span><div class="videoUploaderBlock clearfix"><div class="usernameWrap">'
+        f'<a href="/model/uploader-{i}">Uploader {i}</a></div></div><div class="videoDetailsBlock">'
+        f'<div class="rating-container neutral"><div class="value">{70 + i % 30}%</div></div>'
+        f'<span class="views"><var>{i * 13}K</var> views</span></div></div></div></li>'
+    )
+
+
+def thumb_block_item(i):
+    return (
+        f'<div id="video_{i}" data-id="{i}" class="thumb-block thumb-block-profile">'
+        f'<div class="thumb-inside"><div class="thumb"><a href="/video{i}/video_title_{i}">'
+        f'<img src="https://static-cdn.example/img/lightbox/lightbox-blank.gif" '
+        f'data-src="https://thumb-cdn.example/videos/thumbs169/{i}/{i}.jpg" data-idcdn="1" data-videoid="{i}" id="pic_{i}">'
+        f'</a></div><div class="frame-block"></div></div><div class="thumb-under">'
+        f'<p class="title"><a href="/video{i}/video_title_{i}" title="Video title {i}">Video title {i} '
+        f'<span class="duration">{i % 50 + 1} min</span></a></p>'
+        f'<p class="metadata"><span class="bg"><span class="duration">{i % 50 + 1} min</span>'
+        f'<a href="/profiles/uploader{i}"><span class="name">Uploader {i}</span></a>'
+        f'<span> - {i}k Views - </span></span></p></div></div>'
+    )
+
+
+def xhamster_item(i):
+    return (
+        f'<div class="thumb-list__item video-thumb video-thumb--type-video" data-video-id="{i}" data-previewvideo="x">'
+        f'<a class="video-thumb__image-container role-pop thumb-image-container" href="https://xhamster.com/videos/video-title-{i}-xh{i:06x}" '
+        f'data-sprite="https://thumb-cdn.example/{i}/sprite.jpg">'
+        f'<img class="thumb-image-container__image" src="https://thumb-cdn.example/{i}/thumb.jpg" alt="Video title {i}" loading="lazy">'
+        f'<div class="thumb-image-container__duration"><div class="tiny-8643e invert-8643e">{i % 50 + 1}:{i % 60:02d}</div></div></a>'
+        f'<div class="video-thumb-info"><a class="video-thumb-info__name role-pop" href="https://xhamster.com/videos/video-title-{i}-xh{i:06x}" '
+        f'title="Video title {i}">Video title {i}</a><div class="video-thumb-info__metric-container">'
+        f'<div class="video-thumb-views">{i * 7}K views</div><div class="rating">{80 + i % 20}%</div></div></div></div>'
+    )
+
+
+def eporner_item(i):
+    return (
+        f'<div class="mb hdy" data-id="{i}" data-vp="{i}" id="vf{i}"><div class="mbimg"><div class="mbcontent">'
+        f'<a href="/video-{i:08x}/video-title-{i}/"><img src="https://static-cdn.example/thumbs/{i}/1_240.jpg" '
+        f'data-st="{i}" alt="Video title {i}"></a></div></div><div class="mbunder"><p class="mbtit">'
+        f'<a href="/video-{i:08x}/video-title-{i}/">Video title {i}</a></p><p class="mbstats">'
+        f'<span class="mbvie">{i * 11}K</span></p><div class="mbtim">{i % 50 + 1}:{i % 60:02d}</div>'
+        f'<div class="mbvie">{i * 11}K</div><span class="mbrate">{70 + i % 30}%</span></div></div>'
+    )
+
+
+def spankbang_item(i):
+    return (
+        f'<div class="video-item" data-testid="video-item" data-id="{i}"><a href="/{i:x}/video/video+title+{i}" class="thumb">'
+        f'<picture><source srcset="https://tbi.example/t/{i}/w:300/t2-enh/x.webp" type="image/webp">'
+        f'<img src="https://tbi.example/t/{i}/w:300/t2-enh/x.jpg" alt="Video title {i}" class="cover lazyload"></picture>'
+        f'<span class="l" data-testid="video-item-length">{i % 50 + 1}m</span></a><div class="inf">'
+        f'<a href="/{i:x}/video/video+title+{i}" class="n" title="Video title {i}">Video title {i}</a>'
+        f'<ul class="stats"><li class="v"><span>{i * 5}K</span></li><li class="r">{80 + i % 20}%</li></ul></div></div>'
+    )
+
+
+def page(body: str) -> str:
+    # The parts of a real result page that every scraper has to wade through
+    nav = "".join(f'<li class="nav-item"><a href="/categories/c{i}" class="js-nav">Category {i}</a></li>' for i in range(250))
+    sidebar = "".join(
+        f'<div class="sidebar-box"><a href="/pornstar/p{i}"><img src="/p/{i}.jpg" alt="Star {i}"><span>Star {i}</span></a></div>'
+        for i in range(150)
+    )
+    config = json.dumps({"video": [{"id": i, "sources": [f"https://cdn.example/{i}/{q}.mp4" for q in (240, 480, 720, 1080)],
+                                    "thumbs": [f"https://cdn.example/{i}/t{n}.jpg" for n in range(16)]} for i in range(200)]})
+    footer = "".join(f'<p class="footer-link"><a href="/info/{i}">Footer link {i}</a></p>' for i in range(120))
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Results</title>'
+        + "".join(f'<link rel="preload" href="/static/{i}.js" as="script">' for i in range(40))
+        + f'<script>var flashvars = {config};</script></head><body class="logged-out">'
+        f'<header><nav><ul class="nav-list">{nav}</ul></nav></header>'
+        f'<div class="container"><aside class="sidebar">{sidebar}</aside><main class="content">{body}</main></div>'
+        f'<footer>{footer}</footer><script>window.dataLayer = window.dataLayer || [];</script></body></html>'
+    )
+
+
+def build_fixtures(items: int):
+    ids = range(1, items + 1)
+    return {
+        "search-pornhub": page('<ul id="videoSearchResult" class="videos search-video-thumbs">'
+                               + "".join(pornhub_item(i) for i in ids) + "</ul>"),
+        "search-xvideos": page('<div class="mozaique">' + "".join(thumb_block_item(i) for i in ids) + "</div>"),
+        "search-xnxx": page('<div class="mozaique">' + "".join(thumb_block_item(i) for i in ids) + "</div>"),
+        "search-xhamster": page('<div class="thumb-list">' + "".join(xhamster_item(i) for i in ids) + "</div>"),
+        "search-eporner": page('<div id="vidresults">' + "".join(eporner_item(i) for i in ids) + "</div>"),
+        "search-spankbang": page('<div class="video-list">' + "".join(spankbang_item(i) for i in ids) + "</div>"),
+        "playlist-pornhub": page('<ul class="videos row-5-thumbs">' + "".join(pornhub_item(i) for i in ids) + "</ul>"),
+        "playlist-xvideos": page('<div class="mozaique">' + "".join(thumb_block_item(i) for i in ids) + "</div>"),
+        "playlist-eporner": page('<div id="vidresults">' + "".join(eporner_item(i) for i in ids) + "</div>"),
+        "playlist-spankbang": page('<div class="video-list">' + "".join(spankbang_item(i) for i in ids) + "</div>"),
+    }
+
+
+class FakeResponse:
+
+    def __init__(self, text: str, status_code: int = 200):
+        self.text = text
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """Serves the fixture for the first request and 404 after, so playlist scrapers stop after one page"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+
+    def get(self, *args, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.text) if self.calls == 1 else FakeResponse("", 404)
+
+
+def make_case(case: str):
+    kind, site = case.split("-", 1)
+    if kind == "search":
+        searcher = {
+            "pornhub": PornHubSearch, "xvideos": XVideosSearch, "xnxx": XNXXSearch,
+            "xhamster": XHamsterSearch, "eporner": EpornerSearch, "spankbang": SpankBangSearch,
+        }[site]()
+        return searcher, lambda: searcher.search("test", 1)
+
+    downloader = PlaylistDownloader()
+    target = {
+        "pornhub": "https://www.pornhub.com/model/test",
+        "xvideos": "https://www.xvideos.com/profiles/test",
+        "eporner": "https://www.eporner.com/channel/test/",
+        "spankbang": "https://spankbang.com/profile/test",
+    }[site]
+    return downloader, lambda: downloader.GetChannelVideos(target, limit=1000)
+
+
+def time_case(case: str, html: str, runs: int):
+    client, run = make_case(case)
+    timings = []
+    result = None
+    for _ in range(runs):
+        client.session = FakeSession(html)
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = run()
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def run_backend(label: str, fixtures, runs: int):
+    original_strainer = html_parser.SoupStrainer
+    if label == "legacy":
+        # No parse_only filtering: the full html.parser tree the scrapers used to build
+        html_parser.SoupStrainer = lambda *args, **kwargs: None
+        SetParserBackend("html.parser")
+    else:
+        SetParserBackend(label)
+    try:
+        return {case: time_case(case, html, runs) for case, html in fixtures.items()}
+    finally:
+        html_parser.SoupStrainer = original_strainer
+        SetParserBackend(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per case and backend")
+    parser.add_argument("--items", type=int, default=40, help="Result cards per generated page")
+    parser.add_argument("--fixtures", help="Directory of saved pages named <case>.html")
+    args = parser.parse_args()
+
+    fixtures = build_fixtures(args.items)
+    if args.fixtures:
+        saved = {path.stem: path.read_text(encoding="utf-8", errors="replace") for path in Path(args.fixtures).glob("*.html")}
+        fixtures = {case: html for case, html in saved.items() if case in fixtures}
+        if not fixtures:
+            parser.error("no <case>.html files matching a known case in --fixtures")
+
+    backends = ["legacy", "html.parser"]
+    if LXML_AVAILABLE:
+        backends.append("lxml")
+    if SELECTOLAX_AVAILABLE:
+        backends.append("selectolax")
+
+    results = {label: run_backend(label, fixtures, args.runs) for label in backends}
+    baseline = results["legacy"]
+
+    print(f"{'case':<20} {'KiB':>5} {'results':>7}  " + "  ".join(f"{label:>18}" for label in backends))
+    for case, html in fixtures.items():
+        legacy_time, legacy_result = baseline[case]
+        cells = []
+        for label in backends:
+            elapsed, result = results[label][case]
+            mark = "" if result == legacy_result else " MISMATCH"
+            cells.append(f"{elapsed * 1000:7.2f}ms {legacy_time / elapsed:5.1f}x{mark}".rjust(18))
+        print(f"{case:<20} {len(html) // 1024:>5} {len(legacy_result):>7}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
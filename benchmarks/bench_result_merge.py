@@ -0,0 +1,108 @@
+"""
+Multi-site result merge benchmark
+
+First checks MergeResults on known pairs of titles: mirrors of one clip
+as different sites title them (case, plurals, noise words, a reordered
+or extra word, a missing duration) must merge, and numbered parts or different clips must not.
+Then merges a generated result set of the given size, with every clip
+listed on several sites under varied titles, and reports the time and how
+many clusters came out. Exits non-zero if any known pair is wrong.
+
+Usage:
+    python benchmarks/bench_result_merge.py
+    python benchmarks/bench_result_merge.py --results 20000 --runs 3
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from RedLight.result_merge import MergeResults
+
+
+# (title, duration) on one site, (title, duration) on another, same clip?
+PAIRS = [
+    (("Hot Beach Trip With Friends HD", "12:30"), ("Hot beach trips with friends (1080p)", "12:31"), True),
+    (("Sunset Yoga Session", "20:05"), ("sunset yoga sessions - full video", "20 min"), True),
+    (("Road Trip Adventure", "15:00"), ("Road trip adventure", None), True),
+    (("Morning Run In The Park", "8:10"), ("Morning Run in the Park 4K", "8:12"), True),
+    (("Morning Run In The Park", "8:10"), ("Morning run in the park amateur", "8:10"), True),
+    (("Hot Beach Trip With Friends", "12:30"), ("Hot friends beach trip", "12:30"), True),
+    (("Hot Beach Trip With Friends Part 1", "12:30"), ("Hot Beach Trip With Friends Part 2", "12:30"), False),
+    (("Hot Beach Trip With Friends", "12:30"), ("Hot Beach Trip With Friends Part 2", "12:30"), False),
+    (("Hot Beach Trip With Friends", "12:30"), ("Hot Beach Trip With Friends", "41:02"), False),
+    (("Sunset Yoga Session", "20:05"), ("Sunrise Cooking Class", "20:05"), False),
+]
+
+WORDS = (
+    "beach sunset morning party trip friends yoga session road adventure city night "
+    "kitchen garden summer winter lake forest studio office weekend holiday"
+).split()
+
+
+def check_pairs() -> int:
+    failures = 0
+    for (title_a, duration_a), (title_b, duration_b), expected in PAIRS:
+        merged = MergeResults([
+            {"site": "site-a", "url": "a", "title": title_a, "duration": duration_a},
+            {"site": "site-b", "url": "b", "title": title_b, "duration": duration_b},
+        ])
+        same = len(merged) == 1
+        status = "ok" if same == expected else "WRONG"
+        failures += same != expected
+        print(f"{status:<5} {'merge' if expected else 'apart':<5}  {title_a!r} / {title_b!r}")
+    return failures
+
+
+def build_results(count: int, sites: int = 5) -> list:
+    rng = random.Random(42)
+    results = []
+    clip = 0
+    while len(results) < count:
+        words = rng.sample(WORDS, 4)
+        seconds = rng.randint(60, 3600)
+        for site in rng.sample(range(sites), rng.randint(1, sites)):
+            title = words[:]
+            jittered = seconds + rng.randint(-2, 2)
+            if rng.random() < 0.3:
+                title[rng.randrange(len(title))] += "s"
+            if rng.random() < 0.3:
+                title.append(rng.choice(["HD", "1080p", "full video"]))
+            results.append({
+                "site": f"site{site}",
+                "url": f"https://site{site}.example/{clip}",
+                "title": " ".join(title).title() if rng.random() < 0.5 else " ".join(title),
+                "duration": f"{jittered // 60}:{jittered % 60:02d}",
+            })
+        clip += 1
+    return results[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=10000, help="Results in the generated set")
+    parser.add_argument("--runs", type=int, default=3, help="Timed merges of the generated set")
+    args = parser.parse_args()
+
+    failures = check_pairs()
+
+    results = build_results(args.results)
+    timings = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        merged = MergeResults(results)
+        timings.append(time.perf_counter() - started)
+    clips = len({result["url"].rsplit("/", 1)[1] for result in results})
+    print(f"\n{len(results)} results of {clips} clips -> {len(merged)} clusters in {min(timings) * 1000:.0f}ms (best of {args.runs})")
+
+    if failures:
+        print(f"{failures} known pair(s) merged wrongly")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
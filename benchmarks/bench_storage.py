@@ -0,0 +1,94 @@
+"""
+History/resume storage benchmark
+
+Runs the same insert and update workload with N concurrent writer threads
+twice: once the old way (a fresh sqlite3.connect per operation, rollback
+journal) and once through the shared Storage layer (one WAL connection per
+thread, cached statements), then reports operations per second and lock
+errors for each.
+
+Usage:
+    python benchmarks/bench_storage.py
+    python benchmarks/bench_storage.py --threads 8 --ops 2000
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from RedLight.storage import Storage
+
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS download_states (
+        download_id TEXT PRIMARY KEY,
+        downloaded_size INTEGER DEFAULT 0,
+        updated_at TIMESTAMP
+    )
+'''
+INSERT = "INSERT INTO download_states (download_id, downloaded_size, updated_at) VALUES (?, 0, ?)"
+UPDATE = "UPDATE download_states SET downloaded_size = ?, updated_at = ? WHERE download_id = ?"
+
+
+def legacy_op(db_path: Path, sql: str, params: tuple) -> None:
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+def run_workload(label: str, op, threads: int, ops: int) -> None:
+    errors = [0]
+    lock = threading.Lock()
+
+    def writer(worker: int, phase: str):
+        for i in range(ops):
+            key = f"{worker}-{i}"
+            try:
+                if phase == "insert":
+                    op(INSERT, (key, time.time()))
+                else:
+                    op(UPDATE, (i * 1024, time.time(), key))
+            except sqlite3.OperationalError:
+                with lock:
+                    errors[0] += 1
+
+    for phase in ("insert", "update"):
+        errors[0] = 0
+        workers = [threading.Thread(target=writer, args=(n, phase)) for n in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        total = threads * ops
+        print(f"{label:<8} {phase:<7} {total / elapsed:10.0f} ops/s  {elapsed:7.2f}s  lock errors: {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent writer threads")
+    parser.add_argument("--ops", type=int, default=1000, help="Operations per thread and phase")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = Path(tmp) / "legacy.db"
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute(SCHEMA)
+        run_workload("legacy", lambda sql, params: legacy_op(legacy_path, sql, params), args.threads, args.ops)
+
+        storage = Storage(Path(tmp) / "pooled.db")
+        storage.migrate("bench", [SCHEMA])
+        run_workload("pooled", storage.execute, args.threads, args.ops)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+API server load test
+
+Starts the RedLight API server in a subprocess (or targets one already
+running with --url) and hammers a mix of JSON endpoints and GUI assets from
+N keep-alive client threads for a fixed duration, then reports requests per
+second, error count and p50/p95/p99 latency. Run it once per server mode to
+compare the threaded werkzeug server with waitress.
+
+Usage:
+    python benchmarks/load_test_server.py
+    python benchmarks/load_test_server.py --server werkzeug --clients 32 --duration 15
+    python benchmarks/load_test_server.py --url http://127.0.0.1:5000
+"""
+
+import argparse
+import http.client
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_PATHS = [
+    "/api/stats",
+    "/api/downloads/active",
+    "/api/downloads/queue",
+    "/api/downloads/history?limit=50",
+    "/api/config",
+    "/",
+]
+
+SERVER_CODE = '''
+import sys
+sys.path.insert(0, {root!r})
+from RedLight import server
+if {mode!r} == "werkzeug":
+    server.WAITRESS_AVAILABLE = False
+server.serve(host="127.0.0.1", port={port}, threads={threads})
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host: str, port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start on {host}:{port}")
+
+
+def start_server(mode: str, threads: int):
+    port = free_port()
+    code = SERVER_CODE.format(root=str(ROOT), mode=mode, port=port, threads=threads)
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=os.environ.copy()
+    )
+    wait_for_port("127.0.0.1", port)
+    return process, "127.0.0.1", port
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_load(host: str, port: int, paths, clients: int, duration: float, gzip_enabled: bool):
+    latencies = []
+    errors = [0]
+    transferred = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    headers = {"Accept-Encoding": "gzip, br"} if gzip_enabled else {}
+
+    def client(offset: int):
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        local, local_errors, local_bytes = [], 0, 0
+        for path in itertools.islice(itertools.cycle(paths), offset, None):
+            if time.monotonic() >= stop_at:
+                break
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+                if response.status >= 400:
+                    local_errors += 1
+                local_bytes += len(body)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+            transferred[0] += local_bytes
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "mb": transferred[0] / (1024 * 1024),
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the RedLight API server")
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--server", choices=["waitress", "werkzeug"], default="waitress")
+    parser.add_argument("--threads", type=int, default=16, help="Server worker threads (waitress)")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--path", action="append", dest="paths", help="Endpoint to request (repeatable)")
+    parser.add_argument("--no-gzip", action="store_true", help="Do not send Accept-Encoding")
+    args = parser.parse_args()
+
+    process = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port, label = parsed.hostname, parsed.port or 80, args.url
+    else:
+        process, host, port = start_server(args.server, args.threads)
+        label = args.server
+
+    try:
+        paths = args.paths or DEFAULT_PATHS
+        result = run_load(host, port, paths, args.clients, args.duration, not args.no_gzip)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    print(f"Server:    {label}")
+    print(f"Clients:   {args.clients} for {args.duration:.0f}s over {len(paths)} endpoints")
+    print(f"Requests:  {result['requests']} ({result['errors']} errors, {result['mb']:.1f} MiB received)")
+    print(f"Throughput: {result['rps']:.0f} req/s")
+    print(f"Latency:   p50 {result['p50']:.1f} ms, p95 {result['p95']:.1f} ms, p99 {result['p99']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
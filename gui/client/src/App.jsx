@@ -4,10 +4,56 @@ import { Download, Settings, Activity, Zap, Play, Search, X, List, Globe, MoreHo
 import AnimatedButton from './components/AnimatedButton';
 import './App.css';
 
+const FINISHED_EVENTS = ['done', 'failed', 'cancelled', 'paused'];
+const LIVE_EVENTS = ['queued', 'extracting', 'progress', 'merging', ...FINISHED_EVENTS];
+
+// Subscribes to /api/events; `connected` is false when the stream is unavailable
+// so views can fall back to polling
+const useLiveEvents = () => {
+  const [connected, setConnected] = useState(false);
+  const [downloads, setDownloads] = useState({});
+  const [stats, setStats] = useState(null);
+
+  useEffect(() => {
+    if (!window.EventSource) return;
+    const source = new EventSource('/api/events');
+
+    source.onerror = () => setConnected(false);
+
+    source.addEventListener('snapshot', (e) => {
+      const data = JSON.parse(e.data);
+      setDownloads(Object.fromEntries(data.downloads.map(d => [d.download_id, d])));
+      if (data.stats) setStats(data.stats);
+      setConnected(true);
+    });
+
+    const applyDelta = (e) => {
+      const delta = JSON.parse(e.data);
+      setDownloads(prev => {
+        const next = { ...prev };
+        if (FINISHED_EVENTS.includes(e.type)) {
+          delete next[delta.download_id];
+        } else {
+          next[delta.download_id] = { ...prev[delta.download_id], ...delta };
+        }
+        return next;
+      });
+    };
+    LIVE_EVENTS.forEach(type => source.addEventListener(type, applyDelta));
+
+    source.addEventListener('stats', (e) => setStats(JSON.parse(e.data)));
+
+    return () => source.close();
+  }, []);
+
+  return { connected, downloads: Object.values(downloads), stats };
+};
+
 function App() {
   const [activeTab, setActiveTab] = useState('dashboard');
   const [url, setUrl] = useState('');
   const [stats, setStats] = useState({ total_downloads: 0, total_size: 0, avg_quality: 0 });
+  const live = useLiveEvents();
 
   // Real Config State
   const [config, setConfig] = useState({
@@ -32,8 +78,13 @@ function App() {
       .catch(console.error);
   }, []);
 
-  // Fetch Stats on Mount & Periodically
   useEffect(() => {
+    if (live.stats) setStats(live.stats);
+  }, [live.stats]);
+
+  // Fetch Stats on Mount & Periodically, unless the event stream is delivering them
+  useEffect(() => {
+    if (live.connected) return;
     const fetchStats = async () => {
       try {
         const res = await fetch('/api/stats');
@@ -49,7 +100,7 @@ function App() {
     fetchStats();
     const interval = setInterval(fetchStats, 5000);
     return () => clearInterval(interval);
-  }, []);
+  }, [live.connected]);
 
   const handleStartDownload = async () => {
     if (!url) return;
@@ -133,7 +184,7 @@ function App() {
               {activeTab === 'dashboard' && <DashboardView stats={stats} />}
               {activeTab === 'search' && <SearchView />}
               {activeTab === 'playlist' && <PlaylistView />}
-              {activeTab === 'downloads' && <DownloadsView />}
+              {activeTab === 'downloads' && <DownloadsView live={live} />}
               {activeTab === 'history' && <HistoryView />}
               {activeTab === 'extras' && <ExtrasView />}
               {activeTab === 'settings' && <SettingsView config={config} setConfig={setConfig} />}
@@ -194,10 +245,30 @@ const SearchView = () => {
   const handleSearch = async () => {
     if (!query) return;
     setSearching(true);
+    setResults([]);
     try {
-      const res = await fetch(`/api/search?q=${encodeURIComponent(query)}`);
-      const data = await res.json();
-      setResults(Array.isArray(data) ? data : []);
+      // NDJSON: one line per site as it answers, so fast sites render right away
+      const res = await fetch(`/api/search?q=${encodeURIComponent(query)}&stream=1`);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const message = JSON.parse(line);
+          if (message.done && message.merged) {
+            // Same clips mirrored on several sites collapsed and ranked
+            setResults(message.merged);
+          } else if (message.results && message.results.length) {
+            setResults(prev => [...prev, ...message.results]);
+          }
+        }
+      }
     } catch (e) {
       console.error(e);
     } finally {
@@ -246,7 +317,7 @@ const SearchView = () => {
             <div>
               <h4 style={{ margin: 0, fontSize: 14, fontWeight: 500 }}>{item.title}</h4>
               <p style={{ margin: '4px 0 0', fontSize: 12, color: '#888' }}>
-                {item.duration} • {item.site || 'Unknown'}
+                {item.duration} • {(item.sites && item.sites.length ? item.sites.join(', ') : item.site) || 'Unknown'}
               </p>
             </div>
             <AnimatedButton onClick={() => {/* Could copy URL or start download */ }}>
@@ -391,9 +462,10 @@ const PlaylistView = () => {
   );
 };
 
-const DownloadsView = () => {
-  const [downloads, setDownloads] = useState([]);
+const DownloadsView = ({ live }) => {
+  const [polled, setDownloads] = useState([]);
   const [loading, setLoading] = useState(true);
+  const downloads = live.connected ? live.downloads : polled;
 
   const fetchDownloads = async () => {
     try {
@@ -416,17 +488,21 @@ const DownloadsView = () => {
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ download_id: id })
       });
-      fetchDownloads();
+      if (!live.connected) fetchDownloads();
     } catch (e) {
       console.error("Cancel failed", e);
     }
   };
 
   useEffect(() => {
+    if (live.connected) {
+      setLoading(false);
+      return;
+    }
     fetchDownloads();
     const interval = setInterval(fetchDownloads, 1000);
     return () => clearInterval(interval);
-  }, []);
+  }, [live.connected]);
 
   return (
     <div className="view-container">
@@ -460,6 +536,15 @@ const DownloadsView = () => {
                     borderRadius: 4,
                     fontSize: 10
                   }}>{item.status}</span>
+                  {['downloading', 'merging'].includes(item.status) && (
+                    <a
+                      href={`/api/play/${item.download_id}/index.m3u8`}
+                      title="Open in a media player (VLC, mpv, Safari) while it downloads"
+                      style={{ display: 'flex', alignItems: 'center', fontSize: 12, color: 'var(--accent-color)' }}
+                    >
+                      <Play size={12} style={{ marginRight: 4 }} /> Stream
+                    </a>
+                  )}
                   <AnimatedButton
                     onClick={() => handleCancel(item.download_id)}
                     style={{
@@ -600,12 +685,29 @@ const StatCard = ({ label, value }) => (
 
 const HistoryView = () => {
   const [history, setHistory] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(false);
+
+  const loadPage = (after) => {
+    setLoading(true);
+    const params = new URLSearchParams({ limit: 50 });
+    if (after) params.set('after', after);
+    fetch(`/api/downloads/history?${params}`)
+      .then(res => {
+        setNextCursor(res.headers.get('X-Next-Cursor'));
+        return res.json();
+      })
+      .then(data => {
+        if (Array.isArray(data)) {
+          setHistory(prev => after ? [...prev, ...data] : data);
+        }
+      })
+      .catch(console.error)
+      .finally(() => setLoading(false));
+  };
 
   useEffect(() => {
-    fetch('/api/downloads/history?limit=50')
-      .then(res => res.json())
-      .then(data => setHistory(data))
-      .catch(console.error);
+    loadPage(null);
   }, []);
 
   return (
@@ -636,6 +738,13 @@ const HistoryView = () => {
             </tbody>
           </table>
         )}
+        {nextCursor && (
+          <div style={{ textAlign: 'center', marginTop: '20px' }}>
+            <AnimatedButton variant="secondary" onClick={() => !loading && loadPage(nextCursor)}>
+              {loading ? 'Loading...' : 'Load more'}
+            </AnimatedButton>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -14,8 +14,8 @@ else:
 
 sys.path.append(base_path)
 
-from RedLight.server import app
+from RedLight.server import app, serve
 
 if __name__ == '__main__':
     print("Starting RedLight Server...", flush=True)
-    app.run(host='127.0.0.1', port=5000, debug=False)
+    serve(host='127.0.0.1', port=5000)